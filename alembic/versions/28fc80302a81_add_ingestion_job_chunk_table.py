@@ -0,0 +1,41 @@
+"""add ingestion_job_chunk table
+
+Revision ID: 28fc80302a81
+Revises: be10e979f19e
+Create Date: 2026-10-18 12:21:07.884903
+
+"""
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '28fc80302a81'
+down_revision = 'be10e979f19e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('ingestion_job_chunk',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('nr', sa.Integer(), nullable=False),
+    sa.Column('content', sa.TEXT(), nullable=False),
+    sa.ForeignKeyConstraint(['job_id'], ['ingestion_job.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('job_id', 'nr')
+    )
+    op.create_index(op.f('ix_ingestion_job_chunk_id'), 'ingestion_job_chunk', ['id'], unique=False)
+    op.create_index(
+        op.f('ix_ingestion_job_chunk_job_id'), 'ingestion_job_chunk', ['job_id'], unique=False
+    )
+    op.drop_column('ingestion_job', 'content')
+
+
+def downgrade() -> None:
+    op.add_column('ingestion_job', sa.Column('content', sa.TEXT(), nullable=True))
+    op.drop_index(op.f('ix_ingestion_job_chunk_job_id'), table_name='ingestion_job_chunk')
+    op.drop_index(op.f('ix_ingestion_job_chunk_id'), table_name='ingestion_job_chunk')
+    op.drop_table('ingestion_job_chunk')
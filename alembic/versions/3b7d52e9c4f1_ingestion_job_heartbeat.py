@@ -0,0 +1,38 @@
+"""ingestion job heartbeat
+
+Revision ID: 3b7d52e9c4f1
+Revises: a4c9e07d52b1
+Create Date: 2026-10-18 19:12:40.581236
+
+"""
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7d52e9c4f1'
+down_revision = 'a4c9e07d52b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'ingestion_job',
+        sa.Column(
+            'updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()
+        ),
+    )
+    op.alter_column('ingestion_job', 'updated_at', server_default=None)
+    op.add_column(
+        'ingestion_job', sa.Column('attempt', sa.Integer(), nullable=False, server_default='0')
+    )
+    op.alter_column('ingestion_job', 'attempt', server_default=None)
+    op.add_column('ingestion_job', sa.Column('first_sentence_id', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('ingestion_job', 'first_sentence_id')
+    op.drop_column('ingestion_job', 'attempt')
+    op.drop_column('ingestion_job', 'updated_at')
@@ -0,0 +1,33 @@
+"""sentence trigram index
+
+Revision ID: 5e558de4b3e0
+Revises: 28fc80302a81
+Create Date: 2026-10-18 13:05:44.170326
+
+"""
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e558de4b3e0'
+down_revision = '28fc80302a81'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        'ix_sentence_sentence_trgm',
+        'sentence',
+        ['sentence'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'sentence': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sentence_sentence_trgm', table_name='sentence')
@@ -0,0 +1,57 @@
+"""word unique lem pos
+
+Revision ID: 6196d3a95e74
+Revises: f798c0ccd92f
+Create Date: 2026-10-18 10:12:31.402118
+
+"""
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6196d3a95e74'
+down_revision = 'f798c0ccd92f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # merge words duplicated by concurrent uploads into the word with the lowest id
+    op.execute(
+        """
+        CREATE TEMPORARY TABLE word_duplicate ON COMMIT DROP AS
+        SELECT id, min(id) OVER (PARTITION BY lem, pos) AS keep_id FROM word
+        """
+    )
+    op.execute("DELETE FROM word_duplicate WHERE id = keep_id")
+    op.execute(
+        """
+        UPDATE sentence_word SET word_id = d.keep_id
+        FROM word_duplicate d WHERE sentence_word.word_id = d.id
+        """
+    )
+    op.execute(
+        """
+        UPDATE flashcard_word SET word_id = d.keep_id
+        FROM word_duplicate d WHERE flashcard_word.word_id = d.id
+        """
+    )
+    op.execute(
+        """
+        UPDATE word SET count = word.count + merged.count
+        FROM (
+            SELECT d.keep_id, sum(w.count) AS count
+            FROM word_duplicate d JOIN word w ON w.id = d.id
+            GROUP BY d.keep_id
+        ) merged
+        WHERE word.id = merged.keep_id
+        """
+    )
+    op.execute("DELETE FROM word USING word_duplicate d WHERE word.id = d.id")
+    op.create_unique_constraint('word_lem_pos_key', 'word', ['lem', 'pos'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('word_lem_pos_key', 'word', type_='unique')
@@ -0,0 +1,32 @@
+"""translation unique word
+
+Revision ID: 653fdc290e06
+Revises: ccaa20199b2c
+Create Date: 2026-10-18 03:45:36.889153
+
+"""
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '653fdc290e06'
+down_revision = 'ccaa20199b2c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # keep the oldest translation of every word
+    op.execute(
+        """
+        DELETE FROM translation a USING translation b
+        WHERE a.word = b.word AND a.id > b.id
+        """
+    )
+    op.create_index(op.f('ix_translation_word'), 'translation', ['word'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_translation_word'), table_name='translation')
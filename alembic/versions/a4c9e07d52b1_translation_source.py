@@ -0,0 +1,51 @@
+"""translation source
+
+Revision ID: a4c9e07d52b1
+Revises: def0b1669483
+Create Date: 2026-10-18 17:05:12.304417
+
+"""
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c9e07d52b1'
+down_revision = 'def0b1669483'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'translation',
+        sa.Column(
+            'source',
+            sqlmodel.sql.sqltypes.AutoString(length=10),
+            nullable=False,
+            server_default='dict',
+        ),
+    )
+    op.alter_column('translation', 'source', server_default=None)
+    # rows saved by PONS import are "source -> target" lines
+    op.execute("UPDATE translation SET source = 'pons' WHERE definition LIKE '% -> %'")
+    op.drop_index(op.f('ix_translation_word'), table_name='translation')
+    op.create_index(op.f('ix_translation_word'), 'translation', ['word'], unique=False)
+    op.create_index(
+        'ix_translation_word_source', 'translation', ['word', 'source'], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_translation_word_source', table_name='translation')
+    op.drop_index(op.f('ix_translation_word'), table_name='translation')
+    # keep one translation of every word for the unique index
+    op.execute(
+        """
+        DELETE FROM translation a USING translation b
+        WHERE a.word = b.word AND a.id > b.id
+        """
+    )
+    op.create_index(op.f('ix_translation_word'), 'translation', ['word'], unique=True)
+    op.drop_column('translation', 'source')
@@ -0,0 +1,46 @@
+"""add ingestion_job table
+
+Revision ID: be10e979f19e
+Revises: 6196d3a95e74
+Create Date: 2026-10-18 11:03:52.517340
+
+"""
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'be10e979f19e'
+down_revision = '6196d3a95e74'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('ingestion_job',
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(length=10), nullable=False),
+    sa.Column('sentences_processed', sa.Integer(), nullable=False),
+    sa.Column('words_saved', sa.Integer(), nullable=False),
+    sa.Column('error', sa.TEXT(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('content', sa.TEXT(), nullable=True),
+    sa.ForeignKeyConstraint(['book_id'], ['book.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ingestion_job_id'), 'ingestion_job', ['id'], unique=False)
+    op.create_index(op.f('ix_ingestion_job_book_id'), 'ingestion_job', ['book_id'], unique=False)
+    op.create_index(op.f('ix_ingestion_job_status'), 'ingestion_job', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ingestion_job_status'), table_name='ingestion_job')
+    op.drop_index(op.f('ix_ingestion_job_book_id'), table_name='ingestion_job')
+    op.drop_index(op.f('ix_ingestion_job_id'), table_name='ingestion_job')
+    op.drop_table('ingestion_job')
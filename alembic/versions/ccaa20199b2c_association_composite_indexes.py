@@ -0,0 +1,49 @@
+"""association composite indexes
+
+Revision ID: ccaa20199b2c
+Revises: 5e558de4b3e0
+Create Date: 2026-10-18 14:12:07.402693
+
+"""
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ccaa20199b2c'
+down_revision = '5e558de4b3e0'
+branch_labels = None
+depends_on = None
+
+RELATIONS = (
+    ('sentence_word', 'sentence_id', 'word_id'),
+    ('sentence_flashcard', 'sentence_id', 'flashcard_id'),
+    ('flashcard_word', 'flashcard_id', 'word_id'),
+)
+
+
+def upgrade() -> None:
+    for table, column1, column2 in RELATIONS:
+        # keep only the oldest row of duplicated relations, unique indexes would fail on them
+        op.execute(
+            f"""
+            DELETE FROM {table} a USING {table} b
+            WHERE a.{column1} = b.{column1} AND a.{column2} = b.{column2} AND a.id > b.id
+            """
+        )
+        op.create_index(
+            f'ix_{table}_{column1}_{column2}', table, [column1, column2], unique=True
+        )
+        op.create_index(
+            f'ix_{table}_{column2}_{column1}', table, [column2, column1], unique=True
+        )
+    op.create_index('ix_sentence_book_id_nr', 'sentence', ['book_id', 'nr'], unique=False)
+    # word(lem, pos) is already indexed by the word_lem_pos_key unique constraint
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sentence_book_id_nr', table_name='sentence')
+    for table, column1, column2 in reversed(RELATIONS):
+        op.drop_index(f'ix_{table}_{column2}_{column1}', table_name=table)
+        op.drop_index(f'ix_{table}_{column1}_{column2}', table_name=table)
@@ -0,0 +1,49 @@
+"""add book_word table
+
+Revision ID: def0b1669483
+Revises: 653fdc290e06
+Create Date: 2026-10-18 16:20:41.118204
+
+"""
+import sqlmodel
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'def0b1669483'
+down_revision = '653fdc290e06'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('book_word',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('word_id', sa.Integer(), nullable=False),
+    sa.Column('occurrences', sa.Integer(), nullable=False),
+    sa.Column('first_sentence_nr', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['book.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['word_id'], ['word.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_book_word_id'), 'book_word', ['id'], unique=False)
+    op.create_index('ix_book_word_book_id_word_id', 'book_word', ['book_id', 'word_id'], unique=True)
+    op.create_index('ix_book_word_book_id_occurrences', 'book_word', ['book_id', 'occurrences'], unique=False)
+    # statistics of already loaded books
+    op.execute(
+        """
+        INSERT INTO book_word (book_id, word_id, occurrences, first_sentence_nr)
+        SELECT sentence.book_id, sentence_word.word_id, count(*), min(sentence.nr)
+        FROM sentence_word JOIN sentence ON sentence.id = sentence_word.sentence_id
+        GROUP BY sentence.book_id, sentence_word.word_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_book_word_book_id_occurrences', table_name='book_word')
+    op.drop_index('ix_book_word_book_id_word_id', table_name='book_word')
+    op.drop_index(op.f('ix_book_word_id'), table_name='book_word')
+    op.drop_table('book_word')
@@ -7,6 +7,7 @@ routes = (
     "auth",
     "book",
     "flashcard",
+    "job",
     "sentence",
     "user",
     "word",
@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile
-from fastapi_pagination import Page
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile
 from sqlalchemy import ScalarResult
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from wing.auth.jwthandler import get_current_user
+from wing.config import settings
 from wing.crud.book import (
     create_book,
     delete_book,
@@ -14,14 +14,24 @@ from wing.crud.book import (
     unset_currently_reading,
     update_book,
 )
-from wing.crud.flashcard import get_flashcard_ids_for_book
-from wing.crud.sentence import get_sentences_for_flashcard, count_sentences_for_book
-from wing.crud.word import count_words_for_book
+from wing.crud.book_word import get_book_top_words
+from wing.crud.flashcard import get_flashcard_ids_for_book, get_flashcards_for_study
+from wing.crud.ingestion_job import (
+    add_ingestion_job_chunk,
+    create_ingestion_job,
+    delete_ingestion_job,
+    update_ingestion_job,
+)
+from wing.crud.sentence import get_sentences_for_flashcard
 from wing.db.session import get_session
 from wing.models.book import Book, BookCreate, BookFind, BookUpdate
+from wing.models.book_word import BookWordStats
+from wing.models.flashcard import FlashcardStudy
+from wing.models.ingestion_job import IngestionJobPublic, JOB_QUEUED
+from wing.models.page import CursorPage
 from wing.models.sentence import Sentence
 from wing.models.user import UserPublic
-from wing.processing import load_sentences, save_prepared_words
+from wing.processing import read_upload_chunks
 
 router = APIRouter(
     prefix="/books",
@@ -46,9 +56,9 @@ async def create_book_route(
 
 @router.post(
     "/upload/{book_id}",
-    summary="Upload book content.",
-    status_code=status.HTTP_200_OK,
-    response_model=Book,
+    summary="Upload book content and queue it for loading.",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=IngestionJobPublic,
     dependencies=[Depends(get_current_user)],
 )
 async def create_upload_file(
@@ -62,28 +72,37 @@ async def create_upload_file(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Book not found with the given ID"
         )
-    data = (await file.read()).decode()
-
-    pos_collections = await load_sentences(db, data, book_id)
-
-    for dest in pos_collections:
-        await save_prepared_words(db, dest)
-
-    book.sentences_count = await count_sentences_for_book(db, book.id)
-    book.words_count = await count_words_for_book(db, book.id)
-    await update_book(db, book.id, current_user.id, BookUpdate(**book.dict()))
-
-    return book
+    job = await create_ingestion_job(db, book.id, current_user.id)
+    job_id = job.id
+    try:
+        nr = 0
+        async for chunk in read_upload_chunks(file):
+            await add_ingestion_job_chunk(db, job_id, nr, chunk)
+            nr += 1
+        job.status = JOB_QUEUED
+        return await update_ingestion_job(db, job)
+    except UnicodeDecodeError:
+        await delete_ingestion_job(db, job_id)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Book content must be UTF-8 text"
+        )
+    except Exception:
+        await delete_ingestion_job(db, job_id)
+        raise
 
 
 @router.get(
     "/public",
     summary="Get public books.",
     status_code=status.HTTP_200_OK,
-    response_model=Page[Book],
+    response_model=CursorPage[Book],
 )
-async def get_books_route(db: AsyncSession = Depends(get_session)) -> Page[Book]:
-    return await find_books(session=db, book=BookFind(is_public=True))
+async def get_books_route(
+    db: AsyncSession = Depends(get_session),
+    cursor: str | None = None,
+    size: int = Query(settings.PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+) -> CursorPage[Book]:
+    return await find_books(session=db, book=BookFind(is_public=True), cursor=cursor, size=size)
 
 
 @router.get(
@@ -154,6 +173,30 @@ async def delete_book_route(
     return await delete_book(session=db, book_id=book_id, user_id=current_user.id)
 
 
+@router.get(
+    "/{book_id}/words/top",
+    summary="Get the most frequent words of book.",
+    status_code=status.HTTP_200_OK,
+    response_model=list[BookWordStats],
+    dependencies=[Depends(get_current_user)],
+)
+async def get_book_top_words_route(
+    book_id: int,
+    current_user: UserPublic = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session),
+    limit: int = Query(20, ge=1, le=settings.MAX_PAGE_SIZE),
+    unknown: bool = False,
+) -> list[BookWordStats]:
+    book = await get_book(session=db, book_id=book_id, user_id=current_user.id)
+    if not book:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Book not found with the given ID"
+        )
+    return await get_book_top_words(
+        db, book_id, limit, unknown_for_user_id=current_user.id if unknown else None
+    )
+
+
 @router.get(
     "/{book_id}/flashcards",
     summary="Get all flashcard ids for book",
@@ -169,11 +212,43 @@ async def get_flashcard_ids_for_book_route(
     return await get_flashcard_ids_for_book(session=db, book_id=book_id, user_id=current_user.id)
 
 
+@router.get(
+    "/{book_id}/flashcards/study",
+    summary="Get flashcards for book with their words and first sentences.",
+    status_code=status.HTTP_200_OK,
+    response_model=CursorPage[FlashcardStudy],
+    dependencies=[Depends(get_current_user)],
+)
+async def get_flashcards_for_study_route(
+    book_id: int,
+    current_user: UserPublic = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session),
+    ids: list[int] | None = Query(None),
+    cursor: str | None = None,
+    size: int = Query(settings.PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    sentences: int = Query(settings.STUDY_SENTENCES_LIMIT, ge=1, le=settings.MAX_PAGE_SIZE),
+) -> CursorPage[FlashcardStudy]:
+    book = await get_book(session=db, book_id=book_id, user_id=current_user.id)
+    if not book:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Book not found with the given ID"
+        )
+    return await get_flashcards_for_study(
+        session=db,
+        book_id=book_id,
+        user_id=current_user.id,
+        flashcard_ids=ids,
+        cursor=cursor,
+        size=size,
+        sentences_limit=sentences,
+    )
+
+
 @router.get(
     "/{book_id}/flashcards/{flashcard_id}/sentences",
     summary="Get sentences for book and flashcard.",
     status_code=status.HTTP_200_OK,
-    response_model=list[Sentence],
+    response_model=CursorPage[Sentence],
     dependencies=[Depends(get_current_user)],
 )
 async def get_sentences_for_flashcard_route(
@@ -181,12 +256,16 @@ async def get_sentences_for_flashcard_route(
     flashcard_id: int,
     current_user: UserPublic = Depends(get_current_user),
     db: AsyncSession = Depends(get_session),
+    cursor: str | None = None,
+    size: int = Query(settings.PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
 ):
     return await get_sentences_for_flashcard(
         session=db,
         book_id=book_id,
         flashcard_id=flashcard_id,
         user_id=current_user.id,
+        cursor=cursor,
+        size=size,
     )
 
 
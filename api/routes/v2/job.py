@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from wing.auth.jwthandler import get_current_user
+from wing.crud.ingestion_job import get_ingestion_job, requeue_ingestion_job
+from wing.db.session import get_session
+from wing.models.ingestion_job import IngestionJob, IngestionJobPublic
+from wing.models.user import UserPublic
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"],
+)
+
+
+@router.get(
+    "/{job_id}",
+    summary="Get book loading job status and progress.",
+    status_code=status.HTTP_200_OK,
+    response_model=IngestionJobPublic,
+    dependencies=[Depends(get_current_user)],
+)
+async def get_job_route(
+    job_id: int,
+    current_user: UserPublic = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session),
+) -> IngestionJob:
+    job = await get_ingestion_job(session=db, job_id=job_id, user_id=current_user.id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found with the given ID"
+        )
+    return job
+
+
+@router.post(
+    "/{job_id}/retry",
+    summary="Queue failed book loading job again.",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=IngestionJobPublic,
+    dependencies=[Depends(get_current_user)],
+)
+async def retry_job_route(
+    job_id: int,
+    current_user: UserPublic = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session),
+) -> IngestionJob:
+    job = await get_ingestion_job(session=db, job_id=job_id, user_id=current_user.id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found with the given ID"
+        )
+    return await requeue_ingestion_job(session=db, job=job)
@@ -1,8 +1,8 @@
-from fastapi import APIRouter, status, Depends, HTTPException
-from sqlalchemy import ScalarResult
+from fastapi import APIRouter, status, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from wing.auth.jwthandler import get_current_user
+from wing.config import settings
 from wing.crud.book import get_book
 from wing.crud.sentence import (
     create_sentence,
@@ -10,6 +10,7 @@ from wing.crud.sentence import (
     get_sentences_with_phrase_for_user,
 )
 from wing.db.session import get_session
+from wing.models.page import CursorPage
 from wing.models.sentence import Sentence, SentenceCreate
 from wing.models.user import UserPublic
 
@@ -43,15 +44,19 @@ async def create_sentence_route(
     "/search",
     summary="Search book sentences for given phrase.",
     status_code=status.HTTP_200_OK,
-    response_model=list[Sentence],
+    response_model=CursorPage[Sentence],
     dependencies=[Depends(get_current_user)],
 )
 async def search_sentences_route(
     current_user: UserPublic = Depends(get_current_user),
     db: AsyncSession = Depends(get_session),
-    q: str | None = None
-) -> ScalarResult[Sentence]:
-    return await get_sentences_with_phrase_for_user(db, q, current_user.id)
+    q: str | None = None,
+    cursor: str | None = None,
+    size: int = Query(settings.SENTENCES_SEARCH_LIMIT, ge=1, le=settings.MAX_PAGE_SIZE),
+) -> CursorPage[Sentence]:
+    return await get_sentences_with_phrase_for_user(
+        db, q, current_user.id, ranked=True, cursor=cursor, size=size
+    )
 
 
 @router.get(
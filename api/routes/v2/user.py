@@ -1,12 +1,13 @@
-from fastapi import APIRouter, status, Depends, HTTPException
+from fastapi import APIRouter, status, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi_pagination import Page
 
 from wing.auth.jwthandler import get_current_user
+from wing.config import settings
 from wing.crud.book import find_books
 from wing.crud.user import create_user, get_user, get_user_flashcards, find_users, update_user
 from wing.db.session import get_session
 from wing.models.book import Book, BookFind
+from wing.models.page import CursorPage
 from wing.models.user import UserCreate, UserFind, UserPublic, UserUpdate
 from wing.models.flashcard import Flashcard
 
@@ -55,28 +56,35 @@ async def get_current_user_route(current_user: UserPublic = Depends(get_current_
     "/flashcards",
     summary="Get current user flashcards.",
     status_code=status.HTTP_200_OK,
-    response_model=Page[Flashcard],
+    response_model=CursorPage[Flashcard],
     dependencies=[Depends(get_current_user)],
 )
 async def get_user_flashcards_route(
     current_user: UserPublic = Depends(get_current_user),
     db: AsyncSession = Depends(get_session),
-) -> Page[Flashcard]:
-    return await get_user_flashcards(session=db, current_user=current_user)
+    cursor: str | None = None,
+    size: int = Query(settings.PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+) -> CursorPage[Flashcard]:
+    return await get_user_flashcards(
+        session=db, current_user=current_user, cursor=cursor, size=size
+    )
 
 
 @router.get(
     "/books",
     summary="Get current user books.",
     status_code=status.HTTP_200_OK,
-    response_model=Page[Book],
+    response_model=CursorPage[Book],
     dependencies=[Depends(get_current_user)],
 )
 async def get_user_books_route(
     current_user: UserPublic = Depends(get_current_user),
     db: AsyncSession = Depends(get_session),
-) -> Page[Book]:
-    return await find_books(session=db, book=BookFind(user_id=current_user.id))
+    cursor: str | None = None,
+    size: int = Query(settings.PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+) -> CursorPage[Book]:
+    book = BookFind(user_id=current_user.id)
+    return await find_books(session=db, book=book, cursor=cursor, size=size)
 
 
 @router.get(
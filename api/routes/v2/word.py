@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
 from sqlalchemy import ScalarResult
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from wing.auth.jwthandler import get_current_user
+from wing.config import settings
 from wing.crud.word import (
     create_word,
     delete_word,
     find_words,
     find_synset,
+    find_synsets,
     get_word,
     update_word,
     get_word_sentences_for_user,
@@ -15,9 +17,10 @@ from wing.crud.word import (
     word_join_to_sentences_by_user,
 )
 from wing.db.session import get_session
+from wing.models.page import CursorPage
 from wing.models.sentence import Sentence
 from wing.models.user import UserPublic
-from wing.models.word import Word, WordCreate, WordUpdate, WordFind
+from wing.models.word import SynsetQuery, Word, WordCreate, WordUpdate, WordFind
 
 router = APIRouter(
     prefix="/words",
@@ -107,19 +110,39 @@ async def find_synset_route(
     return await find_synset(session=db, word_id=word_id, sentence_id=sentence_id)
 
 
+@router.post(
+    "/synsets",
+    summary="Get synsets and definitions for many words in their sentences",
+    status_code=status.HTTP_200_OK,
+    response_model=list[dict],
+    dependencies=[Depends(get_current_user)],
+)
+async def find_synsets_route(
+    queries: list[SynsetQuery] = Body(max_length=settings.MAX_PAGE_SIZE),
+    current_user: UserPublic = Depends(get_current_user),
+    db: AsyncSession = Depends(get_session),
+) -> list[dict]:
+    pairs = [(query.word_id, query.sentence_id) for query in queries]
+    return await find_synsets(session=db, pairs=pairs, user_id=current_user.id)
+
+
 @router.get(
     "/{word_id}/sentences",
     summary="Get sentences related to word",
     status_code=status.HTTP_200_OK,
-    response_model=list[Sentence],
+    response_model=CursorPage[Sentence],
     dependencies=[Depends(get_current_user)],
 )
 async def get_word_sentences_route(
     word_id: int,
     current_user: UserPublic = Depends(get_current_user),
     db: AsyncSession = Depends(get_session),
-) -> ScalarResult[Sentence]:
-    return await get_word_sentences_for_user(session=db, word_id=word_id, user_id=current_user.id)
+    cursor: str | None = None,
+    size: int = Query(settings.PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+) -> CursorPage[Sentence]:
+    return await get_word_sentences_for_user(
+        session=db, word_id=word_id, user_id=current_user.id, cursor=cursor, size=size
+    )
 
 
 @router.post(
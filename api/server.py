@@ -1,10 +1,21 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+import nltk
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_pagination import add_pagination
 
 from .routes import router as api_router
+from wing.auth.passwords import password_hasher
 from wing.config import settings
+from wing.definitions import definitions, watch_vocabulary
 from wing.models import *
+from wing.structure import phrase_tables
+
+logging.basicConfig(encoding="utf-8", level=settings.LOGGING_LEVEL)
+logger = logging.getLogger(__name__)
 
 
 origins = [
@@ -14,11 +25,37 @@ origins = [
 ]
 
 
+def warm_up() -> None:
+    """
+    Load resources which are otherwise loaded by the first request using them
+    """
+    start = time.perf_counter()
+    definitions.ensure_loaded()
+    nltk.corpus.wordnet.ensure_loaded()
+    phrase_tables()
+    logger.info(f"Warmed up in {time.perf_counter() - start:.2f}s")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.WARM_UP_ON_STARTUP:
+        await asyncio.to_thread(warm_up)
+    watcher = None
+    if settings.VOCABULARY_RELOAD_INTERVAL:
+        watcher = asyncio.create_task(
+            watch_vocabulary(definitions, settings.VOCABULARY_RELOAD_INTERVAL)
+        )
+    yield
+    if watcher:
+        watcher.cancel()
+
+
 def get_application():
     app = FastAPI(
         title=settings.PROJECT_NAME,
         version=settings.VERSION,
         docs_url="/docs",
+        lifespan=lifespan,
     )
     app.include_router(api_router, prefix="/api")
     app.add_middleware(
@@ -28,7 +65,6 @@ def get_application():
         allow_methods=["*"],
         allow_headers=["*"],
     )
-    add_pagination(app)
     return app
 
 
@@ -42,4 +78,6 @@ async def health():
         version=settings.VERSION,
         status="OK",
         message="Visit /docs for more information.",
+        vocabulary=definitions.model_info(),
+        passwords=password_hasher.metrics(),
     )
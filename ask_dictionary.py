@@ -1,12 +1,16 @@
 #!/usr/bin/env python
+import asyncio
 import logging
+from functools import partial
 
 import typer
 
 import urllib3
 
 from wing.config import settings
-from wing.tools_external import translate
+from wing.db.session import SessionLocal
+from wing.models.translation import SOURCE_PONS
+from wing.translation_lookup import find_pons_translations, translation_lookup
 
 urllib3.disable_warnings()
 
@@ -14,19 +18,26 @@ logging.basicConfig(encoding='utf-8', level=settings.LOGGING_LEVEL)
 logger = logging.getLogger(__name__)
 
 
+async def find_translation(word: str, debug: bool) -> str | None:
+    async with SessionLocal() as session:
+        translation = await translation_lookup.find(
+            session,
+            word,
+            remote=partial(find_pons_translations, log_output=debug),
+            source=SOURCE_PONS,
+        )
+    await translation_lookup.flush()
+    return translation
+
+
 def main(word: str, debug: bool = False):
     """
-    Show word translations from configured API
+    Show word translations from database or configured API
     """
-    headers = {
-        "X-Secret": settings.PONS_SECRET_KEY,
-    }
-    lang = "enpl"
-    api_url = f"{settings.API_URL}?l={lang}&q={word}"
-    translations = translate(api_url, headers, debug)
-    if translations:
-        for translation_tuple in translations:
-            logger.info(f"{translation_tuple[0]} \t -> \t {translation_tuple[1]}")
+    translation = asyncio.run(find_translation(word, debug))
+    if translation:
+        for line in translation.splitlines():
+            logger.info(line)
     else:
         logger.info("Translation not found.")
 
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+Microbenchmark of phrase normalization used for translation sources. Exits with 1 when
+one call of filter_source takes longer than the limit.
+"""
+import logging
+import timeit
+
+import typer
+
+from wing.processing import filter_source
+from wing.structure import DETERMINERS, PARTICLES, REFLEXIVES, load_pronouns
+
+logging.basicConfig(encoding='utf-8', level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def phrases() -> list[list[str]]:
+    """
+    Two word phrases with every known part, and phrases without any
+    """
+    rows = [[part, "word"] for part in PARTICLES | DETERMINERS | load_pronouns()]
+    rows += [["enjoy", part] for part in REFLEXIVES]
+    rows += [["considerably", "reassured"], ["pig"], ["he", "was", "reassured"]]
+    return rows
+
+
+def main(
+    repeat: int = typer.Option(default=5, help="number of measurements, the best is shown"),
+    number: int = typer.Option(default=100, help="passes over all phrases in a measurement"),
+    max_ns: float = typer.Option(default=None, help="limit of nanoseconds per call"),
+):
+    rows = phrases()
+    filter_source(rows[0])  # read pronouns before measuring
+
+    def run():
+        for row in rows:
+            filter_source(row)
+
+    best = min(timeit.repeat(run, repeat=repeat, number=number))
+    ns_per_call = best / (number * len(rows)) * 1e9
+    logger.info(f"filter_source: {len(rows)} phrases, {ns_per_call:.0f} ns per call")
+    if max_ns is not None and ns_per_call > max_ns:
+        logger.error(f"{ns_per_call:.0f} ns per call exceeds {max_ns} ns")
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+Measure API process startup: import time of the slowest modules and time to the first
+response of uvicorn, with and without warm-up. Exits with 1 when a limit is exceeded.
+"""
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import typer
+
+logging.basicConfig(encoding='utf-8', level=logging.INFO)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+MODULE_PREFIXES = ("api", "wing", "nltk", "sqlalchemy", "sqlmodel", "fastapi", "numpy")
+
+
+def import_times(module: str) -> list[tuple[str, float, float]]:
+    """
+    Return (module, self seconds, cumulative seconds) of every module imported with module.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        times.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    return times
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def first_response_time(warm_up: bool, timeout: float) -> float:
+    """
+    Start uvicorn and return seconds until GET / answers.
+    """
+    port = free_port()
+    env = dict(os.environ, WARM_UP_ON_STARTUP=str(warm_up).lower())
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.server:app", f"--port={port}"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/").status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            time.sleep(0.02)
+        raise TimeoutError(f"No response in {timeout} seconds")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main(
+    module: str = typer.Option(default="api.server", help="module imported by the process"),
+    top: int = typer.Option(default=15, help="number of the slowest modules shown"),
+    max_import: float = typer.Option(default=None, help="limit of import seconds"),
+    max_first_response: float = typer.Option(
+        default=None, help="limit of seconds to the first response without warm-up"
+    ),
+    timeout: float = typer.Option(default=60.0, help="seconds to wait for uvicorn"),
+):
+    times = import_times(module)
+    total = next(cumulative for name, _, cumulative in reversed(times) if name == module)
+    slowest = sorted(
+        (t for t in times if t[0].split(".")[0] in MODULE_PREFIXES),
+        key=lambda t: t[1],
+        reverse=True,
+    )
+    logger.info(f"{'module':<50} {'self':>8} {'cumulative':>11}")
+    for name, self_seconds, cumulative in slowest[:top]:
+        logger.info(f"{name:<50} {self_seconds:>7.3f}s {cumulative:>10.3f}s")
+    logger.info(f"import {module}: {total:.3f}s")
+
+    cold = first_response_time(warm_up=False, timeout=timeout)
+    warm = first_response_time(warm_up=True, timeout=timeout)
+    logger.info(f"first response: {cold:.3f}s, with warm-up: {warm:.3f}s")
+
+    failed = False
+    if max_import is not None and total > max_import:
+        logger.error(f"Import time {total:.3f}s exceeds {max_import}s")
+        failed = True
+    if max_first_response is not None and cold > max_first_response:
+        logger.error(f"First response time {cold:.3f}s exceeds {max_first_response}s")
+        failed = True
+    if failed:
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
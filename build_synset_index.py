@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+"""
+Build SQLite file with synsets for every WordNet lemma, set SYNSET_INDEX_PATH to use it.
+"""
+import logging
+from pathlib import Path
+
+import typer
+
+from wing.config import settings
+from wing.definitions import SynsetIndex, wordnet_entries
+
+logging.basicConfig(encoding='utf-8', level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main(
+    index_path: Path = typer.Argument(
+        default=settings.SYNSET_INDEX_PATH or None,
+        help="SQLite file to create, existing index is replaced",
+    ),
+):
+    count = SynsetIndex.build(str(index_path), wordnet_entries())
+    logger.info(f"Saved synsets of {count} lemmas in {index_path}.")
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -1,9 +1,11 @@
 import asyncio
-from unittest.mock import MagicMock
+from contextlib import asynccontextmanager
+from unittest.mock import patch
 
 from httpx import AsyncClient
 import pytest
 import pytest_asyncio
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -31,6 +33,8 @@ from wing.models.translation import Translation
 from wing.models.word import WordCreate
 from wing.models.user import UserCreate
 from wing.db.session import get_session
+from wing.dictionary import DictdClient
+from wing.translation_lookup import TranslationLookup
 
 settings.POSTGRES_DBNAME = "parrotdb_test"
 settings.PROJECT_DOMAIN = None
@@ -49,6 +53,7 @@ async def engine(event_loop) -> AsyncEngine:
     engine = create_async_engine(ENGINE_URL, echo=False)
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(SQLModel.metadata.create_all)
 
     yield engine
@@ -257,13 +262,75 @@ class BaseTestRouter:
             yield c
 
 
-class DictionaryClientMock(MagicMock):
-    def define(self, *args, **kwargs):
-        search_word = args[0]
-        possible_responses = {
-            "equivocal": [{
-                "word": "equivocal",
-                "definition": "equivocal /ɪˈkwɪvəkəl/ <Adj>\n  dwuznaczny, niejednoznaczny",
-            }]
-        }
-        return MagicMock(content=possible_responses.get(search_word))
+class FakeDictd:
+    """
+    DICT protocol server answering DEFINE with predefined definitions
+    """
+
+    definitions = {
+        "equivocal": ["equivocal /ɪˈkwɪvəkəl/ <Adj>\n  dwuznaczny, niejednoznaczny"],
+        "dot": ["dot <N>\n.\n  kropka"],
+    }
+
+    def __init__(self):
+        self.commands = []
+        self.connections = 0
+        self.server = None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        writer.write(b"220 fake dictd <auth.mime> <1.2@fake>\r\n")
+        while line := await reader.readline():
+            command = line.decode().strip()
+            self.commands.append(command)
+            if command.upper() == "QUIT":
+                writer.write(b"221 bye\r\n")
+                break
+            _, database, word = command.split(" ", 2)
+            word = word.strip('"')
+            definitions = self.definitions.get(word)
+            if not definitions:
+                writer.write(b"552 no match\r\n")
+                continue
+            response = [f"150 {len(definitions)} definitions retrieved"]
+            for definition in definitions:
+                response.append(f'151 "{word}" {database} "Fake dictionary"')
+                response.extend(
+                    "." + text if text.startswith(".") else text
+                    for text in definition.split("\n")
+                )
+                response.append(".")
+            response.append("250 ok")
+            writer.write(("\r\n".join(response) + "\r\n").encode())
+        await writer.drain()
+        writer.close()
+
+    async def start(self) -> tuple[str, int]:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+@pytest_asyncio.fixture
+async def dictd_server():
+    fake_dictd = FakeDictd()
+    host, port = await fake_dictd.start()
+    client = DictdClient(host, port, settings.DICTIONARY_VOCABULARY)
+    with patch("wing.dictionary.dictionary_client", new=client):
+        yield fake_dictd
+    await client.close()
+    await fake_dictd.close()
+
+
+@pytest_asyncio.fixture
+async def translation_lookup(session):
+    @asynccontextmanager
+    async def session_factory():
+        yield session
+
+    lookup = TranslationLookup(session_factory=session_factory)
+    with patch("api.routes.v2.translation.translation_lookup", new=lookup):
+        yield lookup
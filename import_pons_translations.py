@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""
+Translate many words with PONS dictionary API and make flashcards from the translations.
+"""
+import asyncio
+import logging
+from pathlib import Path
+
+import typer
+
+from wing.config import settings
+from wing.pons import PonsClient, PonsForbidden
+from wing.processing import import_pons_translations_cmd
+
+logging.basicConfig(encoding='utf-8', level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def async_main(
+    book_id: int | None, words: list[str], username: str, concurrency: int, rate: float
+) -> int:
+    client = PonsClient(concurrency=concurrency, rate=rate)
+    try:
+        return await import_pons_translations_cmd(book_id, words, username, client)
+    finally:
+        await client.close()
+
+
+def main(
+    username: str = typer.Option(..., help="owner of created flashcards"),
+    book_id: int = typer.Option(
+        default=None,
+        help="translate words of the book and join flashcards to its sentences",
+    ),
+    words_path: Path = typer.Option(
+        default=None,
+        help="file with one word or phrase per line",
+    ),
+    concurrency: int = typer.Option(
+        default=settings.PONS_CONCURRENCY,
+        help="number of parallel requests",
+    ),
+    rate: float = typer.Option(
+        default=settings.PONS_RATE_LIMIT,
+        help="maximum number of requests per second",
+    ),
+):
+    words = []
+    if words_path:
+        words = [line.strip() for line in words_path.read_text().splitlines() if line.strip()]
+    if not words and not book_id:
+        raise typer.BadParameter("Give --book-id or --words-path")
+    try:
+        count = asyncio.run(async_main(book_id, words, username, concurrency, rate))
+    except PonsForbidden as e:
+        logger.error(str(e))
+        raise typer.Exit(code=1)
+    logger.info(f"Loaded {count} flashcards.")
+
+
+if __name__ == "__main__":
+    typer.run(main)
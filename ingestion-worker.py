@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Ingestion worker. Take queued book uploads from database and load their content.
+"""
+import asyncio
+import logging
+
+import typer
+
+from wing.config import settings
+from wing.db.session import get_session
+from wing.processing import process_next_ingestion_job
+
+logging.basicConfig(encoding='utf-8', level=settings.LOGGING_LEVEL)
+logger = logging.getLogger(__name__)
+
+
+async def async_main(poll_interval: float) -> None:
+    logger.info("Waiting for ingestion jobs")
+    while True:
+        async for session in get_session():
+            job = await process_next_ingestion_job(session)
+        if job:
+            logger.info(
+                f"Job {job.id} {job.status}: {job.sentences_processed} sentences, "
+                f"{job.words_saved} words"
+            )
+        else:
+            await asyncio.sleep(poll_interval)
+
+
+def main(
+    poll_interval: float = typer.Option(
+        default=settings.INGESTION_POLL_INTERVAL,
+        help="seconds to wait when there is no queued job",
+    ),
+):
+    """
+    Run worker loading uploaded books
+    """
+    try:
+        asyncio.run(async_main(poll_interval))
+    except KeyboardInterrupt:
+        logger.info("Exited on keyboard interrupt")
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Load test of a running API: latency of an endpoint not related to logins, first alone and
+then during a storm of concurrent logins. Shows if password hashing blocks other requests.
+"""
+import asyncio
+import logging
+import statistics
+import time
+
+import httpx
+import typer
+
+logging.basicConfig(encoding='utf-8', level=logging.INFO)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def probe(
+    client: httpx.AsyncClient, path: str, duration: float, interval: float
+) -> list[float]:
+    """
+    Request path every interval seconds and return latencies in seconds
+    """
+    latencies = []
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        response = await client.get(path)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(max(0.0, interval - latencies[-1]))
+    return latencies
+
+
+async def login_storm(
+    client: httpx.AsyncClient, username: str, password: str, concurrency: int, duration: float
+) -> dict[int, int]:
+    """
+    Log in from concurrency clients until duration passes, return count of response statuses
+    """
+    statuses: dict[int, int] = {}
+    end = time.perf_counter() + duration
+    data = {"username": username, "password": password}
+
+    async def login_loop():
+        while time.perf_counter() < end:
+            response = await client.post("/api/v2/login", data=data)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    await asyncio.gather(*(login_loop() for _ in range(concurrency)))
+    return statuses
+
+
+def report(name: str, latencies: list[float]) -> float:
+    p99 = percentile(latencies, 0.99)
+    logger.info(
+        f"{name}: {len(latencies)} requests, p50 {statistics.median(latencies) * 1000:.1f} ms, "
+        f"p99 {p99 * 1000:.1f} ms, max {max(latencies) * 1000:.1f} ms"
+    )
+    return p99
+
+
+async def async_main(
+    url: str, username: str, password: str, path: str, concurrency: int, duration: float
+) -> tuple[float, float]:
+    limits = httpx.Limits(max_connections=concurrency + 1)
+    async with (
+        httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as storm_client,
+        httpx.AsyncClient(base_url=url, timeout=60) as probe_client,
+    ):
+        baseline = report(f"GET {path} alone", await probe(probe_client, path, duration, 0.01))
+        latencies, statuses = await asyncio.gather(
+            probe(probe_client, path, duration, 0.01),
+            login_storm(storm_client, username, password, concurrency, duration),
+        )
+        during_storm = report(f"GET {path} during {concurrency} concurrent logins", latencies)
+        logger.info(f"login responses: {statuses}")
+        logger.info(f"password hashing: {(await probe_client.get('/')).json().get('passwords')}")
+    return baseline, during_storm
+
+
+def main(
+    url: str = typer.Option(default="http://localhost:8000", help="address of the API"),
+    username: str = typer.Option(..., help="existing user"),
+    password: str = typer.Option(..., help="password of the user"),
+    path: str = typer.Option(default="/", help="endpoint measured during logins"),
+    concurrency: int = typer.Option(default=20, help="number of clients logging in"),
+    duration: float = typer.Option(default=10.0, help="seconds of every measurement"),
+    max_p99: float = typer.Option(default=None, help="limit of p99 milliseconds during logins"),
+):
+    _, during_storm = asyncio.run(
+        async_main(url, username, password, path, concurrency, duration)
+    )
+    if max_p99 is not None and during_storm * 1000 > max_p99:
+        logger.error(f"p99 {during_storm * 1000:.1f} ms exceeds {max_p99} ms")
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
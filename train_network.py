@@ -1,88 +1,67 @@
 #!/usr/bin/env python
 """
-This script not working properly yet
+Train word sense classifiers for words with synsets and save them as vocabulary model.
 """
-
 import asyncio
 import logging
 import pickle
-from collections import defaultdict
+from pathlib import Path
 
-import nltk
-from nltk.corpus import wordnet
-from nltk.classify import accuracy
+import typer
 
 from wing.config import settings
-from wing.crud.word import get_words, get_word_sentences
-from wing.db.session import get_session
-from wing.definition_feature_functions import word_definition_features
+from wing.db.session import SessionLocal
 from wing.models import *
+from wing.naive_bayes import save_model
+from wing.training import TrainingCheckpoint, train_vocabulary, training_summary
 
 logging.basicConfig(encoding="utf-8", level=settings.LOGGING_LEVEL)
 logger = logging.getLogger(__name__)
 
-WORDS_LIMIT = 100
-
-
-async def async_main():
-    synsets_dict = defaultdict(list)
-    async for session in get_session():
-        for word in await get_words(session, limit=WORDS_LIMIT, has_synset=True):
-            synset = wordnet.synset(word.synset)
-            synset_base = synset.name().split(".")[0]
-
-            sentences = []
-            for example in synset.examples():
-                sentences.append(example.replace(synset_base, word.lem))
-
-            for sentence in (await get_word_sentences(session, word.id)):
-                sentences.append(sentence.sentence)
-
-            synsets_dict[word.lem].append(
-                (
-                    sentences,
-                    synset.name(),
-                    word.declination,
-                    # synset.topic_domains(),
-                )
-            )
 
-    return synsets_dict
+async def async_main(checkpoint: TrainingCheckpoint, pool_size: int | None, limit: int | None):
+    async with SessionLocal() as session:
+        return await train_vocabulary(session, checkpoint, pool_size=pool_size, limit=limit)
+
+
+def main(
+    model_path: Path = typer.Argument(
+        default="trained_network.nb",
+        help="compact model file, VOCABULARY_BASE can point to it",
+    ),
+    checkpoint_path: Path = typer.Option(
+        default="trained_network.checkpoint",
+        help="file with trained lemmas, training started again skips them",
+    ),
+    pickle_path: Path = typer.Option(
+        default=None,
+        help="also save classifiers as pickled dict",
+    ),
+    pool_size: int = typer.Option(
+        default=settings.TRAINING_POOL_SIZE,
+        help="number of training processes, all CPUs by default",
+    ),
+    limit: int = typer.Option(
+        default=None,
+        help="train at most this number of lemmas missing in the checkpoint",
+    ),
+):
+    checkpoint = TrainingCheckpoint(str(checkpoint_path))
+    results = asyncio.run(async_main(checkpoint, pool_size, limit))
+    # classifiers are read from the checkpoint one by one
+    save_model(str(model_path), ((r.lem, r.classifier) for r in checkpoint.results()))
+    if pickle_path:
+        # the pickled dict needs all classifiers in memory
+        with open(pickle_path, "wb") as f:
+            pickle.dump({r.lem: r.classifier for r in checkpoint.results()}, f, -1)
+
+    summary = training_summary(results)
+    logger.info(
+        f"Trained {summary['lemmas']} lemmas, {summary['classifiers']} classifiers, "
+        f"mean accuracy {summary['mean_accuracy']:.3f}, "
+        f"training time {summary['seconds']:.1f}s, saved in {model_path}."
+    )
 
 
 if __name__ == "__main__":
-    synsets_data = asyncio.run(async_main())
-
-    logger.debug(f"Synsets len: {len(synsets_data)}")
-
-    accuracy_values = []
-    classifiers = defaultdict(list)
-    for word_lem, synsets in synsets_data.items():
-        if len(synsets) == 1:
-            classifiers[word_lem] = synsets[0][1]  # synset_name (str)
-        else:
-            featuresets = []
-            for sentences, synset_name, declination in synsets:
-                for sentence in sentences:
-                    featuresets.append(
-                        (
-                            word_definition_features(sentence, word_lem),
-                            synset_name,
-                        )
-                    )
-            half = len(featuresets) // 2
-            logger.debug(f"{half = }")
-            train_set, test_set = featuresets[half:], featuresets[:half]
-
-            classifier = nltk.NaiveBayesClassifier.train(train_set)
-
-            accuracy_value = accuracy(classifier, test_set)
-            accuracy_values.append(accuracy_value)
-            logger.debug(f"lem: {word_lem} - {accuracy_value}")
-            classifier.show_most_informative_features(9)
-            classifiers[word_lem] = classifier
-
-    with open("trained_network_100.pkl", "wb") as f:
-        pickle.dump(classifiers, f, -1)
-
-    logger.info("Task completed :) ")
+    typer.run(main)
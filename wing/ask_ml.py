@@ -1,83 +1,64 @@
 import json
 import logging
-import selectors
-import socket
-import types
+from typing import Any
+
 from wing.config import settings
+from wing.connection_pool import Connection, ConnectionPool
+from wing.models.word import WordBase
 
 logging.basicConfig(encoding='utf-8', level=settings.LOGGING_LEVEL)
 logger = logging.getLogger(__name__)
 
 
-def start_connections(sel, host, port, num_conns, word):
-    server_addr = (host, port)
-    for connid in range(1, num_conns + 1):
-        logger.debug(f"Starting connection {connid} to {server_addr}")
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.setblocking(False)
-        sock.connect_ex(server_addr)
-        events = selectors.EVENT_READ | selectors.EVENT_WRITE
-        data = types.SimpleNamespace(
-            connid=connid,
-            msg_total=len(word),
-            recv_total=0,
-            messages=word,
-            outb=b"",
-            received=b"",
-        )
-        sel.register(sock, events, data=data)
+def definition_request(word: str | WordBase, sentence: str) -> dict[str, Any]:
+    if isinstance(word, str):
+        return {"word": word, "sentence": sentence}
+    return {"word": word.lem, "declination": word.declination or {}, "sentence": sentence}
+
+
+class VocabularyClient:
+    """
+    Asyncio client of vocabulary server keeping a pool of open connections
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        pool_size: int = settings.VOCABULARY_CONNECTIONS_NUMBER,
+        timeout: float = settings.VOCABULARY_TIMEOUT,
+    ):
+        self.pool = ConnectionPool(host, port, pool_size)
+        self.timeout = timeout
+
+    async def find_definitions(
+        self, pairs: list[tuple[str | WordBase, str]]
+    ) -> list[dict[str, Any]]:
+        """
+        Send all (word, sentence) pairs at once and return responses in the same order.
+        Word can be lemma or word with declination used by the classifier.
+        """
+        if not pairs:
+            return []
+        requests = [definition_request(word, sentence) for word, sentence in pairs]
+
+        async def exchange(connection: Connection) -> list[dict[str, Any]]:
+            reader, writer = connection
+            writer.write(b"".join(json.dumps(request).encode() + b"\0" for request in requests))
+            await writer.drain()
+            responses = []
+            for _ in requests:
+                response = await reader.readuntil(b"\0")
+                responses.append(json.loads(response[:-1]))
+            return responses
+
+        return await self.pool.run(exchange, self.timeout)
 
+    async def find_definition(self, word: str | WordBase, sentence: str) -> dict[str, Any]:
+        return (await self.find_definitions([(word, sentence)]))[0]
 
-def service_connection(sel, key, mask):
-    sock = key.fileobj
-    data = key.data
-    if mask & selectors.EVENT_READ:
-        recv_data = sock.recv(1024)  # Should be ready to read
-        if recv_data:
-            logger.debug(f"Received {recv_data!r} from connection {data.connid}")
-            data.recv_total += len(recv_data)
-            data.received += recv_data
-        if not recv_data or recv_data.endswith(b"\x00"):
-            logger.debug(f"Closing connection {data.connid}")
-            data.received = data.received.strip(b"\x00")
-            sel.unregister(sock)
-            sock.close()
-    if mask & selectors.EVENT_WRITE:
-        if not data.outb and data.messages:
-            data.outb = data.messages
-            data.messages = b""
-        if data.outb:
-            logger.debug(f"Sending {data.outb!r} to connection {data.connid}")
-            sent = sock.send(data.outb)  # Should be ready to write
-            data.outb = data.outb[sent:]
+    async def close(self) -> None:
+        await self.pool.close()
 
 
-def find_definition(word: str, sentence: str) -> [tuple[str, str]]:
-    sel = selectors.DefaultSelector()
-    message = {"word": word, "sentence": sentence}
-    start_connections(
-        sel,
-        settings.VOCABULARY_HOST,
-        settings.VOCABULARY_PORT,  # 2630
-        settings.VOCABULARY_CONNECTIONS_NUMBER,  # 1
-        json.dumps(message).encode(),
-    )
-    response_str = ""
-    try:
-        while True:
-            events = sel.select(timeout=1)
-            if events:
-                for key, mask in events:
-                    service_connection(sel, key, mask)
-                    if key.data.received:
-                        response_str = key.data.received.decode().strip("\0")
-            # Check for a socket being monitored to continue.
-            if not sel.get_map():
-                break
-    except KeyboardInterrupt:
-        logger.info("Breaking by keyboard interrupt, exiting")
-    finally:
-        sel.close()
-    logger.debug(f"{response_str = }")
-    response = json.loads(response_str)
-    return response
+vocabulary_client = VocabularyClient(settings.VOCABULARY_HOST, settings.VOCABULARY_PORT)
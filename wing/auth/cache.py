@@ -0,0 +1,44 @@
+import time
+
+from wing.cache import MISSING, TTLCache
+from wing.config import settings
+from wing.models.user import UserPublic
+
+
+class UserCache:
+    """
+    Users of validated tokens kept for a few seconds, so authenticated requests don't query
+    user table. Entries of the user are dropped when the user is updated or deleted.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.cache = TTLCache(maxsize, ttl)
+        self.tokens: dict[int, set[str]] = {}
+
+    def get(self, token: str) -> UserPublic | None:
+        user = self.cache.get(token)
+        return None if user is MISSING else user
+
+    def set(self, token: str, user: UserPublic, expires_at: float) -> None:
+        """
+        Remember user of the token, never longer than the token is valid
+        """
+        ttl = min(self.cache.ttl, expires_at - time.time())
+        if ttl <= 0:
+            return
+        self.cache.set(token, user, ttl=ttl)
+        # forget tokens of the user which were evicted meanwhile
+        tokens = {t for t in self.tokens.get(user.id, ()) if t in self.cache}
+        tokens.add(token)
+        self.tokens[user.id] = tokens
+
+    def invalidate(self, user_id: int) -> None:
+        for token in self.tokens.pop(user_id, ()):
+            self.cache.pop(token)
+
+    def clear(self) -> None:
+        self.cache.clear()
+        self.tokens.clear()
+
+
+user_cache = UserCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL)
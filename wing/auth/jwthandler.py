@@ -10,6 +10,7 @@ from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from wing.config import settings
+from .cache import user_cache
 from ..crud.user import get_user
 from ..db.session import get_session
 from ..models.token import TokenData
@@ -74,6 +75,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 async def get_current_user(
     token: str = Depends(security), db: AsyncSession = Depends(get_session)
 ) -> UserPublic:
+    """
+    Return user of the token. FastAPI resolves it once per request, even if the route
+    lists it in dependencies and parameters, and recent tokens are answered from cache.
+    """
+    if current_user := user_cache.get(token):
+        return current_user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -101,4 +109,6 @@ async def get_current_user(
             detail="Inactive user",
         )
 
-    return UserPublic(**current_user.dict())
+    user_public = UserPublic(**current_user.dict())
+    user_cache.set(token, user_public, payload["exp"])
+    return user_public
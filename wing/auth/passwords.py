@@ -0,0 +1,93 @@
+"""
+bcrypt hashing and verification in a bounded thread pool.
+
+bcrypt is slow on purpose, called in an async handler it stops every other request of
+the worker. Here at most `workers` passwords are hashed at once, next `queue_size` calls
+wait for a free thread and the rest is refused with 503.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from wing.config import settings
+
+
+def crypt_context(rounds: int) -> CryptContext:
+    # hashes with other cost factor need update, so they are hashed again on login
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        rounds: int = settings.BCRYPT_ROUNDS,
+        workers: int = settings.PASSWORD_HASH_WORKERS,
+        queue_size: int = settings.PASSWORD_HASH_QUEUE_SIZE,
+    ):
+        self.context = crypt_context(rounds)
+        self.workers = workers
+        self.queue_size = queue_size
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password")
+        self.slots: asyncio.Semaphore | None = None
+        self.waiting = 0
+        self.calls = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    async def run(self, function: Callable, *args: Any) -> Any:
+        if self.waiting >= self.queue_size:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many password checks, try again later",
+                headers={"Retry-After": "1"},
+            )
+        if self.slots is None:
+            self.slots = asyncio.Semaphore(self.workers)
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            wait = time.perf_counter() - start
+            self.calls += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, function, *args)
+        finally:
+            self.slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self.run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, password_hash: str) -> tuple[bool, str | None]:
+        """
+        Check password, return also its new hash if the stored one has other cost factor.
+        """
+        return await self.run(self.context.verify_and_update, password, password_hash)
+
+    def metrics(self) -> dict[str, int | float]:
+        return {
+            "calls": self.calls,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "wait_mean": self.wait_total / self.calls if self.calls else 0.0,
+            "wait_max": self.wait_max,
+        }
+
+
+password_hasher = PasswordHasher()
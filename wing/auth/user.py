@@ -1,20 +1,17 @@
 from fastapi import HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from wing.crud.user import get_user_by_username
-
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from wing.auth.passwords import password_hasher
+from wing.crud.user import get_user_by_username, update_user_password
 
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return password_hasher.context.hash(password)
 
 
 
@@ -29,10 +26,13 @@ async def validate_user(
             detail="Incorrect username or password",
         )
 
-    if not verify_password(user.password, db_user.password):
+    valid, new_hash = await password_hasher.verify_and_update(user.password, db_user.password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
         )
+    if new_hash:
+        await update_user_password(session, db_user, new_hash)
 
     return db_user
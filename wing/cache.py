@@ -0,0 +1,65 @@
+"""
+In-memory caches shared by dictionary clients and authentication.
+"""
+import time
+from collections import OrderedDict
+from typing import Any
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded LRU cache which forgets values older than ttl seconds
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.values: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Any:
+        """
+        Return cached value or MISSING, None is a valid cached value.
+        """
+        expires_value = self.values.get(key)
+        if expires_value is None or expires_value[0] < time.monotonic():
+            self.values.pop(key, None)
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        self.values.move_to_end(key)
+        return expires_value[1]
+
+    def set(self, key: Any, value: Any, ttl: float | None = None) -> None:
+        self.values[key] = time.monotonic() + (self.ttl if ttl is None else ttl), value
+        self.values.move_to_end(key)
+        if len(self.values) > self.maxsize:
+            self.values.popitem(last=False)
+
+    def pop(self, key: Any) -> Any:
+        """
+        Forget the key, return its value or MISSING.
+        """
+        expires_value = self.values.pop(key, None)
+        if expires_value is None or expires_value[0] < time.monotonic():
+            return MISSING
+        return expires_value[1]
+
+    def __contains__(self, key: Any) -> bool:
+        expires_value = self.values.get(key)
+        return expires_value is not None and expires_value[0] >= time.monotonic()
+
+    def info(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.values),
+            "maxsize": self.maxsize,
+        }
+
+    def clear(self) -> None:
+        self.values.clear()
+        self.hits = self.misses = 0
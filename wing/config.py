@@ -30,6 +30,16 @@ class Settings(BaseSettings):
 
     # minutes after which the user will be logged out
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(1440, env="ACCESS_TOKEN_EXPIRE_MINUTES")
+    # seconds the user of a validated token is remembered, 0 reads the user for every request
+    AUTH_CACHE_TTL: float = Field(30.0, env="AUTH_CACHE_TTL")
+    # max number of remembered tokens
+    AUTH_CACHE_SIZE: int = Field(10000, env="AUTH_CACHE_SIZE")
+    # bcrypt cost factor, passwords hashed with other one are hashed again on login
+    BCRYPT_ROUNDS: int = Field(12, env="BCRYPT_ROUNDS")
+    # number of threads hashing passwords, more logins wait in the queue
+    PASSWORD_HASH_WORKERS: int = Field(2, env="PASSWORD_HASH_WORKERS")
+    # max number of logins waiting for hashing, the next ones get 503
+    PASSWORD_HASH_QUEUE_SIZE: int = Field(100, env="PASSWORD_HASH_QUEUE_SIZE")
 
     # configs for external tools:
     # Url to pons dictionary API
@@ -40,6 +50,13 @@ class Settings(BaseSettings):
     # Secret key for PONS dictionary
     PONS_SECRET_KEY: str = Field("", env="PONS_SECRET_KEY")
     API_LOGS_PATH: str = Field("pons_api.log", env="API_LOGS_PATH")
+    # PONS requests: seconds to wait, parallel connections, requests per second
+    PONS_TIMEOUT: float = Field(10.0, env="PONS_TIMEOUT")
+    PONS_CONCURRENCY: int = Field(4, env="PONS_CONCURRENCY")
+    PONS_RATE_LIMIT: float = Field(5.0, env="PONS_RATE_LIMIT")
+    # retries of failed PONS requests, the first after PONS_BACKOFF seconds, then doubled
+    PONS_RETRIES: int = Field(3, env="PONS_RETRIES")
+    PONS_BACKOFF: float = Field(1.0, env="PONS_BACKOFF")
 
     # NLTK storage directory path configuration
     NLTK_DATA_PREFIX: str = Field("/usr/local/share/nltk_data", env="NLTK_DATA_PREFIX")
@@ -49,12 +66,67 @@ class Settings(BaseSettings):
     VOCABULARY_PORT: int = Field(2630, env="VOCABULARY_PORT")
     VOCABULARY_BASE: str = Field("../../data/vocabulary.pkl", env="VOCABULARY_BASE")
     VOCABULARY_CONNECTIONS_NUMBER: int = Field(1, env="VOCABULARY_CONNECTIONS_NUMBER")
+    # seconds to wait for vocabulary server response
+    VOCABULARY_TIMEOUT: float = Field(10.0, env="VOCABULARY_TIMEOUT")
+    # seconds between checks if VOCABULARY_BASE file changed, 0 disables reloading
+    VOCABULARY_RELOAD_INTERVAL: float = Field(30.0, env="VOCABULARY_RELOAD_INTERVAL")
+    # load vocabulary, WordNet and pronouns before the API serves, otherwise on first use
+    WARM_UP_ON_STARTUP: bool = Field(False, env="WARM_UP_ON_STARTUP")
+    # number of lemmas with WordNet synsets kept in memory
+    SYNSET_CACHE_SIZE: int = Field(10000, env="SYNSET_CACHE_SIZE")
+    # optional SQLite file made by build_synset_index.py, used before WordNet
+    SYNSET_INDEX_PATH: str = Field("", env="SYNSET_INDEX_PATH")
 
     # setting dictionary English to Polish, unix command: dict -D
     DICTIONARY_HOST: str = Field("parrot-dict-1", env="DICTIONARY_HOST")
     DICTIONARY_PORT: int = Field(2628, env="DICTIONARY_PORT")
     DICTIONARY_VOCABULARY: str = "fd-eng-pol"
-    DICTIONARY_DEFINITION_KEY: str = "definition"
+    # open connections to DICT server, seconds to wait for its response
+    DICTIONARY_POOL_SIZE: int = Field(2, env="DICTIONARY_POOL_SIZE")
+    DICTIONARY_TIMEOUT: float = Field(10.0, env="DICTIONARY_TIMEOUT")
+    # number of words and seconds the DICT definitions are kept in memory
+    DICTIONARY_CACHE_SIZE: int = Field(10000, env="DICTIONARY_CACHE_SIZE")
+    DICTIONARY_CACHE_TTL: float = Field(24 * 3600, env="DICTIONARY_CACHE_TTL")
+    # translations found in table or dictionaries kept in memory, not found words for shorter time
+    TRANSLATION_CACHE_SIZE: int = Field(10000, env="TRANSLATION_CACHE_SIZE")
+    TRANSLATION_CACHE_TTL: float = Field(24 * 3600, env="TRANSLATION_CACHE_TTL")
+    TRANSLATION_NEGATIVE_TTL: float = Field(3600, env="TRANSLATION_NEGATIVE_TTL")
+
+    # size of book content chunk read from file or upload during book loading
+    BOOK_CHUNK_SIZE: int = Field(1024 * 1024, env="BOOK_CHUNK_SIZE")
+    # number of sentences written to database in one INSERT statement during book loading
+    SENTENCES_BATCH_SIZE: int = Field(1000, env="SENTENCES_BATCH_SIZE")
+    # number of words inserted or updated in one INSERT ... ON CONFLICT statement
+    WORDS_BATCH_SIZE: int = Field(1000, env="WORDS_BATCH_SIZE")
+
+    # number of processes tagging book sentences, None uses all CPUs, 0 tags in a thread
+    TAGGING_POOL_SIZE: int | None = Field(None, env="TAGGING_POOL_SIZE")
+    # number of sentences sent to the tagging process in one chunk
+    TAGGING_CHUNK_SIZE: int = Field(500, env="TAGGING_CHUNK_SIZE")
+
+    # number of processes training lemma classifiers, None uses all CPUs
+    TRAINING_POOL_SIZE: int | None = Field(None, env="TRAINING_POOL_SIZE")
+    # number of (word, sentence) rows fetched from the server-side cursor at once
+    TRAINING_BATCH_SIZE: int = Field(1000, env="TRAINING_BATCH_SIZE")
+
+    # seconds the ingestion worker waits before it checks the job queue again
+    INGESTION_POLL_INTERVAL: float = Field(2.0, env="INGESTION_POLL_INTERVAL")
+    # seconds without progress after which a running ingestion job is taken again, its worker
+    # is assumed dead
+    INGESTION_JOB_TIMEOUT: float = Field(600.0, env="INGESTION_JOB_TIMEOUT")
+
+    # max number of (word, pos) lemmas remembered during book and translations loading
+    LEMMA_CACHE_SIZE: int = Field(100000, env="LEMMA_CACHE_SIZE")
+    # optional file where the tagging processes store lemmas, so the next book starts warm
+    LEMMA_CACHE_PATH: str = Field("", env="LEMMA_CACHE_PATH")
+
+    # default number of sentences returned by the phrase search
+    SENTENCES_SEARCH_LIMIT: int = Field(50, env="SENTENCES_SEARCH_LIMIT")
+    # default and max number of items in one page of books, flashcards and sentences
+    PAGE_SIZE: int = Field(50, env="PAGE_SIZE")
+    MAX_PAGE_SIZE: int = Field(500, env="MAX_PAGE_SIZE")
+    # default number of sentences of every flashcard in a page for study, the rest is paged
+    STUDY_SENTENCES_LIMIT: int = Field(5, env="STUDY_SENTENCES_LIMIT")
 
     LOGGING_LEVEL: int = logging.INFO
     model_config = SettingsConfigDict(env_file=DOTENV_FILE)
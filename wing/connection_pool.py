@@ -0,0 +1,82 @@
+import asyncio
+from typing import Awaitable, Callable, TypeVar
+
+Connection = tuple[asyncio.StreamReader, asyncio.StreamWriter]
+T = TypeVar("T")
+
+STREAM_LIMIT = 1024 * 1024
+
+
+class ConnectionPool:
+    """
+    Keep-alive TCP connections to one server, at most size of them used at the same time
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        size: int,
+        on_connect: Callable[[Connection], Awaitable[None]] | None = None,
+    ):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.on_connect = on_connect
+        self.idle: list[Connection] = []
+        self._semaphore: asyncio.Semaphore | None = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.size)
+        return self._semaphore
+
+    async def connect(self) -> tuple[Connection, bool]:
+        """
+        Return an idle connection or open a new one, and whether it was reused.
+        """
+        while self.idle:
+            reader, writer = self.idle.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return (reader, writer), True
+            writer.close()
+        connection = await asyncio.open_connection(self.host, self.port, limit=STREAM_LIMIT)
+        if self.on_connect:
+            try:
+                await self.on_connect(connection)
+            except BaseException:
+                connection[1].close()
+                raise
+        return connection, False
+
+    async def run(self, exchange: Callable[[Connection], Awaitable[T]], timeout: float) -> T:
+        """
+        Run exchange on a pooled connection, give the connection back only if exchange succeeded.
+        """
+        async with self.semaphore:
+            async with asyncio.timeout(timeout):
+                while True:
+                    connection, reused = await self.connect()
+                    try:
+                        result = await exchange(connection)
+                    except (ConnectionError, asyncio.IncompleteReadError):
+                        connection[1].close()
+                        if reused:
+                            # server closed the idle connection in the meantime
+                            continue
+                        raise
+                    except BaseException:
+                        connection[1].close()
+                        raise
+                    self.idle.append(connection)
+                    return result
+
+    async def close(self) -> None:
+        while self.idle:
+            _, writer = self.idle.pop()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
@@ -1,8 +1,18 @@
+import base64
+import binascii
+import json
 from typing import Any
 
-from sqlalchemy import Result, ScalarResult
+from fastapi import HTTPException
+from sqlalchemy import ColumnElement, Result, ScalarResult, Select, and_, or_, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import delete, select
+from sqlmodel import delete, insert, select
+
+from wing.config import settings
+from wing.models.page import CursorPage
+
+# sort key of keyset pagination, expression and True for descending order
+Key = tuple[ColumnElement, bool]
 
 
 async def find_model(session: AsyncSession, instance_filter: Any, model: Any) -> ScalarResult:
@@ -21,22 +31,60 @@ async def model_join_to_set(
     target_id_name: str,
     target_ids: set[int],
 ) -> None:
-    for target_id in target_ids:
-        result = await session.execute(
-            select(relation_model)
-            .where(getattr(relation_model, source_id_name) == source_id)
-            .where(getattr(relation_model, target_id_name) == target_id)
-        )
-        if not result.first():
-            relation_model_attrs = {
-                source_id_name: source_id,
-                target_id_name: target_id,
-            }
-            relation_object = relation_model(**relation_model_attrs)
-            session.add(relation_object)
+    """
+    Insert the missing relations source -> targets and commit.
+    """
+    await model_insert_missing_relations(
+        session, relation_model, source_id_name, source_id, target_id_name, target_ids
+    )
     await session.commit()
 
 
+async def model_insert_missing_relations(
+    session: AsyncSession,
+    relation_model: Any,
+    source_id_name: str,
+    source_id: int,
+    target_id_name: str,
+    target_ids: set[int],
+) -> set[int]:
+    """
+    Find already related target ids in one query and insert the missing relations at once,
+    without commit. Return the newly related target ids.
+    """
+    if not target_ids:
+        return set()
+    target_id_column = getattr(relation_model, target_id_name)
+    query = (
+        select(target_id_column)
+        .where(getattr(relation_model, source_id_name) == source_id)
+        .where(target_id_column.in_(target_ids))
+    )
+    new_ids = set(target_ids) - set((await session.execute(query)).scalars())
+    await model_insert_relations(
+        session, relation_model, source_id_name, source_id, target_id_name, new_ids
+    )
+    return new_ids
+
+
+async def model_insert_relations(
+    session: AsyncSession,
+    relation_model: Any,
+    source_id_name: str,
+    source_id: int,
+    target_id_name: str,
+    target_ids: set[int],
+) -> None:
+    """
+    Insert relations source -> targets in one multi-row INSERT, without commit.
+    """
+    if target_ids:
+        await session.execute(
+            insert(relation_model),
+            [{source_id_name: source_id, target_id_name: target_id} for target_id in target_ids],
+        )
+
+
 async def model_separate_list(
     session: AsyncSession,
     relation_model: Any,
@@ -71,3 +119,71 @@ async def get_related_list(
     )
     response = await session.execute(query)
     return response.scalars()
+
+
+def encode_cursor(values: list) -> str:
+    data = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def cursor_value_type(key: ColumnElement) -> type | tuple[type, ...]:
+    try:
+        python_type = key.type.python_type
+    except NotImplementedError:
+        return object
+    # JSON doesn't keep float and int apart
+    return (int, float) if python_type is float else python_type
+
+
+def decode_cursor(cursor: str, keys: list[Key]) -> list:
+    """
+    Key values from cursor, each of the type of its key, else 400.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    for (key, _), value in zip(keys, values):
+        if isinstance(value, bool) or not isinstance(value, cursor_value_type(key)):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def order_by_keys(query: Select, keys: list[Key]) -> Select:
+    return query.order_by(*(key.desc() if descending else key for key, descending in keys))
+
+
+def after_keys(keys: list[Key], values: list) -> ColumnElement:
+    """
+    Condition for rows after the row with key values in the order of keys.
+    """
+    if len({descending for _, descending in keys}) == 1:
+        # row comparison can use composite index
+        columns, values_tuple = tuple_(*(key for key, _ in keys)), tuple_(*values)
+        return columns < values_tuple if keys[0][1] else columns > values_tuple
+    conditions = []
+    for i, (key, descending) in enumerate(keys):
+        equal = [k == v for (k, _), v in zip(keys[:i], values[:i])]
+        conditions.append(and_(*equal, key < values[i] if descending else key > values[i]))
+    return or_(*conditions)
+
+
+async def keyset_paginate(
+    session: AsyncSession,
+    query: Select,
+    keys: list[Key],
+    cursor: str | None = None,
+    size: int = settings.PAGE_SIZE,
+) -> CursorPage:
+    """
+    Return page of query results after cursor. Unlike OFFSET, every page is found in the
+    index of keys, the last key must be unique, ex. id.
+    """
+    if cursor:
+        query = query.where(after_keys(keys, decode_cursor(cursor, keys)))
+    query = order_by_keys(query.add_columns(*(key for key, _ in keys)), keys).limit(size + 1)
+    rows = (await session.execute(query)).all()
+    next_cursor = encode_cursor(list(rows[size - 1][1:])) if len(rows) > size else None
+    return CursorPage(items=[row[0] for row in rows[:size]], size=size, next_cursor=next_cursor)
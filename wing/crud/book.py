@@ -1,13 +1,14 @@
 from fastapi import HTTPException, status
-from fastapi_pagination import Page
-from fastapi_pagination.ext.sqlmodel import paginate
 from sqlalchemy import or_, ScalarResult
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import delete, select
 
+from wing.config import settings
+from wing.crud.base import keyset_paginate
 from wing.models.book import Book, BookCreate, BookFind, BookUpdate
 from wing.models.currently_reading import CurrentlyReading
+from wing.models.page import CursorPage
 
 
 async def get_book(session: AsyncSession, book_id: int, user_id: int | None = None) -> Book:
@@ -18,11 +19,16 @@ async def get_book(session: AsyncSession, book_id: int, user_id: int | None = No
     return response.scalar_one_or_none()
 
 
-async def find_books(session: AsyncSession, book: BookFind) -> Page[Book]:
-    query = select(Book).order_by(Book.id)
+async def find_books(
+    session: AsyncSession,
+    book: BookFind,
+    cursor: str | None = None,
+    size: int = settings.PAGE_SIZE,
+) -> CursorPage[Book]:
+    query = select(Book)
     for attr_name, value in book.dict(exclude_unset=True).items():
         query = query.where(getattr(Book, attr_name) == value)
-    return await paginate(session, query)
+    return await keyset_paginate(session, query, [(Book.id, False)], cursor, size)
 
 
 async def find_books_no_pagination(session: AsyncSession, book: BookFind) -> ScalarResult[Book]:
@@ -0,0 +1,94 @@
+from sqlalchemy import exists, func, literal
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import delete, select
+
+from wing.models.book_word import BookWord, BookWordStats
+from wing.models.flashcard import Flashcard
+from wing.models.flashcard_word import FlashcardWord
+from wing.models.sentence import Sentence
+from wing.models.sentence_word import SentenceWord
+from wing.models.word import Word
+
+STATS_COLUMNS = ["book_id", "word_id", "occurrences", "first_sentence_nr"]
+
+
+async def add_book_words(session: AsyncSession, word_id: int, sentence_ids: set[int]) -> None:
+    """
+    Count sentences newly related to the word in statistics of their books, without commit.
+    """
+    if not sentence_ids:
+        return
+    stats = (
+        select(Sentence.book_id, literal(word_id), func.count(), func.min(Sentence.nr))
+        .where(Sentence.id.in_(sentence_ids))
+        .group_by(Sentence.book_id)
+    )
+    query = insert(BookWord).from_select(STATS_COLUMNS, stats)
+    query = query.on_conflict_do_update(
+        index_elements=[BookWord.book_id, BookWord.word_id],
+        set_={
+            "occurrences": BookWord.occurrences + query.excluded.occurrences,
+            "first_sentence_nr": func.least(
+                BookWord.first_sentence_nr, query.excluded.first_sentence_nr
+            ),
+        },
+    )
+    await session.execute(query)
+
+
+async def refresh_book_words(session: AsyncSession, word_ids: set[int], book_ids: set[int]) -> None:
+    """
+    Count again statistics of the words in the books after their relations were removed,
+    without commit.
+    """
+    if not word_ids or not book_ids:
+        return
+    await session.execute(
+        delete(BookWord).where(BookWord.word_id.in_(word_ids), BookWord.book_id.in_(book_ids))
+    )
+    stats = (
+        select(Sentence.book_id, SentenceWord.word_id, func.count(), func.min(Sentence.nr))
+        .select_from(SentenceWord)
+        .join(Sentence)
+        .where(SentenceWord.word_id.in_(word_ids), Sentence.book_id.in_(book_ids))
+        .group_by(Sentence.book_id, SentenceWord.word_id)
+    )
+    # a concurrent add_book_words can insert the row again after the delete
+    query = insert(BookWord).from_select(STATS_COLUMNS, stats)
+    query = query.on_conflict_do_update(
+        index_elements=[BookWord.book_id, BookWord.word_id],
+        set_={
+            "occurrences": query.excluded.occurrences,
+            "first_sentence_nr": query.excluded.first_sentence_nr,
+        },
+    )
+    await session.execute(query)
+
+
+async def get_book_top_words(
+    session: AsyncSession, book_id: int, limit: int, unknown_for_user_id: int | None = None
+) -> list[BookWordStats]:
+    """
+    Most frequent words of the book, without words on flashcards of the user if given.
+    """
+    query = (
+        select(Word, BookWord.occurrences, BookWord.first_sentence_nr)
+        .join(BookWord, BookWord.word_id == Word.id)
+        .where(BookWord.book_id == book_id)
+        .order_by(BookWord.occurrences.desc(), BookWord.word_id)
+        .limit(limit)
+    )
+    if unknown_for_user_id:
+        query = query.where(
+            ~exists().where(
+                FlashcardWord.word_id == Word.id,
+                FlashcardWord.flashcard_id == Flashcard.id,
+                Flashcard.user_id == unknown_for_user_id,
+            )
+        )
+    response = await session.execute(query)
+    return [
+        BookWordStats(word=word, occurrences=occurrences, first_sentence_nr=first_sentence_nr)
+        for word, occurrences, first_sentence_nr in response.all()
+    ]
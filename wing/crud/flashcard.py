@@ -1,12 +1,26 @@
 from fastapi import HTTPException, status
-from sqlalchemy import Result, ScalarResult
+from sqlalchemy import Result, ScalarResult, exists, func
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import delete, select, distinct
 
-from wing.crud.base import find_model, get_related_list, model_join_to_set, model_separate_list
-from wing.models.flashcard import Flashcard, FlashcardCreate, FlashcardFind, FlashcardUpdate
+from wing.config import settings
+from wing.crud.base import (
+    find_model,
+    get_related_list,
+    keyset_paginate,
+    model_join_to_set,
+    model_separate_list,
+)
+from wing.models.flashcard import (
+    Flashcard,
+    FlashcardCreate,
+    FlashcardFind,
+    FlashcardStudy,
+    FlashcardUpdate,
+)
 from wing.models.flashcard_word import FlashcardWord
+from wing.models.page import CursorPage
 from wing.models.sentence import Sentence
 from wing.models.sentence_flashcard import SentenceFlashcard
 from wing.models.word import Word
@@ -51,6 +65,79 @@ async def get_flashcard_ids_for_book(
     return [sf for sf in response.scalars()]
 
 
+async def get_flashcards_for_study(
+    session: AsyncSession,
+    book_id: int,
+    user_id: int,
+    flashcard_ids: list[int] | None = None,
+    cursor: str | None = None,
+    size: int = settings.PAGE_SIZE,
+    sentences_limit: int = settings.STUDY_SENTENCES_LIMIT,
+) -> CursorPage[FlashcardStudy]:
+    """
+    Page of user flashcards having sentences in the book, with their words, first
+    sentences_limit sentences of the book and number of all of them. Three queries for any
+    page size: flashcards, words and sentences.
+    """
+    in_book = exists().where(
+        SentenceFlashcard.flashcard_id == Flashcard.id,
+        SentenceFlashcard.sentence_id == Sentence.id,
+        Sentence.book_id == book_id,
+    )
+    query = select(Flashcard).where(Flashcard.user_id == user_id, in_book)
+    if flashcard_ids is not None:
+        query = query.where(Flashcard.id.in_(flashcard_ids))
+    page = await keyset_paginate(session, query, [(Flashcard.id, False)], cursor, size)
+
+    ids = [flashcard.id for flashcard in page.items]
+    words = {flashcard_id: [] for flashcard_id in ids}
+    sentences = {flashcard_id: [] for flashcard_id in ids}
+    sentences_count = {flashcard_id: 0 for flashcard_id in ids}
+    if ids:
+        query = (
+            select(FlashcardWord.flashcard_id, Word)
+            .join(Word)
+            .where(FlashcardWord.flashcard_id.in_(ids))
+            .order_by(Word.id)
+        )
+        for flashcard_id, word in await session.execute(query):
+            words[flashcard_id].append(word)
+        partition = SentenceFlashcard.flashcard_id
+        ranked = (
+            select(
+                SentenceFlashcard.flashcard_id,
+                SentenceFlashcard.sentence_id,
+                func.row_number()
+                .over(partition_by=partition, order_by=(Sentence.nr, Sentence.id))
+                .label("rank"),
+                func.count().over(partition_by=partition).label("total"),
+            )
+            .join(Sentence)
+            .where(SentenceFlashcard.flashcard_id.in_(ids), Sentence.book_id == book_id)
+            .subquery()
+        )
+        query = (
+            select(ranked.c.flashcard_id, ranked.c.total, Sentence)
+            .join(Sentence, Sentence.id == ranked.c.sentence_id)
+            .where(ranked.c.rank <= sentences_limit)
+            .order_by(ranked.c.flashcard_id, ranked.c.rank)
+        )
+        for flashcard_id, total, sentence in await session.execute(query):
+            sentences[flashcard_id].append(sentence)
+            sentences_count[flashcard_id] = total
+
+    items = [
+        FlashcardStudy(
+            **flashcard.dict(),
+            words=words[flashcard.id],
+            sentences=sentences[flashcard.id],
+            sentences_count=sentences_count[flashcard.id],
+        )
+        for flashcard in page.items
+    ]
+    return CursorPage(items=items, size=page.size, next_cursor=page.next_cursor)
+
+
 async def create_flashcard(session: AsyncSession, flashcard: FlashcardCreate, user_id) -> Flashcard:
     db_flashcard = Flashcard(**flashcard.dict())
     db_flashcard.user_id = user_id
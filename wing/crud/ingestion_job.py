@@ -0,0 +1,158 @@
+from datetime import timedelta
+from typing import AsyncIterator
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, exists, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlmodel import delete, insert, select
+
+from wing.config import settings
+from wing.crud.sentence import delete_sentences_from, next_sentence_id
+from wing.models.ingestion_job import (
+    IngestionJob,
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_UPLOADING,
+    now,
+)
+from wing.models.ingestion_job_chunk import IngestionJobChunk
+
+
+async def get_ingestion_job(
+    session: AsyncSession, job_id: int, user_id: int | None = None
+) -> IngestionJob:
+    query = select(IngestionJob).where(IngestionJob.id == job_id)
+    if user_id:
+        query = query.where(IngestionJob.user_id == user_id)
+    response = await session.execute(query)
+    return response.scalar_one_or_none()
+
+
+async def create_ingestion_job(session: AsyncSession, book_id: int, user_id: int) -> IngestionJob:
+    db_job = IngestionJob(book_id=book_id, user_id=user_id, status=JOB_UPLOADING)
+    session.add(db_job)
+    try:
+        await session.commit()
+        await session.refresh(db_job)
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Can't create ingestion job"
+        )
+    return db_job
+
+
+async def update_ingestion_job(session: AsyncSession, job: IngestionJob) -> IngestionJob:
+    """
+    Save the job and its heartbeat with other changes in the session. Raise StaleDataError if
+    another worker took the job meanwhile.
+    """
+    job.updated_at = now()
+    session.add(job)
+    await session.commit()
+    await session.refresh(job)
+    return job
+
+
+async def take_ingestion_job(
+    session: AsyncSession, timeout: float = settings.INGESTION_JOB_TIMEOUT
+) -> IngestionJob | None:
+    """
+    Lock the oldest queued job, or a running job without heartbeat for timeout seconds, skip
+    jobs locked by other workers or of a book loaded by another job, and mark it as running.
+    Sentences saved by the abandoned attempt are deleted.
+    """
+    other = aliased(IngestionJob)
+    book_loading = exists().where(
+        other.book_id == IngestionJob.book_id,
+        other.id != IngestionJob.id,
+        other.status == JOB_RUNNING,
+    )
+    query = (
+        select(IngestionJob)
+        .where(
+            or_(
+                IngestionJob.status == JOB_QUEUED,
+                and_(
+                    IngestionJob.status == JOB_RUNNING,
+                    IngestionJob.updated_at < now() - timedelta(seconds=timeout),
+                ),
+            ),
+            ~book_loading,
+        )
+        .order_by(IngestionJob.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    response = await session.execute(query)
+    job = response.scalar_one_or_none()
+    if not job:
+        return None
+    abandoned_from = job.first_sentence_id
+    job.status = JOB_RUNNING
+    job.attempt += 1
+    job.started_at = now()
+    job.finished_at = job.error = None
+    job.sentences_processed = job.words_saved = 0
+    job.first_sentence_id = await next_sentence_id(session)
+    job = await update_ingestion_job(session, job)
+    if abandoned_from is not None:
+        await delete_sentences_from(session, job.book_id, abandoned_from)
+    return job
+
+
+async def requeue_ingestion_job(session: AsyncSession, job: IngestionJob) -> IngestionJob:
+    """
+    Queue failed job again, its uploaded content is kept.
+    """
+    if job.status != JOB_FAILED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Only failed job can be queued again"
+        )
+    job.status = JOB_QUEUED
+    return await update_ingestion_job(session, job)
+
+
+async def delete_ingestion_job(session: AsyncSession, job_id: int) -> int:
+    """
+    Roll back uncommitted changes and delete the job with its chunks.
+    """
+    await session.rollback()
+    response = await session.execute(delete(IngestionJob).where(IngestionJob.id == job_id))
+    await session.commit()
+    return response.rowcount
+
+
+async def add_ingestion_job_chunk(session: AsyncSession, job_id: int, nr: int, content: str) -> None:
+    """
+    Insert next part of uploaded book content without keeping it in the session.
+    """
+    query = insert(IngestionJobChunk).values(job_id=job_id, nr=nr, content=content)
+    await session.execute(query)
+
+
+async def get_ingestion_job_content(session: AsyncSession, job_id: int) -> AsyncIterator[str]:
+    """
+    Yield uploaded book content chunk by chunk, one query per chunk.
+    """
+    query = (
+        select(IngestionJobChunk.nr)
+        .where(IngestionJobChunk.job_id == job_id)
+        .order_by(IngestionJobChunk.nr)
+    )
+    chunk_nrs = (await session.execute(query)).scalars().all()
+    for nr in chunk_nrs:
+        query = select(IngestionJobChunk.content).where(
+            IngestionJobChunk.job_id == job_id, IngestionJobChunk.nr == nr
+        )
+        yield (await session.execute(query)).scalar_one()
+
+
+async def delete_ingestion_job_chunks(session: AsyncSession, job_id: int) -> int:
+    query = delete(IngestionJobChunk).where(IngestionJobChunk.job_id == job_id)
+    response = await session.execute(query)
+    await session.commit()
+    return response.rowcount
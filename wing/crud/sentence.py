@@ -1,11 +1,16 @@
 from fastapi import HTTPException
-from sqlalchemy import func, ScalarResult
+from sqlalchemy import Float, func, ScalarResult
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import delete, select, distinct
+from sqlmodel import delete, insert, select, distinct
 
+from wing.config import settings
+from wing.crud.base import Key, keyset_paginate, order_by_keys
+from wing.crud.book_word import refresh_book_words
 from wing.models.book import Book
+from wing.models.book_word import BookWord
 from wing.models.flashcard import Flashcard
+from wing.models.page import CursorPage
 from wing.models.sentence import Sentence, SentenceCreate
 from wing.models.sentence_word import SentenceWord
 from wing.models.sentence_flashcard import SentenceFlashcard
@@ -29,7 +34,9 @@ async def get_sentences_for_flashcard(
     book_id: int,
     flashcard_id: int,
     user_id: int,
-) -> ScalarResult[Sentence]:
+    cursor: str | None = None,
+    size: int = settings.PAGE_SIZE,
+) -> CursorPage[Sentence]:
     query = (
         select(Sentence)
         .where(Sentence.book_id == book_id)
@@ -37,10 +44,15 @@ async def get_sentences_for_flashcard(
         .where(SentenceFlashcard.flashcard_id == flashcard_id)
         .where(SentenceFlashcard.flashcard_id == Flashcard.id)
         .where(Flashcard.user_id == user_id)
-        .order_by(Sentence.nr)
     )
+    keys = [(Sentence.nr, False), (Sentence.id, False)]
+    return await keyset_paginate(session, query, keys, cursor, size)
+
+
+async def get_book_ids(session: AsyncSession, sentence_ids: set[int]) -> set[int]:
+    query = select(distinct(Sentence.book_id)).where(Sentence.id.in_(sentence_ids))
     response = await session.execute(query)
-    return response.scalars()
+    return set(response.scalars())
 
 
 async def get_sentence_ids(session: AsyncSession, word: Word, book_id: int) -> list[int]:
@@ -67,36 +79,106 @@ async def create_sentence(session: AsyncSession, sentence: SentenceCreate) -> Se
     return db_sentence
 
 
+async def create_sentences(
+    session: AsyncSession, sentences: list[SentenceCreate], commit: bool = True
+) -> list[Sentence]:
+    """
+    Insert many sentences in one multi-row INSERT ... RETURNING statement and commit once,
+    unless the caller commits them.
+    """
+    if not sentences:
+        return []
+    query = insert(Sentence).returning(Sentence, sort_by_parameter_order=True)
+    try:
+        response = await session.scalars(query, [sentence.dict() for sentence in sentences])
+        db_sentences = response.all()
+        if commit:
+            await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(status_code=409, detail="Can't create sentences")
+    return db_sentences
+
+
 async def delete_sentence(session: AsyncSession, sentence_id: int) -> int:
+    query = select(SentenceWord.word_id).where(SentenceWord.sentence_id == sentence_id)
+    word_ids = set((await session.execute(query)).scalars())
+    book_ids = await get_book_ids(session, {sentence_id})
     query1 = delete(SentenceWord).where(SentenceWord.sentence_id == sentence_id)
     query2 = delete(SentenceFlashcard).where(SentenceFlashcard.sentence_id == sentence_id)
     query3 = delete(Sentence).where(Sentence.id == sentence_id)
     await session.execute(query1)
     await session.execute(query2)
     response = await session.execute(query3)
+    await refresh_book_words(session, word_ids, book_ids)
     await session.commit()
     return response.rowcount
 
 
 async def delete_sentences_by_book(session: AsyncSession, book_id: int) -> int:
+    await session.execute(delete(BookWord).where(BookWord.book_id == book_id))
     query = delete(Sentence).where(Sentence.book_id == book_id)
     response = await session.execute(query)
     await session.commit()
     return response.rowcount
 
 
+async def delete_sentences_from(session: AsyncSession, book_id: int, first_id: int) -> int:
+    """
+    Delete sentences of the book with first_id or greater id, saved by one ingestion job, and
+    count again statistics of their words in the book.
+    """
+    condition = (Sentence.book_id == book_id, Sentence.id >= first_id)
+    query = select(distinct(SentenceWord.word_id)).join(Sentence).where(*condition)
+    word_ids = set((await session.execute(query)).scalars())
+    sentence_ids = select(Sentence.id).where(*condition)
+    for link in (SentenceWord, SentenceFlashcard):
+        await session.execute(delete(link).where(link.sentence_id.in_(sentence_ids)))
+    response = await session.execute(delete(Sentence).where(*condition))
+    await refresh_book_words(session, word_ids, {book_id})
+    await session.commit()
+    return response.rowcount
+
+
+async def next_sentence_id(session: AsyncSession) -> int:
+    """
+    Lower bound of ids of sentences saved from now on.
+    """
+    response = await session.execute(select(func.coalesce(func.max(Sentence.id), 0) + 1))
+    return response.scalar_one()
+
+
 async def count_sentences_for_book(session: AsyncSession, book_id: int) -> int:
     query = select(func.count()).where(Sentence.book_id == book_id)
     response = await session.execute(query)
     return response.scalar_one()
 
 
+def phrase_keys(phrase: str, ranked: bool) -> list[Key]:
+    """
+    Order sentences by similarity to phrase or by sentence number. Trigram similarity of the
+    whole sentence (pg_trgm similarity) prefers short sentences and whole-word matches, which
+    word_similarity doesn't: it is 1.0 for every sentence containing the phrase.
+    """
+    keys = [(Sentence.nr, False), (Sentence.id, False)]
+    if ranked:
+        keys.insert(0, (func.similarity(phrase, Sentence.sentence, type_=Float), True))
+    return keys
+
+
 async def get_sentences_with_phrase(
-    session: AsyncSession, phrase: str, book_id: int | None = None
+    session: AsyncSession,
+    phrase: str,
+    book_id: int | None = None,
+    ranked: bool = False,
+    limit: int | None = None,
 ) -> ScalarResult[Sentence]:
-    query = select(Sentence).where(Sentence.sentence.icontains(phrase)).order_by(Sentence.nr)
+    query = select(Sentence).where(Sentence.sentence.icontains(phrase))
     if book_id:
         query = query.where(Sentence.book_id == book_id)
+    query = order_by_keys(query, phrase_keys(phrase, ranked))
+    if limit:
+        query = query.limit(limit)
     response = await session.execute(query)
     return response.scalars()
 
@@ -105,9 +187,12 @@ async def get_sentences_with_phrase_for_user(
     session: AsyncSession,
     phrase: str,
     user_id: int | None = None,
-) -> ScalarResult[Sentence]:
+    ranked: bool = False,
+    cursor: str | None = None,
+    size: int = settings.SENTENCES_SEARCH_LIMIT,
+) -> CursorPage[Sentence]:
     if not phrase:
-        return []
+        return CursorPage(items=[], size=size)
     query1 = (
         select(Book.id)
         .join(CurrentlyReading)
@@ -116,10 +201,7 @@ async def get_sentences_with_phrase_for_user(
         .where(CurrentlyReading.user_id == User.id)
     )
     book_ids = (await session.execute(query1)).scalars().all()
-    query = (
-        select(Sentence)
-        .where(Sentence.sentence.icontains(phrase), Sentence.book_id.in_(book_ids))
-        .order_by(Sentence.nr)
+    query = select(Sentence).where(
+        Sentence.sentence.icontains(phrase), Sentence.book_id.in_(book_ids)
     )
-    response = await session.execute(query)
-    return response.scalars()
+    return await keyset_paginate(session, query, phrase_keys(phrase, ranked), cursor, size)
@@ -1,9 +1,10 @@
 from fastapi import HTTPException, status
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
 from sqlmodel import select
 
-from wing.models.translation import Translation
+from wing.models.translation import SOURCE_DICT, Translation
 
 
 async def create_translation(session: AsyncSession, translation: Translation) -> Translation:
@@ -17,7 +18,34 @@ async def create_translation(session: AsyncSession, translation: Translation) ->
     return translation
 
 
-async def get_translation_by_word(session: AsyncSession, word_str: str) -> Translation:
-    query = select(Translation).where(Translation.word == word_str)
+async def get_translation_by_word(
+    session: AsyncSession, word_str: str, source: str = SOURCE_DICT
+) -> Translation:
+    query = select(Translation).where(Translation.word == word_str, Translation.source == source)
     response = await session.execute(query)
     return response.scalar_one_or_none()
+
+
+async def save_translation(
+    session: AsyncSession, word_str: str, definition: str, source: str = SOURCE_DICT
+) -> None:
+    """
+    Insert translation unless the word is already translated by the source.
+    """
+    query = (
+        insert(Translation)
+        .values(word=word_str, definition=definition, source=source)
+        .on_conflict_do_nothing(index_elements=[Translation.word, Translation.source])
+    )
+    await session.execute(query)
+    await session.commit()
+
+
+async def get_translations_by_words(
+    session: AsyncSession, words: list[str], source: str = SOURCE_DICT
+) -> dict[str, str]:
+    query = select(Translation.word, Translation.definition).where(
+        Translation.word.in_(words), Translation.source == source
+    )
+    response = await session.execute(query)
+    return {word: definition for word, definition in response}
@@ -1,20 +1,18 @@
 from fastapi import HTTPException
-from fastapi_pagination import Page
-from fastapi_pagination.default import Params
-from fastapi_pagination.ext.sqlmodel import paginate
-from passlib.context import CryptContext
 from sqlalchemy import ScalarResult
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import delete, select
 
-from wing.crud.base import find_model
+from wing.auth.cache import user_cache
+from wing.auth.passwords import password_hasher
+from wing.config import settings
+from wing.crud.base import find_model, keyset_paginate
 from wing.models.flashcard import Flashcard
+from wing.models.page import CursorPage
 from wing.models.user import User, UserCreate, UserFind, UserUpdate, UserPublic
 from wing.models.token import Status
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 async def get_user(session: AsyncSession, user_id: int) -> User:
     query = select(User).where(User.id == user_id)
@@ -40,7 +38,7 @@ async def find_users(session: AsyncSession, user: UserFind) -> ScalarResult:
 
 async def create_user(session: AsyncSession, user: UserCreate) -> User:
     db_user = User(**user.dict())
-    db_user.password = pwd_context.encrypt(user.password)
+    db_user.password = await password_hasher.hash(user.password)
     session.add(db_user)
     try:
         await session.commit()
@@ -65,16 +63,28 @@ async def update_user(session: AsyncSession, user_id: int, user: UserUpdate) ->
     except IntegrityError:
         await session.rollback()
         raise HTTPException(status_code=409, detail=f"Can't update user, user_id: {user_id}")
+    user_cache.invalidate(user_id)
     return db_user
 
 
+async def update_user_password(session: AsyncSession, db_user: User, password_hash: str) -> None:
+    db_user.password = password_hash
+    await session.commit()
+
+
 async def delete_user(session: AsyncSession, user_id: int, current_user) -> Status:
     query = delete(User).where(current_user.id == user_id)
     response = await session.execute(query)
     await session.commit()
+    user_cache.invalidate(user_id)
     return Status(message=f"Deleted user {user_id}")
 
 
-async def get_user_flashcards(session: AsyncSession, current_user: UserPublic) -> Page[Flashcard]:
+async def get_user_flashcards(
+    session: AsyncSession,
+    current_user: UserPublic,
+    cursor: str | None = None,
+    size: int = settings.PAGE_SIZE,
+) -> CursorPage[Flashcard]:
     query = select(Flashcard).where(Flashcard.user_id == current_user.id)
-    return await paginate(session, query)
+    return await keyset_paginate(session, query, [(Flashcard.id, False)], cursor, size)
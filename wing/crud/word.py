@@ -1,19 +1,50 @@
+import asyncio
+import logging
+from typing import AsyncIterator
+
 from fastapi import HTTPException
-from sqlalchemy import distinct, func, ScalarResult, Result
+from sqlalchemy import (
+    JSON,
+    Integer,
+    Result,
+    Row,
+    ScalarResult,
+    cast,
+    column,
+    distinct,
+    func,
+    literal,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import JSONB, insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import delete, select
 
-from wing.crud.base import find_model, get_related_list, model_join_to_set, model_separate_list
-from wing.crud.sentence import get_sentence
+from wing.config import settings
+from wing.crud.base import (
+    find_model,
+    get_related_list,
+    keyset_paginate,
+    model_insert_missing_relations,
+    model_insert_relations,
+    model_separate_list,
+)
+from wing.crud.book_word import add_book_words, refresh_book_words
+from wing.crud.sentence import get_book_ids, get_sentence
 from wing.models.book import Book
+from wing.models.book_word import BookWord
 from wing.models.flashcard_word import FlashcardWord
+from wing.models.page import CursorPage
 from wing.models.sentence import Sentence
 from wing.models.sentence_word import SentenceWord
 from wing.models.word import Word, WordCreate, WordUpdate, WordFind
-# from wing.ask_ml import find_definition
+from wing.ask_ml import vocabulary_client
 from wing.definitions import definitions
 
+logger = logging.getLogger(__name__)
+
 DEFAULT_WORDS_LIMIT = 10
 
 
@@ -33,6 +64,27 @@ async def get_words(
     return response.scalars()
 
 
+async def stream_synset_words_sentences(
+    session: AsyncSession, batch_size: int = 1000
+) -> AsyncIterator[Row]:
+    """
+    Stream (id, lem, synset, declination, sentence) of words with synset through server-side
+    cursor, ordered by lemma. Words without sentences come once with None sentence.
+    """
+    query = (
+        select(Word.id, Word.lem, Word.synset, Word.declination, Sentence.sentence)
+        .select_from(Word)
+        .outerjoin(SentenceWord, SentenceWord.word_id == Word.id)
+        .outerjoin(Sentence, Sentence.id == SentenceWord.sentence_id)
+        .where(Word.synset != None, Word.synset != "")
+        .order_by(Word.lem, Word.id, Sentence.id)
+        .execution_options(yield_per=batch_size)
+    )
+    response = await session.stream(query)
+    async for row in response:
+        yield row
+
+
 async def find_words(session: AsyncSession, word: WordFind) -> ScalarResult[Word]:
     return await find_model(session=session, instance_filter=word, model=Word)
 
@@ -49,6 +101,54 @@ async def create_word(session: AsyncSession, word: WordCreate) -> Word:
     return db_word
 
 
+async def upsert_words(session: AsyncSession, words: list[WordCreate]) -> dict[tuple[str, str], int]:
+    """
+    Create words in one INSERT statement. For already existing (lem, pos) add count and merge
+    declination. Return word ids by (lem, pos).
+    """
+    if not words:
+        return {}
+    query = insert(Word).values(
+        [word.dict(include={"count", "declination", "lem", "pos"}) for word in words]
+    )
+    query = query.on_conflict_do_update(
+        index_elements=[Word.lem, Word.pos],
+        set_={
+            "count": Word.count + query.excluded.count,
+            "declination": cast(
+                func.coalesce(cast(Word.declination, JSONB), cast(literal("{}"), JSONB)).op("||")(
+                    cast(query.excluded.declination, JSONB)
+                ),
+                JSON,
+            ),
+        },
+    ).returning(Word.id, Word.lem, Word.pos)
+    response = await session.execute(query)
+    await session.commit()
+    return {(lem, pos): word_id for word_id, lem, pos in response.all()}
+
+
+async def add_word_counts(
+    session: AsyncSession, counts: dict[int, int], batch_size: int = settings.WORDS_BATCH_SIZE
+) -> None:
+    """
+    Add counts to words by id, without commit. Rows are locked in id order, so concurrent
+    callers wait for each other instead of deadlocking.
+    """
+    word_ids = sorted(counts)
+    for i in range(0, len(word_ids), batch_size):
+        batch_ids = word_ids[i : i + batch_size]
+        await session.execute(
+            select(Word.id).where(Word.id.in_(batch_ids)).order_by(Word.id).with_for_update()
+        )
+        rows = values(column("id", Integer), column("count", Integer), name="counts").data(
+            [(word_id, counts[word_id]) for word_id in batch_ids]
+        )
+        await session.execute(
+            update(Word).where(Word.id == rows.c.id).values(count=Word.count + rows.c.count)
+        )
+
+
 async def update_word(session: AsyncSession, word_id: int, word: WordUpdate) -> Word:
     db_word = await get_word(session, word_id)
     if not db_word:
@@ -67,7 +167,7 @@ async def update_word(session: AsyncSession, word_id: int, word: WordUpdate) ->
 
 
 async def word_join_to_sentences(session: AsyncSession, word_id: int, sentence_ids: set) -> None:
-    await model_join_to_set(
+    new_sentence_ids = await model_insert_missing_relations(
         session=session,
         relation_model=SentenceWord,
         source_id_name="word_id",
@@ -75,6 +175,8 @@ async def word_join_to_sentences(session: AsyncSession, word_id: int, sentence_i
         target_id_name="sentence_id",
         target_ids=sentence_ids,
     )
+    await add_book_words(session, word_id, new_sentence_ids)
+    await session.commit()
 
 
 async def word_join_to_sentences_by_user(
@@ -83,45 +185,57 @@ async def word_join_to_sentences_by_user(
     sentence_ids: set,
     user_id: int
 ) -> None:
-    for sentence_id in sentence_ids:
-        result = await session.execute(
-            select(SentenceWord)
-            .where(SentenceWord.word_id == word_id)
-            .where(SentenceWord.sentence_id == Sentence.id)
-            .where(Sentence.id == sentence_id)
+    if sentence_ids:
+        query = (
+            select(Sentence.id)
+            .where(Sentence.id.in_(sentence_ids))
             .where(Sentence.book_id == Book.id)
             .where(Book.user_id == user_id)
+            .where(
+                ~select(SentenceWord.id)
+                .where(SentenceWord.sentence_id == Sentence.id)
+                .where(SentenceWord.word_id == word_id)
+                .exists()
+            )
+        )
+        new_sentence_ids = set((await session.execute(query)).scalars())
+        await model_insert_relations(
+            session, SentenceWord, "word_id", word_id, "sentence_id", new_sentence_ids
         )
-        if not result.first():
-            relation_model_attrs = {
-                "word_id": word_id,
-                "sentence_id": sentence_id,
-            }
-            relation_object = SentenceWord(**relation_model_attrs)
-            session.add(relation_object)
+        await add_book_words(session, word_id, new_sentence_ids)
     await session.commit()
 
 
 async def delete_word(session: AsyncSession, word_id: int) -> int:
     query1 = delete(SentenceWord).where(SentenceWord.word_id == word_id)
     query2 = delete(FlashcardWord).where(FlashcardWord.word_id == word_id)
-    query3 = delete(Word).where(Word.id == word_id)
+    query3 = delete(BookWord).where(BookWord.word_id == word_id)
+    query4 = delete(Word).where(Word.id == word_id)
     await session.execute(query1)
     await session.execute(query2)
-    response = await session.execute(query3)
+    await session.execute(query3)
+    response = await session.execute(query4)
     await session.commit()
     return response.rowcount
 
 
 async def count_words_for_book(session: AsyncSession, book_id) -> int:
+    query = select(func.count()).select_from(BookWord).where(BookWord.book_id == book_id)
+    response = await session.execute(query)
+    return response.scalar_one()
+
+
+async def get_book_lemmas(session: AsyncSession, book_id: int) -> list[str]:
     query = (
-        select(func.count(distinct(SentenceWord.word_id)))
+        select(distinct(Word.lem))
         .select_from(Sentence)
         .join(SentenceWord)
+        .join(Word)
         .where(Sentence.book_id == book_id)
+        .order_by(Word.lem)
     )
     response = await session.execute(query)
-    return response.scalar_one()
+    return list(response.scalars())
 
 
 async def get_sentence_ids_with_word(session: AsyncSession, word_text: str) -> list[int]:
@@ -154,42 +268,92 @@ async def get_word_sentences_for_user(
     session: AsyncSession,
     word_id: int,
     user_id: int,
-) -> ScalarResult[Sentence]:
+    cursor: str | None = None,
+    size: int = settings.PAGE_SIZE,
+) -> CursorPage[Sentence]:
     query = (
         select(Sentence)
         .where(Sentence.id == SentenceWord.sentence_id)
         .where(SentenceWord.word_id == word_id)
         .where(Sentence.book_id == Book.id)
         .where(Book.user_id == user_id)
-        .order_by(Sentence.id)
     )
-    response = await session.execute(query)
-    return response.scalars()
+    return await keyset_paginate(session, query, [(Sentence.id, False)], cursor, size)
+
+
+async def classify_words(pairs: list[tuple[Word, str]]) -> list[dict]:
+    """
+    Find definitions of (word, sentence) pairs in vocabulary server. When the server can't be
+    reached, classify them in a thread of this process, never on the event loop.
+    """
+    try:
+        return await vocabulary_client.find_definitions(pairs)
+    except (OSError, EOFError, TimeoutError) as e:
+        logger.warning(f"Vocabulary server unavailable, classifying locally: {e!r}")
+
+    def classify() -> list[dict]:
+        return [definitions.find_definition(word, sentence) for word, sentence in pairs]
+
+    return await asyncio.to_thread(classify)
+
+
+def synset_response(word: Word, result: dict) -> dict:
+    return {
+        "word": word,
+        "synsets": result["synsets"],
+        "errorMessage": result.get("error", ""),
+    }
 
 
 async def find_synset(session: AsyncSession, word_id: int, sentence_id: int) -> dict:
     word = await get_word(session=session, word_id=word_id)
     if word:
         sentence = await get_sentence(session=session, sentence_id=sentence_id)
-        synsets = error_message = ""
-        try:
-            result = definitions.find_definition(word, sentence.sentence)
-            synsets = result["synsets"]
-        except ConnectionRefusedError as e:
-            error_message = str(e)
-        response = {
-            "word": word,
-            "synsets": synsets,
-            "errorMessage": error_message,
-        }
-        return response
+        [result] = await classify_words([(word, sentence.sentence)])
+        return synset_response(word, result)
     return {}
 
 
+async def find_synsets(
+    session: AsyncSession, pairs: list[tuple[int, int]], user_id: int
+) -> list[dict]:
+    """
+    find_synset for many (word_id, sentence_id) pairs with two queries and one request to
+    vocabulary server. Pairs with unknown word or sentence not in books of the user get
+    empty dict.
+    """
+    word_ids = {word_id for word_id, _ in pairs}
+    sentence_ids = {sentence_id for _, sentence_id in pairs}
+    words = {
+        word.id: word
+        for word in (await session.execute(select(Word).where(Word.id.in_(word_ids)))).scalars()
+    }
+    query = (
+        select(Sentence)
+        .where(Sentence.id.in_(sentence_ids))
+        .where(Sentence.book_id == Book.id)
+        .where(Book.user_id == user_id)
+    )
+    sentences = {sentence.id: sentence for sentence in (await session.execute(query)).scalars()}
+
+    found = [
+        (words[word_id], sentences[sentence_id].sentence)
+        for word_id, sentence_id in pairs
+        if word_id in words and sentence_id in sentences
+    ]
+    results = iter(await classify_words(found))
+    return [
+        synset_response(words[word_id], next(results))
+        if word_id in words and sentence_id in sentences
+        else {}
+        for word_id, sentence_id in pairs
+    ]
+
+
 async def word_separate_sentences(
     session: AsyncSession, word_id: int, sentence_ids: set[int]
 ) -> Result:
-    return await model_separate_list(
+    response = await model_separate_list(
         session=session,
         relation_model=SentenceWord,
         source_id_name="word_id",
@@ -197,6 +361,8 @@ async def word_separate_sentences(
         target_id_name="sentence_id",
         target_ids=sentence_ids,
     )
+    await refresh_book_words(session, {word_id}, await get_book_ids(session, sentence_ids))
+    return response
 
 
 async def word_separate_sentences_by_user(
@@ -213,7 +379,9 @@ async def word_separate_sentences_by_user(
         .where(Book.user_id == user_id)
         .where(SentenceWord.sentence_id.in_(sentence_ids))
     )
-    return await session.execute(query)
+    response = await session.execute(query)
+    await refresh_book_words(session, {word_id}, await get_book_ids(session, sentence_ids))
+    return response
 
 
 async def find_words_for_flashcard(
@@ -1,48 +1,239 @@
+import asyncio
+import functools
+import hashlib
+import json
 import logging
-from typing import Any
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator, Mapping, NamedTuple
 
 import nltk
 import pickle
 from wing.definition_feature_functions import word_definition_features
 from wing.config import settings
 from wing.models.word import WordBase
+from wing.naive_bayes import NaiveBayesModel, is_model_file
 
 logging.basicConfig(encoding='utf-8', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# synset name, definition, polish lemmas
+SynsetEntry = tuple[str, str, str]
+
+
+def wordnet_synsets(lem: str) -> tuple[SynsetEntry, ...]:
+    return tuple(
+        (
+            synset.name(),
+            synset.definition(),
+            ", ".join([l.name() for l in synset.lemmas(lang='pol')]),
+        )
+        for synset in nltk.corpus.wordnet.synsets(lem)
+    )
+
+
+def wordnet_entries() -> Iterator[tuple[str, tuple[SynsetEntry, ...]]]:
+    for lem in nltk.corpus.wordnet.all_lemma_names():
+        yield lem, wordnet_synsets(lem)
+
+
+class SynsetIndex:
+    """
+    Read only SQLite file with synsets prepared for every WordNet lemma
+    """
+
+    def __init__(self, index_path: str):
+        self.connection = sqlite3.connect(
+            f"file:{index_path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self.lock = threading.Lock()
+
+    def get(self, lem: str) -> tuple[SynsetEntry, ...] | None:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT synsets FROM lemma WHERE lem = ?", (lem,)
+            ).fetchone()
+        if row is None:
+            return None
+        return tuple(tuple(entry) for entry in json.loads(row[0]))
+
+    @staticmethod
+    def build(index_path: str, entries: Iterable[tuple[str, Iterable[SynsetEntry]]]) -> int:
+        with sqlite3.connect(index_path) as connection:
+            connection.execute("DROP TABLE IF EXISTS lemma")
+            connection.execute("CREATE TABLE lemma (lem TEXT PRIMARY KEY, synsets TEXT NOT NULL)")
+            connection.executemany(
+                "INSERT INTO lemma VALUES (?, ?)",
+                ((lem, json.dumps(list(synsets))) for lem, synsets in entries),
+            )
+            count = connection.execute("SELECT count(*) FROM lemma").fetchone()[0]
+        connection.close()
+        return count
+
+
+def file_signature(path: str) -> tuple[int, int, int]:
+    """
+    Changes when the file is replaced or modified
+    """
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def file_version(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=8)
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class VocabularyModel(NamedTuple):
+    vocabulary: Mapping
+    version: str | None = None
+    loaded_at: datetime | None = None
+    signature: tuple[int, int, int] | None = None
+
 
 class Definitions:
-    vocabulary = {}
+    index: SynsetIndex | None = None
+
+    def __init__(
+        self, cache_size: int = settings.SYNSET_CACHE_SIZE, vocabulary_path: str | None = None
+    ):
+        # synsets are pure function of the lemma, so keep the recent ones in memory
+        self.synsets = functools.lru_cache(maxsize=cache_size)(self.find_synsets)
+        self.reload_lock = threading.RLock()
+        # vocabulary is loaded on first use, not when the module is imported
+        self.vocabulary_path = vocabulary_path
+        self._model: VocabularyModel | None = None
+
+    @property
+    def model(self) -> VocabularyModel:
+        if self._model is None:
+            self.ensure_loaded()
+        return self._model
+
+    @property
+    def vocabulary(self) -> Mapping:
+        return self.model.vocabulary
+
+    @vocabulary.setter
+    def vocabulary(self, vocabulary: Mapping):
+        self._model = VocabularyModel(vocabulary)
+
+    def ensure_loaded(self) -> None:
+        with self.reload_lock:
+            if self._model is None and self.vocabulary_path:
+                self.load(self.vocabulary_path)
+            if self._model is None:
+                self._model = VocabularyModel({})
 
     def load(self, vocabulary_path):
+        """
+        Load the model and swap it in at once, requests in progress finish with the old one.
+        The old model stays when the new file can't be loaded.
+        """
+        self.vocabulary_path = vocabulary_path
         try:
-            with open(vocabulary_path, "rb") as f:
-                self.vocabulary = pickle.load(f)
+            signature = file_signature(vocabulary_path)
+            version = file_version(vocabulary_path)
+            if is_model_file(vocabulary_path):
+                vocabulary = NaiveBayesModel(vocabulary_path)
+            else:
+                with open(vocabulary_path, "rb") as f:
+                    vocabulary = pickle.load(f)
         except FileNotFoundError:
             logger.warning(f"Vocabulary file not found, skipping.")
-            pass
+            return
+        except (pickle.UnpicklingError, EOFError, ValueError):
+            logger.exception(f"Vocabulary file {vocabulary_path} can't be loaded, skipping.")
+            return
+        self._model = VocabularyModel(vocabulary, version, datetime.now(timezone.utc), signature)
+        logger.info(f"Loaded vocabulary {version} with {len(vocabulary)} lemmas.")
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Load vocabulary file again if it changed since the last load, return True if loaded.
+        """
+        if not self.vocabulary_path:
+            return False
+        with self.reload_lock:
+            if self._model is None:
+                self.ensure_loaded()
+                return self._model.signature is not None
+            try:
+                signature = file_signature(self.vocabulary_path)
+            except FileNotFoundError:
+                return False
+            if not force and signature == self.model.signature:
+                return False
+            previous = self.model
+            self.load(self.vocabulary_path)
+            return self.model is not previous
+
+    def model_info(self) -> dict[str, Any]:
+        """
+        Version and load time of the vocabulary in use, doesn't load it if not used yet
+        """
+        model = self._model
+        return {
+            "path": self.vocabulary_path,
+            "version": model.version if model else None,
+            "loaded_at": model.loaded_at.isoformat() if model and model.loaded_at else None,
+            "lemmas": len(model.vocabulary) if model else None,
+        }
+
+    def load_index(self, index_path: str):
+        try:
+            self.index = SynsetIndex(index_path)
+            self.index.get("")
+        except sqlite3.Error:
+            logger.warning(f"Synset index {index_path} can't be opened, skipping.")
+            self.index = None
+        self.synsets.cache_clear()
+
+    def find_synsets(self, lem: str) -> tuple[SynsetEntry, ...]:
+        if self.index:
+            synsets = self.index.get(lem)
+            if synsets is not None:
+                return synsets
+        return wordnet_synsets(lem)
+
+    def cache_info(self) -> dict[str, int]:
+        info = self.synsets.cache_info()
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+        }
 
     def find_definition(self, word: WordBase, sentence: str) -> dict[str, Any]:
+        model = self.model  # the same model for the whole request, even if reloaded meanwhile
         response = {
             "found": 0,
             "word": word.lem,
             "synsets": [],
+            "model_version": model.version,
+            "model_loaded_at": model.loaded_at.isoformat() if model.loaded_at else None,
         }
         synset_name = ""
-        if word.lem in self.vocabulary:
-            classifier = self.vocabulary[word.lem]
+        if word.lem in model.vocabulary:
+            classifier = model.vocabulary[word.lem]
             if isinstance(classifier, str):
                 synset_name = classifier
             else:
                 synset_name = classifier.classify(word_definition_features(sentence, word))
             response["matched_synset"] = synset_name
             response["found"] = 1
-        for synset in nltk.corpus.wordnet.synsets(word.lem):
+        for name, definition, _ in self.synsets(word.lem):
             response["synsets"].append(
                 (
-                    synset.name() == synset_name,
-                    synset.name(),
-                    synset.definition(),
+                    name == synset_name,
+                    name,
+                    definition,
                 )
             )
         return response
@@ -53,14 +244,28 @@ class Definitions:
             "word": word,
             "synsets": []
         }
-        for synset in nltk.corpus.wordnet.synsets(word):
+        for name, definition, pol in self.synsets(word):
             word_dict = {}
-            word_dict['name'] = synset.name()
-            word_dict['definition'] = synset.definition()
-            word_dict['pol'] = ", ".join([l.name() for l in synset.lemmas(lang='pol')])
+            word_dict['name'] = name
+            word_dict['definition'] = definition
+            word_dict['pol'] = pol
             response["synsets"].append(word_dict)
 
         return response
 
-definitions = Definitions()
-definitions.load(settings.VOCABULARY_BASE)
+
+async def watch_vocabulary(definitions: Definitions, interval: float) -> None:
+    """
+    Reload vocabulary in a thread whenever its file changes, check every interval seconds.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(definitions.reload)
+        except Exception:
+            logger.exception("Vocabulary reload failed")
+
+
+definitions = Definitions(vocabulary_path=settings.VOCABULARY_BASE)
+if settings.SYNSET_INDEX_PATH:
+    definitions.load_index(settings.SYNSET_INDEX_PATH)
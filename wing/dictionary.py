@@ -1,13 +1,122 @@
-from dictionary_client import DictionaryClient
+"""
+Asyncio client of DICT protocol server (RFC 2229) with a connection pool and a definitions cache.
+"""
+import asyncio
+from typing import Iterable
 
+from wing.cache import MISSING, TTLCache
 from wing.config import settings
+from wing.connection_pool import Connection, ConnectionPool
+
+
+class DictdError(Exception):
+    pass
+
+
+def quote(word: str) -> str:
+    word = " ".join(word.split())
+    return '"' + word.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+async def read_line(reader: asyncio.StreamReader) -> str:
+    line = await reader.readline()
+    if not line:
+        raise asyncio.IncompleteReadError(line, None)
+    return line.decode().rstrip("\r\n")
+
+
+async def read_status(reader: asyncio.StreamReader, *expected_codes: str) -> str:
+    line = await read_line(reader)
+    if line[:3] not in expected_codes:
+        raise DictdError(line)
+    return line
+
+
+async def read_banner(connection: Connection) -> None:
+    await read_status(connection[0], "220")
+
+
+async def read_definitions(reader: asyncio.StreamReader) -> list[str]:
+    """
+    Read response to one DEFINE command, return text of every definition.
+    """
+    line = await read_status(reader, "150", "552")
+    if line.startswith("552"):  # no match
+        return []
+    definitions = []
+    while True:
+        line = await read_status(reader, "151", "250")
+        if line.startswith("250"):
+            return definitions
+        text_lines = []
+        while (line := await read_line(reader)) != ".":
+            text_lines.append(line[1:] if line.startswith("..") else line)
+        definitions.append("\n".join(text_lines).strip())
+
+
+class DictdClient:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        database: str,
+        pool_size: int = settings.DICTIONARY_POOL_SIZE,
+        timeout: float = settings.DICTIONARY_TIMEOUT,
+        cache_size: int = settings.DICTIONARY_CACHE_SIZE,
+        cache_ttl: float = settings.DICTIONARY_CACHE_TTL,
+    ):
+        self.database = database
+        self.pool = ConnectionPool(host, port, pool_size, on_connect=read_banner)
+        self.timeout = timeout
+        self.cache = TTLCache(cache_size, cache_ttl)
+
+    async def define_many(self, words: Iterable[str]) -> dict[str, list[str]]:
+        """
+        Send DEFINE for every word not in cache over one connection without waiting for answers.
+        """
+        definitions = {}
+        missing = []
+        for word in dict.fromkeys(words):
+            cached = self.cache.get(word)
+            if cached is MISSING:
+                missing.append(word)
+            else:
+                definitions[word] = cached
+
+        async def exchange(connection: Connection) -> list[list[str]]:
+            reader, writer = connection
+            writer.write(
+                "".join(f"DEFINE {self.database} {quote(w)}\r\n" for w in missing).encode()
+            )
+            await writer.drain()
+            return [await read_definitions(reader) for _ in missing]
+
+        if missing:
+            for word, word_definitions in zip(missing, await self.pool.run(exchange, self.timeout)):
+                self.cache.set(word, word_definitions)
+                definitions[word] = word_definitions
+        return definitions
+
+    async def define(self, word: str) -> list[str]:
+        return (await self.define_many([word]))[word]
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+
+dictionary_client = DictdClient(
+    settings.DICTIONARY_HOST, settings.DICTIONARY_PORT, settings.DICTIONARY_VOCABULARY
+)
 
 
 async def find_translations(word: str) -> str | None:
-    dictionary_client = DictionaryClient(
-        host=settings.DICTIONARY_HOST,
-        port=settings.DICTIONARY_PORT,
-    )
-    response = dictionary_client.define(word, db=settings.DICTIONARY_VOCABULARY)
-    if response.content:
-        return response.content[0][settings.DICTIONARY_DEFINITION_KEY]
+    definitions = await dictionary_client.define(word)
+    if definitions:
+        return definitions[0]
+
+
+async def find_translations_batch(words: Iterable[str]) -> dict[str, str | None]:
+    return {
+        word: definitions[0] if definitions else None
+        for word, definitions in (await dictionary_client.define_many(words)).items()
+    }
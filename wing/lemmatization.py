@@ -0,0 +1,120 @@
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import nltk
+
+from wing.config import settings
+
+logging.basicConfig(encoding="utf-8", level=settings.LOGGING_LEVEL)
+logger = logging.getLogger(__name__)
+
+
+class LemmaCache:
+    """
+    Bounded LRU cache of lemmas keyed by (surface form, pos) with hit and miss counters.
+    Lemmas found since the last take_found call are also kept aside, at most maxsize of them.
+    """
+
+    def __init__(self, find_lemma: Callable[[str, str], str | None], maxsize: int):
+        self.find_lemma = find_lemma
+        self.maxsize = maxsize
+        self.lemmas: OrderedDict[tuple[str, str], str | None] = OrderedDict()
+        self.found: dict[tuple[str, str], str | None] = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, word_str: str, pos: str) -> str | None:
+        key = word_str, pos
+        with self.lock:
+            if key in self.lemmas:
+                self.hits += 1
+                self.lemmas.move_to_end(key)
+                return self.lemmas[key]
+            self.misses += 1
+
+        lem = self.find_lemma(word_str, pos)
+
+        with self.lock:
+            self.lemmas[key] = lem
+            if len(self.lemmas) > self.maxsize:
+                self.lemmas.popitem(last=False)
+            if len(self.found) < self.maxsize:
+                self.found[key] = lem
+        return lem
+
+    def lemmatize(self, word_str: str, pos: str = "n") -> str | None:
+        """
+        The same interface as nltk WordNetLemmatizer
+        """
+        return self.get(word_str, pos)
+
+    def info(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.lemmas),
+            "maxsize": self.maxsize,
+        }
+
+    def clear(self) -> None:
+        with self.lock:
+            self.lemmas.clear()
+            self.found.clear()
+            self.hits = self.misses = 0
+
+    def take_found(self) -> dict[tuple[str, str], str | None]:
+        """
+        Return lemmas found since the previous call and forget them
+        """
+        with self.lock:
+            found, self.found = self.found, {}
+        return found
+
+    def update(self, lemmas: dict[tuple[str, str], str | None]) -> None:
+        with self.lock:
+            self.lemmas.update(lemmas)
+            for key in lemmas:
+                self.lemmas.move_to_end(key)
+            while len(self.lemmas) > self.maxsize:
+                self.lemmas.popitem(last=False)
+
+    def load(self, cache_path: str) -> None:
+        try:
+            with open(cache_path, "rb") as f:
+                lemmas = pickle.load(f)
+        except FileNotFoundError:
+            logger.info(f"Lemma cache file {cache_path} not found, starting empty.")
+            return
+        self.update(lemmas)
+
+    def save(self, cache_path: str) -> None:
+        """
+        Write cache to temporary file and replace the old one, so readers never see partial file
+        """
+        with self.lock:
+            lemmas = dict(self.lemmas)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(lemmas, f, -1)
+        os.replace(tmp_path, cache_path)
+
+
+def wordnet_morphy(word_str: str, pos: str) -> str | None:
+    return nltk.corpus.wordnet.morphy(word_str, pos)
+
+
+_wordnet_lemmatizer = nltk.stem.WordNetLemmatizer()
+
+
+def wordnet_lemmatize(word_str: str, pos: str) -> str:
+    return _wordnet_lemmatizer.lemmatize(word_str, pos)
+
+
+# morphy returns None for unknown words, lemmatize returns the word unchanged
+morphy_cache = LemmaCache(wordnet_morphy, settings.LEMMA_CACHE_SIZE)
+lemmatize_cache = LemmaCache(wordnet_lemmatize, settings.LEMMA_CACHE_SIZE)
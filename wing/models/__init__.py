@@ -4,9 +4,12 @@ Created this to avoid sqlalchemy.exc.InvalidRequestError for script commands.
 
 __all__ = [
     "book",
+    "book_word",
     "currently_reading",
     "flashcard",
     "flashcard_word",
+    "ingestion_job",
+    "ingestion_job_chunk",
     "sentence",
     "sentence_flashcard",
     "sentence_word",
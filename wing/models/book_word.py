@@ -0,0 +1,29 @@
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+from .base import Base
+from .word import Word
+
+
+class BookWord(Base, SQLModel, table=True):
+    """
+    Per book statistics of words, kept in step with sentence_word.
+    """
+
+    __tablename__ = "book_word"
+    __table_args__ = (
+        Index("ix_book_word_book_id_word_id", "book_id", "word_id", unique=True),
+        Index("ix_book_word_book_id_occurrences", "book_id", "occurrences"),
+    )
+
+    book_id: int = Field(foreign_key="book.id", ondelete="CASCADE")
+    word_id: int = Field(foreign_key="word.id", ondelete="CASCADE")
+    # number of sentences of the book with the word
+    occurrences: int = Field(default=0, nullable=False)
+    first_sentence_nr: int = Field(nullable=False)
+
+
+class BookWordStats(SQLModel):
+    word: Word
+    occurrences: int
+    first_sentence_nr: int
@@ -2,7 +2,9 @@ from sqlmodel import Column, Field, Relationship, SQLModel
 from sqlalchemy import JSON
 
 from .base import Base
+from .sentence import Sentence
 from .user import User
+from .word import Word
 
 
 class FlashcardCreate(SQLModel):
@@ -24,6 +26,14 @@ class FlashcardFind(FlashcardBase):
     translations: list = []
 
 
+class FlashcardStudy(FlashcardBase):
+    id: int
+    words: list[Word] = []
+    sentences: list[Sentence] = []
+    # number of all sentences of the flashcard in the book, sentences holds only the first ones
+    sentences_count: int = 0
+
+
 class Flashcard(Base, FlashcardBase, table=True):
     __tablename__ = "flashcard"
 
@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Relationship
 
 from .base import Base
@@ -7,6 +8,10 @@ from .word import Word
 
 class FlashcardWord(Base, SQLModel, table=True):
     __tablename__ = "flashcard_word"
+    __table_args__ = (
+        Index("ix_flashcard_word_flashcard_id_word_id", "flashcard_id", "word_id", unique=True),
+        Index("ix_flashcard_word_word_id_flashcard_id", "word_id", "flashcard_id", unique=True),
+    )
 
     flashcard_id: int = Field(foreign_key="flashcard.id")
     word_id: int = Field(foreign_key="word.id")
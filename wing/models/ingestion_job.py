@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+
+from pydantic import computed_field
+from sqlalchemy import DateTime
+from sqlalchemy.orm import declared_attr
+from sqlmodel import Field, SQLModel, TEXT
+
+from .base import Base
+
+JOB_UPLOADING = "uploading"
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+def now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class IngestionJobBase(SQLModel):
+    book_id: int = Field(foreign_key="book.id", ondelete="CASCADE", index=True)
+    user_id: int = Field(foreign_key="user.id")
+    status: str = Field(default=JOB_QUEUED, nullable=False, max_length=10, index=True)
+    sentences_processed: int = Field(default=0, nullable=False)
+    words_saved: int = Field(default=0, nullable=False)
+    error: str | None = Field(default=None, sa_type=TEXT)
+    created_at: datetime = Field(default_factory=now, sa_type=DateTime(timezone=True))
+    started_at: datetime | None = Field(default=None, sa_type=DateTime(timezone=True))
+    finished_at: datetime | None = Field(default=None, sa_type=DateTime(timezone=True))
+    # heartbeat of the worker, a running job not updated for a while is taken again
+    updated_at: datetime = Field(default_factory=now, sa_type=DateTime(timezone=True))
+    # incremented whenever a worker takes the job
+    attempt: int = Field(default=0, nullable=False)
+
+
+class IngestionJobPublic(IngestionJobBase):
+    id: int
+
+    @computed_field
+    @property
+    def elapsed_seconds(self) -> float | None:
+        if not self.started_at:
+            return None
+        return ((self.finished_at or now()) - self.started_at).total_seconds()
+
+
+class IngestionJob(Base, IngestionJobBase, table=True):
+    __tablename__ = "ingestion_job"
+
+    # sentences of the book with this or greater id were saved by the current attempt
+    first_sentence_id: int | None = Field(default=None)
+
+    @declared_attr
+    def __mapper_args__(cls):
+        # updates of the job check the attempt, a worker whose job was taken again can't save
+        return {"version_id_col": cls.__table__.c.attempt, "version_id_generator": False}
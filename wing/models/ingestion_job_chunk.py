@@ -0,0 +1,13 @@
+from sqlalchemy import UniqueConstraint
+from sqlmodel import Field, SQLModel, TEXT
+
+from .base import Base
+
+
+class IngestionJobChunk(Base, SQLModel, table=True):
+    __tablename__ = "ingestion_job_chunk"
+    __table_args__ = (UniqueConstraint("job_id", "nr"),)
+
+    job_id: int = Field(foreign_key="ingestion_job.id", ondelete="CASCADE", index=True)
+    nr: int = Field(nullable=False)
+    content: str = Field(nullable=False, sa_type=TEXT)
@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Relationship
 
 from .base import Base
@@ -18,6 +19,16 @@ class SentenceCreate(SentenceBase):
 
 class Sentence(Base, SentenceBase, table=True):
     __tablename__ = "sentence"
+    __table_args__ = (
+        Index("ix_sentence_book_id_nr", "book_id", "nr"),
+        # trigram index used by ILIKE '%phrase%' search, requires pg_trgm extension
+        Index(
+            "ix_sentence_sentence_trgm",
+            "sentence",
+            postgresql_using="gin",
+            postgresql_ops={"sentence": "gin_trgm_ops"},
+        ),
+    )
 
     book: Book = Relationship(back_populates="sentences")
     sentence_flashcards: list["SentenceFlashcard"] = Relationship(
@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Relationship
 
 from .base import Base
@@ -7,6 +8,20 @@ from .flashcard import Flashcard
 
 class SentenceFlashcard(Base, SQLModel, table=True):
     __tablename__ = "sentence_flashcard"
+    __table_args__ = (
+        Index(
+            "ix_sentence_flashcard_sentence_id_flashcard_id",
+            "sentence_id",
+            "flashcard_id",
+            unique=True,
+        ),
+        Index(
+            "ix_sentence_flashcard_flashcard_id_sentence_id",
+            "flashcard_id",
+            "sentence_id",
+            unique=True,
+        ),
+    )
 
     sentence_id: int = Field(foreign_key="sentence.id")
     flashcard_id: int = Field(foreign_key="flashcard.id")
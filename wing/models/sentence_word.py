@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Relationship
 
 from .base import Base
@@ -7,6 +8,10 @@ from .word import Word
 
 class SentenceWord(Base, SQLModel, table=True):
     __tablename__ = "sentence_word"
+    __table_args__ = (
+        Index("ix_sentence_word_sentence_id_word_id", "sentence_id", "word_id", unique=True),
+        Index("ix_sentence_word_word_id_sentence_id", "word_id", "sentence_id", unique=True),
+    )
 
     sentence_id: int = Field(foreign_key="sentence.id")
     word_id: int = Field(foreign_key="word.id")
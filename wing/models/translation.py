@@ -1,12 +1,20 @@
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, TEXT
 
 from .base import Base
 
+# format of definition: dictd entry or "source -> target" lines of PONS
+SOURCE_DICT = "dict"
+SOURCE_PONS = "pons"
+
 
 class TranslationBase(SQLModel):
-    word: str = Field(max_length=60)
+    word: str = Field(max_length=60, index=True)
     definition: str = Field(TEXT)
 
 
 class Translation(Base, TranslationBase, table=True):
     __tablename__ = "translation"
+    __table_args__ = (Index("ix_translation_word_source", "word", "source", unique=True),)
+
+    source: str = Field(default=SOURCE_DICT, max_length=10, nullable=False)
@@ -1,5 +1,5 @@
 from sqlmodel import Column, Field, Relationship, SQLModel
-from sqlalchemy import JSON
+from sqlalchemy import JSON, UniqueConstraint
 
 from .base import Base
 
@@ -31,8 +31,14 @@ class WordFind(WordBase):
     definition: str = None
 
 
+class SynsetQuery(SQLModel):
+    word_id: int
+    sentence_id: int
+
+
 class Word(Base, WordBase, table=True):
     __tablename__ = "word"
+    __table_args__ = (UniqueConstraint("lem", "pos"),)
 
     flashcard_words: list["FlashcardWord"] = Relationship(
         back_populates="word", sa_relationship_kwargs={"cascade": "delete"}
@@ -0,0 +1,256 @@
+"""
+Compact Naive Bayes model for word sense disambiguation.
+
+Every trained nltk.NaiveBayesClassifier is turned into a matrix of log probabilities with
+one row per (feature name, feature value) and one column per synset. Rows are found by
+a 64-bit hash of the feature, so no Python dicts are kept in memory. All lemmas are stored
+in one file which is memory-mapped on load:
+
+    MAGIC | header length (uint64) | JSON header | arrays, every one aligned to 8 bytes
+"""
+import hashlib
+import json
+import os
+from typing import Any, Iterable, Mapping
+
+import nltk
+import numpy as np
+
+from wing.definition_feature_functions import word_definition_features
+from wing.models.word import WordBase
+
+MAGIC = b"WSDNB01\n"
+ALIGNMENT = 8
+UNSEEN = object()
+
+
+def feature_key(fname: Any, fval: Any) -> int:
+    """
+    Hash of feature name and value, repr keeps None apart from the "None" string
+    """
+    digest = hashlib.blake2b(f"{fname!r}\x1f{fval!r}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def unseen_key(fname: Any) -> int:
+    return feature_key(fname, "\x1funseen")
+
+
+def classifier_matrix(
+    classifier: nltk.NaiveBayesClassifier,
+) -> tuple[list[str], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Return labels, label log probabilities, sorted feature hashes and log probability rows.
+    """
+    labels = list(classifier.labels())
+    label_probdist = classifier._label_probdist
+    feature_probdist = classifier._feature_probdist
+    priors = np.array([label_probdist.logprob(label) for label in labels], dtype=np.float64)
+
+    fvals: dict[Any, set] = {}
+    for (label, fname), probdist in feature_probdist.items():
+        fvals.setdefault(fname, set()).update(probdist.samples())
+
+    rows: dict[int, list[float]] = {}
+    for fname, values in fvals.items():
+        for fval in list(values) + [UNSEEN]:
+            key = unseen_key(fname) if fval is UNSEEN else feature_key(fname, fval)
+            rows[key] = [
+                feature_probdist[label, fname].logprob(fval)
+                if (label, fname) in feature_probdist
+                else -np.inf
+                for label in labels
+            ]
+    keys = np.array(sorted(rows), dtype=np.uint64)
+    matrix = np.array([rows[int(key)] for key in keys], dtype=np.float32).reshape(-1, len(labels))
+    return labels, priors, keys, matrix
+
+
+def save_model(
+    model_path: str,
+    classifiers: Mapping[str, nltk.NaiveBayesClassifier | str]
+    | Iterable[tuple[str, nltk.NaiveBayesClassifier | str]],
+) -> None:
+    """
+    Write classifiers of all lemmas to one file, lemmas with one synset keep only its name.
+    Classifiers can be (lemma, classifier) pairs read one by one, only their arrays are kept.
+    """
+    if isinstance(classifiers, Mapping):
+        classifiers = classifiers.items()
+    lemmas = {}
+    keys_parts, matrix_parts, priors_parts = [], [], []
+    keys_offset = matrix_offset = priors_offset = 0
+    for lem, classifier in classifiers:
+        if isinstance(classifier, str):
+            lemmas[lem] = classifier
+            continue
+        labels, priors, keys, matrix = classifier_matrix(classifier)
+        lemmas[lem] = {
+            "labels": labels,
+            "priors": priors_offset,
+            "keys": [keys_offset, len(keys)],
+            "matrix": matrix_offset,
+        }
+        keys_parts.append(keys)
+        matrix_parts.append(matrix.ravel())
+        priors_parts.append(priors)
+        keys_offset += len(keys)
+        matrix_offset += matrix.size
+        priors_offset += len(priors)
+
+    arrays = {
+        "keys": np.concatenate(keys_parts or [np.empty(0, np.uint64)]).astype(np.uint64),
+        "matrix": np.concatenate(matrix_parts or [np.empty(0, np.float32)]).astype(np.float32),
+        "priors": np.concatenate(priors_parts or [np.empty(0, np.float64)]).astype(np.float64),
+    }
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {"offset": offset, "dtype": array.dtype.str, "size": array.size}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header = json.dumps({"lemmas": lemmas, "arrays": layout}).encode()
+    header += b" " * (-(len(MAGIC) + 8 + len(header)) % ALIGNMENT)
+
+    # the old file may be memory-mapped by running servers, it's replaced and never overwritten
+    tmp_path = f"{model_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header)).tobytes())
+        f.write(header)
+        for array in arrays.values():
+            data = array.tobytes()
+            f.write(data + b"\0" * (-len(data) % ALIGNMENT))
+    os.replace(tmp_path, model_path)
+
+
+def is_model_file(model_path: str) -> bool:
+    with open(model_path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class LemmaClassifier:
+    """
+    Naive Bayes classifier of one lemma, views of model arrays
+    """
+
+    def __init__(
+        self, labels: list[str], priors: np.ndarray, keys: np.ndarray, matrix: np.ndarray
+    ):
+        self._labels = labels
+        self.priors = priors
+        self.keys = keys
+        self.matrix = matrix
+
+    def labels(self) -> list[str]:
+        return self._labels
+
+    def scores(self, featuresets: list[dict]) -> np.ndarray:
+        """
+        Log probabilities of labels for every featureset, shape (featuresets, labels)
+        """
+        scores = np.tile(self.priors.astype(np.float64), (len(featuresets), 1))
+        sizes = [len(featureset) for featureset in featuresets]
+        if not self.keys.size or not sum(sizes):
+            return scores
+        # every feature is looked up by its value, then by its name for values not seen
+        keys = np.array(
+            [
+                (feature_key(fname, fval), unseen_key(fname))
+                for featureset in featuresets
+                for fname, fval in featureset.items()
+            ],
+            dtype=np.uint64,
+        )
+        positions = np.minimum(np.searchsorted(self.keys, keys), self.keys.size - 1)
+        found = self.keys[positions] == keys
+        rows = np.where(found[:, 0], positions[:, 0], positions[:, 1])
+        known = found.any(axis=1)
+        featureset_indexes = np.repeat(np.arange(len(featuresets)), sizes)
+        # features never seen by the classifier are ignored, like in nltk
+        np.add.at(scores, featureset_indexes[known], self.matrix[rows[known]])
+        return scores
+
+    def classify_many(self, featuresets: list[dict]) -> list[str]:
+        if not featuresets:
+            return []
+        return [self._labels[i] for i in self.scores(featuresets).argmax(axis=1)]
+
+    def classify(self, featureset: dict) -> str:
+        return self.classify_many([featureset])[0]
+
+
+class NaiveBayesModel:
+    """
+    Memory-mapped classifiers of all lemmas, used like the dict from vocabulary pickle
+    """
+
+    def __init__(self, model_path: str):
+        with open(model_path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{model_path} is not a Naive Bayes model file")
+            header_size = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+            header = json.loads(f.read(header_size))
+        data_offset = len(MAGIC) + 8 + header_size
+        self.lemmas: dict[str, Any] = header["lemmas"]
+        self.arrays = {}
+        for name, layout in header["arrays"].items():
+            if layout["size"]:
+                self.arrays[name] = np.memmap(
+                    model_path,
+                    dtype=np.dtype(layout["dtype"]),
+                    mode="r",
+                    offset=data_offset + layout["offset"],
+                    shape=(layout["size"],),
+                )
+            else:
+                self.arrays[name] = np.empty(0, dtype=np.dtype(layout["dtype"]))
+        self.classifiers: dict[str, LemmaClassifier] = {}
+
+    def __contains__(self, lem: str) -> bool:
+        return lem in self.lemmas
+
+    def __len__(self) -> int:
+        return len(self.lemmas)
+
+    def __getitem__(self, lem: str) -> LemmaClassifier | str:
+        entry = self.lemmas[lem]
+        if isinstance(entry, str):
+            return entry
+        if lem not in self.classifiers:
+            labels = entry["labels"]
+            keys_start, keys_size = entry["keys"]
+            matrix_size = keys_size * len(labels)
+            self.classifiers[lem] = LemmaClassifier(
+                labels,
+                self.arrays["priors"][entry["priors"]: entry["priors"] + len(labels)],
+                self.arrays["keys"][keys_start: keys_start + keys_size],
+                self.arrays["matrix"][entry["matrix"]: entry["matrix"] + matrix_size].reshape(
+                    keys_size, len(labels)
+                ),
+            )
+        return self.classifiers[lem]
+
+    def classify_many(self, pairs: Iterable[tuple[str, WordBase]]) -> list[str | None]:
+        """
+        Find synset names for (sentence, word) pairs, scoring pairs of one lemma at once.
+        """
+        pairs = list(pairs)
+        results: list[str | None] = [None] * len(pairs)
+        groups: dict[str, list[tuple[int, dict]]] = {}
+        for i, (sentence, word) in enumerate(pairs):
+            if word.lem not in self:
+                continue
+            classifier = self[word.lem]
+            if isinstance(classifier, str):
+                results[i] = classifier
+            else:
+                try:
+                    features = word_definition_features(sentence, word)
+                except ValueError:
+                    continue  # the word isn't in the sentence
+                groups.setdefault(word.lem, []).append((i, features))
+        for lem, items in groups.items():
+            labels = self[lem].classify_many([features for _, features in items])
+            for (i, _), label in zip(items, labels):
+                results[i] = label
+        return results
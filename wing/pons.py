@@ -0,0 +1,174 @@
+"""
+Asynchronous PONS dictionary client for translating many words at once.
+"""
+import asyncio
+import logging
+import time
+from typing import Iterable
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from wing.config import settings
+from wing.crud.translation import get_translations_by_words, save_translation
+from wing.models.translation import SOURCE_PONS
+from wing.tools_external import parse_translations
+
+logging.basicConfig(encoding="utf-8", level=settings.LOGGING_LEVEL)
+logger = logging.getLogger(__name__)
+
+# responses worth to repeat after a while
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+
+class PonsError(Exception):
+    pass
+
+
+class PonsForbidden(PonsError):
+    """
+    Key is rejected, no other request can succeed.
+    """
+
+
+def format_translations(translations: Iterable[tuple[str, str]]) -> str:
+    return "\n".join(f"{source} -> {target}" for source, target in translations)
+
+
+def parse_definition(definition: str) -> list[tuple[str, str]]:
+    """
+    Reverse format_translations for translations saved in translation table.
+    """
+    translations = []
+    for line in definition.splitlines():
+        source, separator, target = line.partition(" -> ")
+        if separator:
+            translations.append((source, target))
+    return translations
+
+
+class RateLimiter:
+    """
+    Let at most rate calls per second through wait()
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate else 0
+        self.next_time = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        async with self.lock:
+            now = time.monotonic()
+            if self.next_time > now:
+                await asyncio.sleep(self.next_time - now)
+                now = self.next_time
+            self.next_time = now + self.interval
+
+
+class PonsClient:
+    def __init__(
+        self,
+        api_url: str = settings.API_URL,
+        secret_key: str = settings.PONS_SECRET_KEY,
+        concurrency: int = settings.PONS_CONCURRENCY,
+        rate: float = settings.PONS_RATE_LIMIT,
+        retries: int = settings.PONS_RETRIES,
+        backoff: float = settings.PONS_BACKOFF,
+        timeout: float = settings.PONS_TIMEOUT,
+    ):
+        self.api_url = api_url
+        self.retries = retries
+        self.backoff = backoff
+        self.rate_limiter = RateLimiter(rate)
+        self.client = httpx.AsyncClient(
+            headers={"X-Secret": secret_key},
+            limits=httpx.Limits(
+                max_connections=concurrency, max_keepalive_connections=concurrency
+            ),
+            timeout=timeout,
+            verify=False,
+        )
+
+    async def translate(self, word: str, lang: str = "enpl") -> list[tuple[str, str]]:
+        """
+        Return (source, target) pairs for word, retry on gateway timeouts with backoff.
+        """
+        for attempt in range(self.retries + 1):
+            await self.rate_limiter.wait()
+            try:
+                response = await self.client.get(self.api_url, params={"l": lang, "q": word})
+            except httpx.TransportError as e:
+                error = f"{e!r}"
+            else:
+                if response.status_code == 200:
+                    return parse_translations(response.json())
+                if response.status_code == 204:
+                    return []
+                if response.status_code == 403:
+                    raise PonsForbidden("Response status: 403 - Forbidden, check PONS_SECRET_KEY")
+                if response.status_code not in RETRY_STATUS_CODES:
+                    logger.info(f"Response status for {word!r}: {response.status_code}")
+                    return []
+                error = f"Response status: {response.status_code}"
+            if attempt < self.retries:
+                delay = self.backoff * 2 ** attempt
+                logger.info(f"{error} for {word!r}, retry in {delay} seconds")
+                await asyncio.sleep(delay)
+        raise PonsError(f"{error} for {word!r}, gave up after {self.retries} retries")
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+async def import_translations(
+    session: AsyncSession, words: list[str], client: PonsClient
+) -> dict[str, list[tuple[str, str]]]:
+    """
+    Translate words not yet in translation table concurrently and save every result at once,
+    so the interrupted import continues where it stopped. Stops at the first 403 response.
+    """
+    words = list(dict.fromkeys(words))
+    translations = {}
+    for word, definition in (await get_translations_by_words(session, words, SOURCE_PONS)).items():
+        if word_translations := parse_definition(definition):
+            translations[word] = word_translations
+    missing = [word for word in words if word not in translations]
+    logger.info(f"{len(translations)} words already translated, {len(missing)} to translate")
+
+    async def translate(word: str) -> tuple[str, list[tuple[str, str]]]:
+        return word, await client.translate(word)
+
+    tasks = [asyncio.create_task(translate(word)) for word in missing]
+    try:
+        for task in asyncio.as_completed(tasks):
+            try:
+                word, word_translations = await task
+            except PonsForbidden:
+                raise
+            except PonsError as e:
+                logger.error(str(e))
+                continue
+            if word_translations:
+                definition = format_translations(word_translations)
+                await save_translation(session, word, definition, SOURCE_PONS)
+                translations[word] = word_translations
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return translations
+
+
+def flashcard_rows(
+    translations: dict[str, list[tuple[str, str]]], max_targets: int = 3
+) -> list[tuple[str, str]]:
+    """
+    Make (keyword, translation) row for every word, the first distinct targets joined.
+    """
+    rows = []
+    for word, word_translations in translations.items():
+        targets = list(dict.fromkeys(target for _, target in word_translations))
+        if targets:
+            rows.append((word, ", ".join(targets[:max_targets])))
+    return rows
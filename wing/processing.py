@@ -1,11 +1,16 @@
 import asyncio
+import codecs
 import csv
 import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional, Iterable, AsyncIterable
+from typing import Awaitable, AsyncIterable, AsyncIterator, Callable, Iterable, Optional
 
 import nltk
 import requests
+from fastapi import UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 from urllib3.exceptions import InsecureRequestWarning
 
@@ -16,40 +21,53 @@ from .crud.flashcard import (
     flashcard_join_to_sentences,
     flashcard_join_to_words,
 )
+from .crud.ingestion_job import (
+    delete_ingestion_job_chunks,
+    get_ingestion_job,
+    get_ingestion_job_content,
+    take_ingestion_job,
+    update_ingestion_job,
+)
 from .crud.sentence import (
-    create_sentence,
+    create_sentences,
     count_sentences_for_book,
+    delete_sentences_from,
     get_sentences_with_phrase,
     get_sentence_ids,
 )
-from .crud.user import get_user_by_email
+from .crud.user import get_user_by_email, get_user_by_username
 from .crud.word import (
-    update_word,
-    create_word,
+    add_word_counts,
+    upsert_words,
     word_join_to_sentences,
     count_words_for_book,
     get_sentence_ids_with_word,
     find_words,
+    get_book_lemmas,
 )
+from .config import settings
 from .db.session import get_session
-from .models.book import Book, BookCreate
+from .models.book import Book, BookCreate, BookUpdate
 from .models.flashcard import Flashcard, FlashcardCreate
 from .models.flashcard_word import FlashcardWord
+from .models.ingestion_job import IngestionJob, JOB_DONE, JOB_FAILED, now
 from .models.sentence import Sentence, SentenceCreate
 from .models.sentence_flashcard import SentenceFlashcard
 from .models.sentence_word import SentenceWord
 from .models.user import User
 from .models.word import Word, WordCreate, WordFind
-from .structure import (
-    DETERMINERS,
-    PRONOUNS,
-)
+from .structure import phrase_tables
+from .lemmatization import lemmatize_cache, morphy_cache
 from .messages import book_created_message, loading_message
+from .pons import PonsClient, flashcard_rows, import_translations
 from .tools import tag_to_pos
 
 # Suppress only the single warning from urllib3 needed.
 requests.packages.urllib3.disable_warnings(category=InsecureRequestWarning)
 
+logging.basicConfig(encoding="utf-8", level=settings.LOGGING_LEVEL)
+logger = logging.getLogger(__name__)
+
 
 def get_pattern(word: str) -> str:
     """
@@ -67,6 +85,50 @@ def get_book_content(book_path: Path) -> str:
     return book_content
 
 
+async def read_book_chunks(
+    book_path: Path, chunk_size: int = settings.BOOK_CHUNK_SIZE
+) -> AsyncIterator[str]:
+    """
+    Read book content in chunks of chunk_size characters
+    """
+    with open(book_path) as f:
+        while chunk := await asyncio.to_thread(f.read, chunk_size):
+            yield chunk
+
+
+async def read_upload_chunks(
+    file: UploadFile, chunk_size: int = settings.BOOK_CHUNK_SIZE
+) -> AsyncIterator[str]:
+    """
+    Read uploaded book in chunks of chunk_size bytes and decode them as utf-8
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    while data := await file.read(chunk_size):
+        yield decoder.decode(data)
+    if rest := decoder.decode(b"", final=True):
+        yield rest
+
+
+async def stream_sentences(book_chunks: AsyncIterable[str]) -> AsyncIterator[str]:
+    """
+    Split book chunks to sentences. The last sentence in a chunk can be cut by the chunk end, so
+    it is carried with its raw text to the next chunk.
+    """
+    rest = ""
+    async for chunk in book_chunks:
+        text = rest + chunk
+        sentences = nltk.sent_tokenize(text)
+        if not sentences:
+            rest = text
+            continue
+        rest = text[text.rindex(sentences[-1]) :]
+        for sentence_text in sentences[:-1]:
+            yield sentence_text
+
+    for sentence_text in nltk.sent_tokenize(rest):
+        yield sentence_text
+
+
 def get_translations_content(translations_path: Path) -> list:
     """
     Read csv file and return list with translations
@@ -77,15 +139,15 @@ def get_translations_content(translations_path: Path) -> list:
 
 def filter_source(words: list) -> tuple[list, str] | None:
     """
-    Find words which has additional parts
+    Find words which has additional parts: particle, determiner or pronoun before the word,
+    or reflexive pronoun after it. Return the word without the part and its pos.
     """
     if len(words) == 2:
-        if words[0].lower() == "to":
-            return [words[1]], "v"
-        elif words[0].lower() in DETERMINERS:
-            return [words[1]], "n"
-        elif words[0].lower() in PRONOUNS:
-            return [words[1]], "v"
+        leading, trailing = phrase_tables()
+        if pos := leading.get(words[0].lower()):
+            return [words[1]], pos
+        if pos := trailing.get(words[1].lower()):
+            return [words[0]], pos
 
 
 def find_pos(words: list) -> Optional[str]:
@@ -130,6 +192,24 @@ async def load_translations_cmd(book_id: Optional[int], filename_path: Path) ->
     return book
 
 
+async def import_pons_translations_cmd(
+    book_id: Optional[int], words: list[str], username: str, client: PonsClient
+) -> int:
+    """
+    Translate words given or words of the book with PONS and make flashcards for the user
+    """
+    async for session in get_session():
+        user = await get_user_by_username(session, username)
+        if not user:
+            raise ValueError(f"User not found by username: {username}")
+        if book_id:
+            words = words + await get_book_lemmas(session, book_id)
+        translations = await import_translations(session, words, client)
+        rows = flashcard_rows(translations)
+        await load_translations_content(session, rows, book_id, user.id)
+    return len(rows)
+
+
 async def get_or_create_book(book_id: Optional[int], filename_path: Path) -> Book:
     """
     Get book for loading translations or create new book based on filename.
@@ -160,7 +240,6 @@ async def load_translations_content(
     book_id: int,
     user_id: int,
 ):
-    wnl = nltk.stem.WordNetLemmatizer()
     for source_text, translation_str in translation_rows:
         flashcard = None
         for retrieved_flashcard in await get_flashcards_by_keyword(session, source_text):
@@ -203,7 +282,7 @@ async def load_translations_content(
                 if tag in ("NN", "VB", "JJ", "RB"):
                     word = (await find_words(session, WordFind(lem=word_str, pos=pos))).first()
                 elif pos:
-                    word_lem = wnl.lemmatize(word_str, pos)
+                    word_lem = lemmatize_cache.lemmatize(word_str, pos)
                     word = (await find_words(session, WordFind(lem=word_lem, pos=pos))).first()
                 if word:
                     word_ids.add(word.id)
@@ -223,7 +302,7 @@ def create_word_clone(
     """
     Create Word object and add to dest dict
     """
-    lem = nltk.corpus.wordnet.morphy(word_str, pos) if pos else None
+    lem = morphy_cache.get(word_str, pos) if pos else None
     if not lem:
         lem = word_str
 
@@ -259,37 +338,84 @@ async def save_sentence(sentence_nr: ..., book_id: int, sentence_text: str) -> S
 
 
 async def split_to_sentences(
-    session: AsyncSession, book_raw: str, book_id: int
+    session: AsyncSession,
+    book_raw: str | AsyncIterable[str],
+    book_id: int,
+    batch_size: int = settings.SENTENCES_BATCH_SIZE,
+    progress: Callable[[int], Awaitable[None]] | None = None,
 ) -> AsyncIterable[Sentence]:
+    """
+    Split book to sentences and save them in batches. Yield saved sentences except chapter titles.
+    Book can be whole content or chunks of content. Every batch is committed, by progress if
+    given, which is awaited with number of saved sentences.
+    """
+    if isinstance(book_raw, str):
+        book_raw = single_chunk(book_raw)
     sentence_nr = itertools.count()
+    batch = []  # list of tuples (SentenceCreate, is_yielded)
+    saved = 0
 
-    for sentence_text in nltk.sent_tokenize(book_raw):
+    async for sentence_text in stream_sentences(book_raw):
         if sentence_text.lower().startswith("chapter "):
             chapter, *rest = sentence_text.split("\n")
-            await create_sentence(
-                session,
-                SentenceCreate(
-                    nr=next(sentence_nr),
-                    book_id=book_id,
-                    sentence=chapter,
-                ),
+            batch.append(
+                (
+                    SentenceCreate(
+                        nr=next(sentence_nr),
+                        book_id=book_id,
+                        sentence=chapter,
+                    ),
+                    False,
+                )
             )
             sentence_text = "\n".join(rest)
 
-        if not sentence_text:
-            continue
+        if sentence_text:
+            batch.append(
+                (
+                    SentenceCreate(
+                        nr=next(sentence_nr),
+                        book_id=book_id,
+                        sentence=sentence_text,
+                    ),
+                    True,
+                )
+            )
 
-        sentence = await create_sentence(
-            session,
-            SentenceCreate(
-                nr=next(sentence_nr),
-                book_id=book_id,
-                sentence=sentence_text,
-            ),
-        )
+        if len(batch) >= batch_size:
+            saved += len(batch)
+            async for sentence in save_sentences_batch(session, batch, saved, progress):
+                yield sentence
+            batch = []
+
+    saved += len(batch)
+    async for sentence in save_sentences_batch(session, batch, saved, progress):
         yield sentence
 
 
+async def single_chunk(book_raw: str) -> AsyncIterator[str]:
+    yield book_raw
+
+
+async def save_sentences_batch(
+    session: AsyncSession,
+    batch: list[tuple[SentenceCreate, bool]],
+    saved: int = 0,
+    progress: Callable[[int], Awaitable[None]] | None = None,
+) -> AsyncIterable[Sentence]:
+    """
+    Save batch of sentences in one query and yield these which should be processed
+    """
+    sentences = await create_sentences(
+        session, [sentence for sentence, _ in batch], commit=progress is None
+    )
+    if progress:
+        await progress(saved)
+    for sentence, (_, is_yielded) in zip(sentences, batch):
+        if is_yielded:
+            yield sentence
+
+
 async def load_book_content_cmd(book_path: Path, book_id: int, user_id: int) -> Book:
     """
     Load book from path, and add book.
@@ -300,9 +426,9 @@ async def load_book_content_cmd(book_path: Path, book_id: int, user_id: int) ->
     if book.title is None:
         raise ValueError(f"ERROR: Not found book for id = {book_id}.")
 
-    book_raw = get_book_content(book_path)
+    book_chunks = read_book_chunks(book_path)
 
-    pos_collections = await load_sentences(session, book_raw, book_id)
+    pos_collections = await load_sentences(session, book_chunks, book_id)
 
     for dest in pos_collections:
         await save_prepared_words(session, dest)
@@ -315,16 +441,47 @@ async def load_book_content_cmd(book_path: Path, book_id: int, user_id: int) ->
     return book
 
 
-async def load_sentences(
-    session: AsyncSession, book_raw: str, book_id: int
-) -> tuple[dict, dict, dict, dict]:
+_tagger = None
+_tagging_executor = None
+
+
+def init_tagger() -> None:
+    """
+    Load perceptron tagger and saved lemmas once per tagging process
+    """
+    global _tagger
+    _tagger = nltk.tag.PerceptronTagger()
+    if settings.LEMMA_CACHE_PATH:
+        morphy_cache.load(settings.LEMMA_CACHE_PATH)
+
+
+def get_tagging_executor() -> ProcessPoolExecutor | None:
+    """
+    Get shared process pool for POS tagging. None means tagging in the default thread pool.
+    """
+    global _tagging_executor
+    if _tagging_executor is None and settings.TAGGING_POOL_SIZE != 0:
+        _tagging_executor = ProcessPoolExecutor(
+            max_workers=settings.TAGGING_POOL_SIZE,
+            initializer=init_tagger,
+        )
+    return _tagging_executor
+
+
+def tag_sentences(sentences: list[tuple[int, str]]) -> tuple[dict, dict, dict, dict]:
+    """
+    Tag sentences (id, text) and collect nouns, verbs, adverbs and adjectives
+    """
+    if _tagger is None:
+        init_tagger()
+
     nouns = {}  # n
     verbs = {}  # v
     adverbs = {}  # r
     adjectives = {}  # a
 
-    async for sentence in split_to_sentences(session, book_raw, book_id):
-        for word_str, tag in nltk.pos_tag(nltk.word_tokenize(sentence.sentence)):
+    for sentence_id, sentence_text in sentences:
+        for word_str, tag in _tagger.tag(nltk.word_tokenize(sentence_text)):
             if 30 < len(word_str) and not word_str.isalpha():
                 continue
 
@@ -351,32 +508,199 @@ async def load_sentences(
             else:
                 continue
 
-            create_word_clone({sentence.id}, None, word_str.lower(), tag, pos, empty, dest)
+            create_word_clone({sentence_id}, None, word_str.lower(), tag, pos, empty, dest)
 
+    logger.debug(f"Lemma cache: {morphy_cache.info()}")
     return nouns, verbs, adverbs, adjectives
 
 
-async def save_prepared_words(session: AsyncSession, dest: dict) -> None:
-    for lem, word_dict in dest.items():
-        words = await find_words(session, WordFind(lem=word_dict["lem"], pos=word_dict["pos"]))
-        word = words.first()
-        if word:
-            word.count += word_dict["count"]
-            word.declination.update(word_dict["declination"])
-            await update_word(session, word.id, word)
+def tag_chunk(
+    sentences: list[tuple[int, str]],
+) -> tuple[tuple[dict, dict, dict, dict], dict[tuple[str, str], str | None]]:
+    """
+    Tag sentences in the tagging process and return also lemmas found for the first time, which
+    the parent process stores in the lemma cache file.
+    """
+    return tag_sentences(sentences), morphy_cache.take_found()
+
+
+def save_lemma_cache(lemmas: dict[tuple[str, str], str | None]) -> None:
+    """
+    Add lemmas found by tagging processes to the lemma cache file
+    """
+    morphy_cache.load(settings.LEMMA_CACHE_PATH)
+    morphy_cache.update(lemmas)
+    morphy_cache.save(settings.LEMMA_CACHE_PATH)
+
+
+def merge_word_clones(dest: dict[str, dict], source: dict[str, dict]) -> None:
+    """
+    Merge words collected by create_word_clone from source to dest dict
+    """
+    for lem, source_dict in source.items():
+        if lem in dest:
+            word_dict = dest[lem]
+            word_dict["count"] += source_dict["count"]
+            word_dict["sentence_ids"].update(source_dict["sentence_ids"])
+            word_dict["flashcard_ids"].update(source_dict["flashcard_ids"])
+            word_dict["declination"].update(source_dict["declination"])
         else:
-            word = await create_word(
-                session,
+            dest[lem] = source_dict
+
+
+async def load_sentences(
+    session: AsyncSession,
+    book_raw: str | AsyncIterable[str],
+    book_id: int,
+    progress: Callable[[int], Awaitable[None]] | None = None,
+) -> tuple[dict, dict, dict, dict]:
+    """
+    Save book sentences and tag them in chunks in the tagging process pool. Only a few chunks per
+    process wait for tagging and their words are merged as soon as they are tagged. Progress is
+    awaited with number of saved sentences after every batch and commits it, see
+    split_to_sentences. Lemmas new to the tagging processes are saved in the lemma cache file
+    once, at the end.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_tagging_executor()
+    workers = settings.TAGGING_POOL_SIZE or os.cpu_count() or 1
+    slots = asyncio.Semaphore(2 * workers)
+    tagging_tasks = set()
+    pos_collections = {}, {}, {}, {}  # nouns, verbs, adverbs, adjectives
+    found_lemmas = {}
+
+    async def tag(chunk: list[tuple[int, str]]) -> None:
+        try:
+            chunk_collections, lemmas = await loop.run_in_executor(executor, tag_chunk, chunk)
+        finally:
+            slots.release()
+        for dest, source in zip(pos_collections, chunk_collections):
+            merge_word_clones(dest, source)
+        found_lemmas.update(lemmas)
+
+    async def submit(chunk: list[tuple[int, str]]) -> None:
+        await slots.acquire()
+        task = asyncio.create_task(tag(chunk))
+        tagging_tasks.add(task)
+        task.add_done_callback(tagging_tasks.discard)
+
+    chunk = []
+    try:
+        async for sentence in split_to_sentences(session, book_raw, book_id, progress=progress):
+            chunk.append((sentence.id, sentence.sentence))
+            if len(chunk) >= settings.TAGGING_CHUNK_SIZE:
+                await submit(chunk)
+                chunk = []
+
+        if chunk:
+            await submit(chunk)
+
+        await asyncio.gather(*tagging_tasks)
+    finally:
+        for task in list(tagging_tasks):
+            task.cancel()
+
+    if settings.LEMMA_CACHE_PATH and found_lemmas:
+        await asyncio.to_thread(save_lemma_cache, found_lemmas)
+    return pos_collections
+
+
+async def save_prepared_words(
+    session: AsyncSession,
+    dest: dict,
+    batch_size: int = settings.WORDS_BATCH_SIZE,
+    counts: dict[int, int] | None = None,
+    progress: Callable[[int], Awaitable[None]] | None = None,
+) -> None:
+    """
+    Save words and their relations to sentences. If counts is given, word counts are collected
+    there by word id instead of added to words, so they can be added at once with
+    add_word_counts. Progress is awaited with number of saved words after every batch.
+    """
+    # the same order of rows locked by upserts in concurrent jobs
+    word_dicts = sorted(dest.values(), key=lambda word_dict: word_dict["lem"])
+    for i in range(0, len(word_dicts), batch_size):
+        batch = word_dicts[i : i + batch_size]
+        word_ids = await upsert_words(
+            session,
+            [
                 WordCreate(
-                    count=word_dict["count"],
+                    count=0 if counts is not None else word_dict["count"],
                     declination=word_dict["declination"],
                     lem=word_dict["lem"],
                     pos=word_dict["pos"],
-                ),
-            )
-
-        if word_dict["sentence_ids"]:
-            await word_join_to_sentences(session, word.id, word_dict["sentence_ids"])
-        if word_dict["flashcard_ids"]:
-            for flashcard_id in word_dict["flashcard_ids"]:
-                await flashcard_join_to_sentences(session, flashcard_id, word_dict["sentence_ids"])
+                )
+                for word_dict in batch
+            ],
+        )
+        for word_dict in batch:
+            word_id = word_ids[(word_dict["lem"], word_dict["pos"])]
+            if counts is not None:
+                counts[word_id] = counts.get(word_id, 0) + word_dict["count"]
+            if word_dict["sentence_ids"]:
+                await word_join_to_sentences(session, word_id, word_dict["sentence_ids"])
+            if word_dict["flashcard_ids"]:
+                for flashcard_id in word_dict["flashcard_ids"]:
+                    await flashcard_join_to_sentences(
+                        session, flashcard_id, word_dict["sentence_ids"]
+                    )
+        if progress:
+            await progress(i + len(batch))
+
+
+async def process_next_ingestion_job(session: AsyncSession) -> IngestionJob | None:
+    """
+    Take the oldest queued ingestion job and load its book content. Return None if the queue is
+    empty. Content of failed job is kept and its sentences deleted, so the job can be queued
+    again. Word counts are added in the transaction which marks the job done, so a job loaded
+    again never counts its words twice.
+    """
+    job = await take_ingestion_job(session)
+    if not job:
+        return None
+    job_id, book_id, attempt = job.id, job.book_id, job.attempt
+    first_sentence_id = job.first_sentence_id
+
+    async def update_progress(sentences_processed: int) -> None:
+        job.sentences_processed = sentences_processed
+        await update_ingestion_job(session, job)
+
+    try:
+        book_chunks = get_ingestion_job_content(session, job_id)
+        pos_collections = await load_sentences(session, book_chunks, book_id, update_progress)
+        counts = {}
+        for dest in pos_collections:
+            words_saved = job.words_saved
+
+            async def update_words_saved(saved: int) -> None:
+                job.words_saved = words_saved + saved
+                await update_ingestion_job(session, job)
+
+            await save_prepared_words(session, dest, counts=counts, progress=update_words_saved)
+
+        book = await get_book(session, book_id)
+        book.sentences_count = await count_sentences_for_book(session, book_id)
+        book.words_count = await count_words_for_book(session, book_id)
+        session.add(book)
+        await add_word_counts(session, counts)
+        job.status = JOB_DONE
+        job.finished_at = now()
+        # counts, book and the job are committed together, unless the job was taken again
+        job = await update_ingestion_job(session, job)
+    except Exception as e:
+        await session.rollback()
+        job = await get_ingestion_job(session, job_id)
+        if job.attempt != attempt:
+            logger.warning(f"Ingestion job {job_id} was taken by another worker")
+            return job
+        logger.exception(f"Ingestion job {job_id} failed")
+        # chunks are kept to queue the job again, sentences saved so far are not
+        await delete_sentences_from(session, book_id, first_sentence_id)
+        job.status = JOB_FAILED
+        job.error = str(e)
+        job.first_sentence_id = None
+        job.finished_at = now()
+        return await update_ingestion_job(session, job)
+
+    await delete_ingestion_job_chunks(session, job_id)
+    return job
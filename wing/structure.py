@@ -1,3 +1,4 @@
+import functools
 from pathlib import Path
 from wing.config import settings
 
@@ -8,12 +9,49 @@ DEFAULT_BOOK_NR = 1
 DEFAULT_LINE_NR = 0
 
 SENTENCES_LIMIT = 10
-DETERMINERS = "the", "a", "an"
+DETERMINERS = frozenset({"the", "a", "an"})
+PARTICLES = frozenset({"to"})
+REFLEXIVES = frozenset(
+    {
+        "myself",
+        "yourself",
+        "himself",
+        "herself",
+        "itself",
+        "oneself",
+        "ourselves",
+        "yourselves",
+        "themselves",
+    }
+)
 
 
 PRONOUNS_FILE = Path(settings.NLTK_DATA_PREFIX).joinpath("corpora", "dolch", "pronouns")
-with open(PRONOUNS_FILE) as f:
-    PRONOUNS = (pronoun for pronoun in f.read().split())
+
+
+@functools.cache
+def load_pronouns() -> frozenset[str]:
+    """
+    Read Dolch pronouns on first use, importing the module doesn't need NLTK data
+    """
+    with open(PRONOUNS_FILE) as f:
+        return frozenset(pronoun.lower() for pronoun in f.read().split())
+
+
+@functools.cache
+def phrase_tables() -> tuple[dict[str, str], dict[str, str]]:
+    """
+    Map lowercase leading and trailing parts of two word phrases to pos of the other word,
+    ex. "to go" is a verb, "the house" is a noun, "enjoy oneself" is a verb.
+    """
+    leading = {}
+    # the first table wins for words in more than one
+    for words, pos in ((PARTICLES, "v"), (DETERMINERS, "n"), (load_pronouns(), "v")):
+        for word in words:
+            leading.setdefault(word, pos)
+    trailing = dict.fromkeys(REFLEXIVES, "v")
+    return leading, trailing
+
 
 MIN_LEM_WORD = 3
 MAX_STEM_OCCURRENCE = 100
@@ -0,0 +1,18 @@
+from wing.cache import MISSING, TTLCache
+
+
+def test_ttl_cache_pop():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("token", None)
+    assert "token" in cache
+    assert cache.pop("token") is None
+    assert "token" not in cache
+    assert cache.pop("token") is MISSING
+
+
+def test_ttl_cache_expired_value():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("token", "user", ttl=-1)
+    assert "token" not in cache
+    assert cache.pop("token") is MISSING
+    assert cache.get("token") is MISSING
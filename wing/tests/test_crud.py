@@ -1,12 +1,12 @@
-from unittest.mock import patch
-
-from fastapi_pagination.default import Params
-from fastapi_pagination.ext.sqlmodel import paginate
-
 import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
 
+from wing.crud.base import encode_cursor, keyset_paginate
 from wing.crud.book import delete_book, create_book, get_book, find_books, update_book
+from wing.crud.book_word import get_book_top_words
 from wing.crud.flashcard import (
     create_flashcard,
     get_flashcards_by_keyword,
@@ -17,16 +17,19 @@ from wing.crud.flashcard import (
     get_flashcard_words,
     flashcard_separate_words,
     delete_flashcard,
+    get_flashcards_for_study,
 )
 from wing.crud.sentence import (
     create_sentence,
+    create_sentences,
     get_sentence,
     delete_sentence,
     delete_sentences_by_book,
     get_sentences_with_phrase,
     get_sentences_for_flashcard,
+    phrase_keys,
 )
-from wing.crud.translation import create_translation, get_translation_by_word
+from wing.crud.translation import create_translation, get_translation_by_word, save_translation
 from wing.crud.user import (
     create_user,
     get_user,
@@ -36,16 +39,20 @@ from wing.crud.user import (
     update_user,
 )
 from wing.crud.word import (
+    count_words_for_book,
     create_word,
     delete_word,
     get_word,
     update_word,
+    upsert_words,
     get_sentence_ids_with_word,
     word_join_to_sentences,
+    word_join_to_sentences_by_user,
     find_synset,
     find_words,
     word_separate_sentences,
     get_word_sentences,
+    get_word_sentences_for_user,
     get_words,
 )
 from wing.models.book import Book, BookCreate, BookUpdate, BookFind
@@ -56,14 +63,6 @@ from wing.models.user import UserCreate, UserUpdate
 from wing.models.word import Word, WordCreate, WordUpdate, WordFind
 
 
-async def paginate_mock(*args, **kwargs):
-    """
-    Add params with `limit` and `offset` to paginate method.
-    """
-    args = *args, Params(limit=10, offset=3)
-    return await paginate(*args)
-
-
 @pytest.mark.asyncio
 async def test_create_user(session: AsyncSession):
     created_user = await create_user(
@@ -116,7 +115,6 @@ async def test_get_user_by_email_user_not_found(session: AsyncSession):
     assert result is None
 
 
-@patch("wing.crud.user.paginate", paginate_mock)
 @pytest.mark.asyncio
 async def test_get_user_flashcards(session: AsyncSession):
     user = await get_user_by_username(session, "anowak")
@@ -125,7 +123,6 @@ async def test_get_user_flashcards(session: AsyncSession):
     assert flashcard_list == [("well", ["studnia"]), ("dwarf", ["krasnal"])]
 
 
-@patch("wing.crud.book.paginate", paginate_mock)
 @pytest.mark.asyncio
 async def test_get_user_books(session: AsyncSession):
     user = await get_user_by_username(session, "anowak")
@@ -159,7 +156,6 @@ async def test_get_book(session: AsyncSession):
     assert book.author == "Virginia Woolf"
 
 
-@patch("wing.crud.book.paginate", paginate_mock)
 @pytest.mark.asyncio
 async def test_find_books(session: AsyncSession):
     books = [book for book in await find_books(session, BookFind(is_public=True))]
@@ -187,14 +183,11 @@ async def test_find_books(session: AsyncSession):
                 ),
             ],
         ),
-        ("total", 2),
-        ("page", 1),
         ("size", 50),
-        ("pages", 1),
+        ("next_cursor", None),
     ]
 
 
-@patch("wing.crud.book.paginate", paginate_mock)
 @pytest.mark.asyncio
 async def test_find_books_by_title(session: AsyncSession):
     books = [book for book in await find_books(session, BookFind(title="The Sign of the Four"))]
@@ -213,14 +206,11 @@ async def test_find_books_by_title(session: AsyncSession):
                 )
             ],
         ),
-        ("total", 1),
-        ("page", 1),
         ("size", 50),
-        ("pages", 1),
+        ("next_cursor", None),
     ]
 
 
-@patch("wing.crud.book.paginate", paginate_mock)
 @pytest.mark.asyncio
 async def test_update_book(session: AsyncSession):
     user = await get_user_by_username(session, "jkowalski")
@@ -293,7 +283,7 @@ async def test_get_sentences_for_flashcard(session: AsyncSession):
     user = await get_user(session, 1)
     book = await get_book(session, 1)
     flashcard = await get_flashcard(session, 6)
-    sentences = list(await get_sentences_for_flashcard(session, book.id, flashcard.id, user.id))
+    sentences = (await get_sentences_for_flashcard(session, book.id, flashcard.id, user.id)).items
     expected_sentence = await get_sentence(session, 1)
     assert sentences == [expected_sentence]
 
@@ -353,7 +343,7 @@ async def test_flashcard_join_to_sentence(session: AsyncSession):
     )
     await flashcard_join_to_sentences(session, flashcard.id, sentence_ids)
 
-    sentences = list(await get_sentences_for_flashcard(session, book.id, flashcard.id, user.id))
+    sentences = (await get_sentences_for_flashcard(session, book.id, flashcard.id, user.id)).items
     assert sentences == [
         Sentence(
             book_id=1,
@@ -526,13 +516,6 @@ async def test_find_words_by_lem_pos(session: AsyncSession):
             pos="n",
         ),
     )
-    await create_word(
-        session,
-        WordCreate(
-            lem="mildew",
-            pos="n",
-        ),
-    )
     await create_word(
         session,
         WordCreate(
@@ -542,7 +525,7 @@ async def test_find_words_by_lem_pos(session: AsyncSession):
     )
     result = await find_words(session, WordFind(lem="mildew", pos="n"))
     words = [word for word in result]
-    assert len(words) == 2
+    assert len(words) == 1
     assert words[0].lem == "mildew"
     assert words[0].pos == "n"
 
@@ -585,6 +568,27 @@ async def test_update_word(session: AsyncSession):
     assert updated_word.declination == {"VBN": "absorbed"}
 
 
+@pytest.mark.asyncio
+async def test_upsert_words(session: AsyncSession):
+    word_ids = await upsert_words(
+        session,
+        [
+            WordCreate(lem="canter", pos="n", count=2, declination={"NNS": "canters"}),
+            WordCreate(lem="gallop", pos="v", count=1, declination={"VBD": "galloped"}),
+        ],
+    )
+    assert len(word_ids) == 2
+    word_ids2 = await upsert_words(
+        session,
+        [WordCreate(lem="gallop", pos="v", count=3, declination={"VBG": "galloping"})],
+    )
+    assert word_ids2 == {("gallop", "v"): word_ids[("gallop", "v")]}
+    word = await get_word(session, word_ids[("gallop", "v")])
+    await session.refresh(word)
+    assert word.count == 4
+    assert word.declination == {"VBD": "galloped", "VBG": "galloping"}
+
+
 @pytest.mark.asyncio
 async def test_delete_word(session: AsyncSession):
     word = await create_word(session, WordCreate(lem="bait", pos="n"))
@@ -740,3 +744,199 @@ async def test_get_translation(session: AsyncSession):
     translation_db = await get_translation_by_word(session, "chapter")
     assert translation_db.word == "chapter"
     assert translation_db.definition == "/ˈʧæptə/ <N>\n  rozdział"
+
+
+@pytest.mark.asyncio
+async def test_create_sentences(session: AsyncSession):
+    user = await get_user_by_username(session, "jkowalski")
+    book = await create_book(
+        session,
+        BookCreate(
+            title="Jacob's Room",
+            author="Virginia Woolf",
+        ),
+        user.id,
+    )
+    created_sentences = await create_sentences(
+        session,
+        [
+            SentenceCreate(nr=nr, book_id=book.id, sentence=f"This is sentence number {nr}.")
+            for nr in range(5)
+        ],
+    )
+    assert [s.nr for s in created_sentences] == [0, 1, 2, 3, 4]
+    assert all(s.id is not None for s in created_sentences)
+    received_sentence = await get_sentence(session, created_sentences[3].id)
+    assert received_sentence.sentence == "This is sentence number 3."
+
+
+@pytest.mark.asyncio
+async def test_word_join_to_sentences_by_user(session: AsyncSession):
+    user1 = await get_user_by_username(session, "jkowalski")
+    user2 = await get_user_by_username(session, "anowak")
+    word = await create_word(session, WordCreate(lem="lantern", pos="n"))
+    sentence1 = await create_sentence(
+        session, SentenceCreate(book_id=4, nr=1, sentence="He lit the lantern.")
+    )
+    sentence2 = await create_sentence(
+        session, SentenceCreate(book_id=4, nr=2, sentence="The lantern went out.")
+    )
+    sentence3 = await create_sentence(
+        session, SentenceCreate(book_id=2, nr=1, sentence="A lantern of another user.")
+    )
+    await word_join_to_sentences(session, word.id, {sentence1.id})
+    await word_join_to_sentences_by_user(
+        session, word.id, {sentence1.id, sentence2.id, sentence3.id}, user1.id
+    )
+
+    results = list(await get_word_sentences(session, word.id))
+    assert sorted(s.id for s in results) == [sentence1.id, sentence2.id]
+    assert (await get_word_sentences_for_user(session, word.id, user2.id)).items == []
+
+
+@pytest.mark.asyncio
+async def test_get_sentences_with_phrase_ranked(session: AsyncSession):
+    sentences = await create_sentences(
+        session,
+        [
+            SentenceCreate(
+                book_id=4,
+                nr=101,
+                sentence="The old quartermaster hummed quietly to himself all night long.",
+            ),
+            SentenceCreate(book_id=4, nr=102, sentence="A quartermaster."),
+            SentenceCreate(book_id=4, nr=103, sentence="The quartermaster slept."),
+        ],
+    )
+    results = list(
+        await get_sentences_with_phrase(session, "quartermaster", book_id=4, ranked=True, limit=2)
+    )
+    # the shorter the sentence around the phrase, the more similar it is
+    assert [s.id for s in results] == [sentences[1].id, sentences[2].id]
+    results = list(await get_sentences_with_phrase(session, "quartermaster", book_id=4))
+    assert [s.id for s in results] == [s.id for s in sentences]
+
+
+@pytest.mark.asyncio
+async def test_save_translation(session: AsyncSession):
+    await save_translation(session, "lantern", "/ˈlæntən/ <N>\n  latarnia")
+    await save_translation(session, "lantern", "other definition")
+    translation_db = await get_translation_by_word(session, "lantern")
+    assert translation_db.definition == "/ˈlæntən/ <N>\n  latarnia"
+
+
+@pytest.mark.asyncio
+async def test_find_books_next_cursor(session: AsyncSession):
+    books, cursor = [], None
+    while True:
+        page = await find_books(session, BookFind(is_public=True), cursor=cursor, size=1)
+        books += page.items
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert books == (await find_books(session, BookFind(is_public=True))).items
+    with pytest.raises(HTTPException):
+        await find_books(session, BookFind(is_public=True), cursor="not a cursor")
+    with pytest.raises(HTTPException) as e:
+        await find_books(session, BookFind(is_public=True), cursor=encode_cursor([1.5]))
+    assert e.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_keyset_paginate_ranked(session: AsyncSession):
+    await create_sentences(
+        session,
+        [
+            SentenceCreate(book_id=4, nr=201, sentence="The boatswain piped all hands on deck."),
+            SentenceCreate(book_id=4, nr=202, sentence="The boatswain slept."),
+            SentenceCreate(book_id=4, nr=203, sentence="boatswain"),
+            SentenceCreate(book_id=4, nr=204, sentence="A boatswain."),
+            SentenceCreate(book_id=4, nr=205, sentence="boatswain"),
+        ],
+    )
+    query = select(Sentence).where(Sentence.book_id == 4, Sentence.sentence.icontains("boatswain"))
+    keys = phrase_keys("boatswain", ranked=True)
+    sentences, cursor = [], None
+    while True:
+        page = await keyset_paginate(session, query, keys, cursor, size=2)
+        sentences += page.items
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert [s.nr for s in sentences] == [203, 205, 204, 202, 201]
+    expected = await get_sentences_with_phrase(session, "boatswain", book_id=4, ranked=True)
+    assert [s.id for s in sentences] == [s.id for s in expected]
+    with pytest.raises(HTTPException) as e:
+        await keyset_paginate(session, query, keys, encode_cursor(["1.0", 203, 1]), size=2)
+    assert e.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_flashcards_for_study(session: AsyncSession):
+    statements = []
+
+    def count(*args):
+        statements.append(args)
+
+    engine = session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        page = await get_flashcards_for_study(session, book_id=1, user_id=1)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert len(statements) == 3
+    flashcards = {flashcard.id: flashcard for flashcard in page.items}
+    assert 1 in [sentence.id for sentence in flashcards[6].sentences]
+    assert all(sentence.book_id == 1 for f in page.items for sentence in f.sentences)
+
+    page = await get_flashcards_for_study(session, book_id=1, user_id=1, flashcard_ids=[6])
+    assert [flashcard.id for flashcard in page.items] == [6]
+
+    flashcard = await create_flashcard(
+        session, FlashcardCreate(user_id=1, keyword="voyage", translations=["podróż"]), 1
+    )
+    await flashcard_join_to_sentences(session, flashcard.id, {1, 2, 3})
+    page = await get_flashcards_for_study(
+        session, book_id=1, user_id=1, flashcard_ids=[flashcard.id], sentences_limit=2
+    )
+    [study] = page.items
+    assert [sentence.id for sentence in study.sentences] == [1, 2]
+    assert study.sentences_count == 3
+
+
+@pytest.mark.asyncio
+async def test_book_word_stats(session: AsyncSession):
+    user = await get_user_by_username(session, "jkowalski")
+    book = await create_book(
+        session, BookCreate(title="Moby Dick", author="Herman Melville"), user.id
+    )
+    sentences = await create_sentences(
+        session,
+        [SentenceCreate(book_id=book.id, nr=nr, sentence=f"Whale {nr}.") for nr in (1, 2, 3)],
+    )
+    whale = await create_word(session, WordCreate(pos="n", lem="whale"))
+    sea = await create_word(session, WordCreate(pos="n", lem="sea"))
+    await word_join_to_sentences(session, whale.id, {sentences[1].id, sentences[2].id})
+    # only the first sentence is new, the others are not counted twice
+    await word_join_to_sentences(session, whale.id, {sentence.id for sentence in sentences})
+    await word_join_to_sentences(session, sea.id, {sentences[2].id})
+
+    stats = await get_book_top_words(session, book.id, limit=10)
+    assert [(s.word.lem, s.occurrences, s.first_sentence_nr) for s in stats] == [
+        ("whale", 3, 1),
+        ("sea", 1, 3),
+    ]
+    assert await count_words_for_book(session, book.id) == 2
+
+    flashcard = await create_flashcard(
+        session, FlashcardCreate(keyword="whale", translations=["wieloryb"]), user.id
+    )
+    await flashcard_join_to_words(session, flashcard.id, {whale.id})
+    stats = await get_book_top_words(session, book.id, limit=10, unknown_for_user_id=user.id)
+    assert [s.word.lem for s in stats] == ["sea"]
+
+    await word_separate_sentences(session, whale.id, {sentences[0].id})
+    await delete_sentence(session, sentences[2].id)
+    stats = await get_book_top_words(session, book.id, limit=10)
+    assert [(s.word.lem, s.occurrences, s.first_sentence_nr) for s in stats] == [("whale", 1, 2)]
+    assert await count_words_for_book(session, book.id) == 1
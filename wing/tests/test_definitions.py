@@ -0,0 +1,101 @@
+import os
+import pickle
+from unittest.mock import patch
+
+from wing.definitions import Definitions, SynsetIndex
+from wing.models.word import WordFind
+
+BANK_SYNSETS = (
+    ("bank.n.01", "sloping land beside a body of water", "brzeg"),
+    ("bank.n.02", "a financial institution", "bank"),
+)
+
+
+def test_find_definition_from_index(tmp_path):
+    index_path = str(tmp_path / "synsets.sqlite")
+    assert SynsetIndex.build(index_path, [("bank", BANK_SYNSETS), ("pig", ())]) == 2
+    definitions = Definitions()
+    definitions.vocabulary = {"bank": "bank.n.02"}
+    definitions.load_index(index_path)
+
+    with patch("wing.definitions.wordnet_synsets") as wordnet_synsets:
+        response = definitions.find_definition(WordFind(lem="bank"), "I went to the bank.")
+        assert definitions.search_in_nltk("pig") == {"found": 0, "word": "pig", "synsets": []}
+    wordnet_synsets.assert_not_called()
+    assert response == {
+        "found": 1,
+        "word": "bank",
+        "synsets": [
+            (False, "bank.n.01", "sloping land beside a body of water"),
+            (True, "bank.n.02", "a financial institution"),
+        ],
+        "model_version": None,
+        "model_loaded_at": None,
+        "matched_synset": "bank.n.02",
+    }
+
+
+def test_synsets_cache():
+    definitions = Definitions(cache_size=1)
+    with patch("wing.definitions.wordnet_synsets", return_value=BANK_SYNSETS) as wordnet_synsets:
+        assert definitions.search_in_nltk("bank")["synsets"][1] == {
+            "name": "bank.n.02",
+            "definition": "a financial institution",
+            "pol": "bank",
+        }
+        definitions.search_in_nltk("bank")
+        definitions.search_in_nltk("banks")
+        definitions.search_in_nltk("bank")
+    assert wordnet_synsets.call_count == 3
+    assert definitions.cache_info() == {"hits": 1, "misses": 3, "size": 1, "maxsize": 1}
+
+
+def save_vocabulary(path, vocabulary):
+    # written next to the file and renamed, like a finished training does
+    with open(f"{path}.tmp", "wb") as f:
+        pickle.dump(vocabulary, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def test_vocabulary_reload(tmp_path):
+    vocabulary_path = str(tmp_path / "vocabulary.pkl")
+    definitions = Definitions()
+    definitions.load(vocabulary_path)
+    assert definitions.model_info()["version"] is None
+    save_vocabulary(vocabulary_path, {"bank": "bank.n.01"})
+    assert definitions.reload()
+    info = definitions.model_info()
+    assert info["path"] == vocabulary_path and info["lemmas"] == 1 and info["loaded_at"]
+
+    model = definitions.model
+    save_vocabulary(vocabulary_path, {"bank": "bank.n.02", "pig": "pig.n.01"})
+    assert definitions.reload()
+    assert not definitions.reload()
+    assert model.vocabulary == {"bank": "bank.n.01"}  # still usable by requests in progress
+    assert definitions.model_info()["version"] != info["version"]
+
+    with patch("wing.definitions.wordnet_synsets", return_value=BANK_SYNSETS):
+        response = definitions.find_definition(WordFind(lem="bank"), "I went to the bank.")
+    assert response["matched_synset"] == "bank.n.02"
+    assert response["model_version"] == definitions.model_info()["version"]
+    assert response["model_loaded_at"] == definitions.model_info()["loaded_at"]
+
+    with patch("wing.definitions.wordnet_synsets", return_value=()):
+        response = definitions.find_definition(WordFind(lem="river"), "By the river.")
+    assert response["found"] == 0
+    assert response["model_version"] == definitions.model_info()["version"]
+    assert response["model_loaded_at"] == definitions.model_info()["loaded_at"]
+
+    with open(vocabulary_path, "wb") as f:
+        f.write(pickle.dumps({"bank": "bank.n.01"})[:10])
+    assert not definitions.reload()
+    assert definitions.model_info()["lemmas"] == 2
+
+
+def test_vocabulary_loaded_on_first_use(tmp_path):
+    vocabulary_path = str(tmp_path / "vocabulary.pkl")
+    save_vocabulary(vocabulary_path, {"pig": "pig.n.01"})
+    definitions = Definitions(vocabulary_path=vocabulary_path)
+    assert definitions.model_info()["lemmas"] is None
+    assert "pig" in definitions.vocabulary
+    assert definitions.model_info()["lemmas"] == 1
@@ -1,20 +1,41 @@
 import pytest
-from unittest.mock import patch
 
-from wing.dictionary import find_translations
-
-from conftest import DictionaryClientMock
+from wing.config import settings
+from wing.dictionary import find_translations, find_translations_batch
 
 
 @pytest.mark.asyncio
-@patch("wing.dictionary.DictionaryClient", new=DictionaryClientMock)
-async def test_find_translations():
+async def test_find_translations(dictd_server):
     result = await find_translations("equivocal")
     assert result == "equivocal /ɪˈkwɪvəkəl/ <Adj>\n  dwuznaczny, niejednoznaczny"
 
 
 @pytest.mark.asyncio
-@patch("wing.dictionary.DictionaryClient", new=DictionaryClientMock)
-async def test_translations_not_found():
+async def test_translations_not_found(dictd_server):
     result = await find_translations("nonexisting")
     assert result is None
+
+
+@pytest.mark.asyncio
+async def test_find_translations_batch(dictd_server):
+    result = await find_translations_batch(["equivocal", "dot", "nonexisting", "dot"])
+    assert result == {
+        "equivocal": "equivocal /ɪˈkwɪvəkəl/ <Adj>\n  dwuznaczny, niejednoznaczny",
+        "dot": "dot <N>\n.\n  kropka",
+        "nonexisting": None,
+    }
+    assert dictd_server.connections == 1
+    assert len(dictd_server.commands) == 3
+
+
+@pytest.mark.asyncio
+async def test_find_translations_cached(dictd_server):
+    await find_translations("equivocal")
+    await find_translations("nonexisting")
+    assert await find_translations("equivocal") is not None
+    assert await find_translations("nonexisting") is None
+    assert dictd_server.commands == [
+        f'DEFINE {settings.DICTIONARY_VOCABULARY} "equivocal"',
+        f'DEFINE {settings.DICTIONARY_VOCABULARY} "nonexisting"',
+    ]
+    assert dictd_server.connections == 1
@@ -1,10 +1,21 @@
+
 from unittest.mock import patch
 
 import pytest
+from sqlalchemy import func, select, update
 
-from conftest import BaseTestRouter, DictionaryClientMock
+from conftest import BaseTestRouter
 
 from api.routes.v2 import router as api_router
+from wing.auth.cache import user_cache
+from wing.config import settings
+from wing.crud.ingestion_job import take_ingestion_job, update_ingestion_job
+from wing.crud.sentence import count_sentences_for_book
+from wing.crud.word import count_words_for_book
+from wing.crud.user import get_user
+from wing.models.ingestion_job import IngestionJob
+from wing.models.word import Word
+from wing.processing import process_next_ingestion_job
 
 BOOK_RAW = """As the streets that lead from the Strand to the Embankment are very narrow, it is
 better not to walk down them arm-in-arm. If you persist, lawyers’ clerks will have to make flying
@@ -65,9 +76,10 @@ class TestBookRouter(BaseTestRouter):
     async def test_get_root(self, client):
         response = await client.get("/")
         assert response.status_code == 200
+        assert response.json()["vocabulary"].keys() == {"path", "version", "loaded_at", "lemmas"}
 
     async def test_get_books(self, client):
-        response = await client.get("/api/v2/books/public?page=1&size=50")
+        response = await client.get("/api/v2/books/public?size=50")
         assert response.status_code == 200
         books = response.json()
         assert books == {
@@ -91,12 +103,24 @@ class TestBookRouter(BaseTestRouter):
                     "words_count": 0,
                 },
             ],
-            "page": 1,
-            "pages": 1,
             "size": 50,
-            "total": 2,
+            "next_cursor": None,
         }
 
+    async def test_get_books_next_cursor(self, client):
+        response = await client.get("/api/v2/books/public", params={"size": 1})
+        page = response.json()
+        assert [book["id"] for book in page["items"]] == [1]
+        response = await client.get(
+            "/api/v2/books/public", params={"size": 1, "cursor": page["next_cursor"]}
+        )
+        page = response.json()
+        assert [book["id"] for book in page["items"]] == [3]
+        assert page["next_cursor"] is None
+
+        response = await client.get("/api/v2/books/public", params={"cursor": "invalid"})
+        assert response.status_code == 400
+
     async def test_get_book(self, client):
         await owner(client)
         response = await client.get(f"/api/v2/books/1")
@@ -126,14 +150,29 @@ class TestBookRouter(BaseTestRouter):
         assert data["author"] == "Artur Conan Doyle"
         assert isinstance(data["id"], int)
 
-    async def test_upload_book(self, client):
+    async def test_upload_book(self, client, session):
         await owner(client)
         response = await client.post(
             "/api/v2/books/upload/1",
             files={"file": ("The_Voyage_Out.txt", BOOK_RAW.encode(), "text/plain")},
         )
+        assert response.status_code == 202
+        job = response.json()
+        assert job["book_id"] == 1
+        assert job["status"] == "queued"
+        assert "content" not in job
+
+        await process_next_ingestion_job(session)
+
+        response = await client.get(f"/api/v2/jobs/{job['id']}")
         assert response.status_code == 200
+        job = response.json()
+        assert job["status"] == "done"
+        assert job["sentences_processed"] > 0
+        assert job["words_saved"] > 0
+        assert job["elapsed_seconds"] >= 0
 
+        response = await client.get("/api/v2/books/1")
         data = response.json()
         assert data == {
             "author": "Virginia Woolf",
@@ -145,6 +184,151 @@ class TestBookRouter(BaseTestRouter):
             "words_count": 201,
         }
 
+    async def test_upload_book_not_utf8(self, client, session):
+        await owner(client)
+        response = await client.post(
+            "/api/v2/books/upload/1",
+            files={"file": ("The_Voyage_Out.txt", BOOK_RAW.encode("utf-16"), "text/plain")},
+        )
+        assert response.status_code == 400
+
+        assert (await process_next_ingestion_job(session)) is None
+
+    async def test_upload_book_storage_error(self, client, session):
+        await owner(client)
+        with patch(
+            "api.routes.v2.book.add_ingestion_job_chunk", side_effect=RuntimeError("disk full")
+        ):
+            with pytest.raises(RuntimeError):
+                await client.post(
+                    "/api/v2/books/upload/1",
+                    files={"file": ("The_Voyage_Out.txt", BOOK_RAW.encode(), "text/plain")},
+                )
+
+        response = await session.execute(
+            select(func.count()).select_from(IngestionJob).where(IngestionJob.book_id == 1)
+        )
+        assert response.scalar_one() == 1
+
+    async def test_get_job_of_other_user(self, client):
+        await client_anowak(client)
+        response = await client.get("/api/v2/jobs/1")
+        assert response.status_code == 404
+
+    async def test_retry_failed_job(self, client, session):
+        await owner(client)
+        response = await client.post(
+            "/api/v2/books/", json={"author": "Virginia Woolf", "title": "Night and Day"}
+        )
+        book_id = response.json()["id"]
+
+        async def upload() -> int:
+            response = await client.post(
+                f"/api/v2/books/upload/{book_id}",
+                files={"file": ("Night_and_Day.txt", BOOK_RAW.encode(), "text/plain")},
+            )
+            return response.json()["id"]
+
+        async def embankment_count() -> int:
+            query = select(Word.count).where(Word.lem == "embankment", Word.pos == "n")
+            return (await session.execute(query)).scalar_one()
+
+        job_id = await upload()
+        count = await embankment_count()
+        # fails after the words and their relations are saved
+        with patch("wing.processing.count_words_for_book", side_effect=RuntimeError("disk full")):
+            await process_next_ingestion_job(session)
+
+        response = await client.get(f"/api/v2/jobs/{job_id}")
+        job = response.json()
+        assert job["status"] == "failed"
+        assert job["error"] == "disk full"
+        assert await count_sentences_for_book(session, book_id) == 0
+        assert await count_words_for_book(session, book_id) == 0
+        assert await embankment_count() == count
+
+        response = await client.post(f"/api/v2/jobs/{job_id}/retry")
+        assert response.status_code == 202
+        assert response.json()["status"] == "queued"
+
+        job = await process_next_ingestion_job(session)
+        assert job.id == job_id
+        assert job.status == "done"
+        assert job.error is None
+        assert await count_sentences_for_book(session, book_id) == 26
+        count_per_upload = await embankment_count() - count
+        assert count_per_upload > 0
+
+        response = await client.post(f"/api/v2/jobs/{job_id}/retry")
+        assert response.status_code == 409
+
+        # failure of the next upload removes only its own sentences
+        await upload()
+        with patch("wing.processing.save_prepared_words", side_effect=RuntimeError("disk full")):
+            job = await process_next_ingestion_job(session)
+        assert job.status == "failed"
+        assert await count_sentences_for_book(session, book_id) == 26
+        assert await embankment_count() == count + count_per_upload
+
+    async def test_take_stale_running_job(self, client, session):
+        await owner(client)
+        response = await client.post(
+            "/api/v2/books/", json={"author": "Virginia Woolf", "title": "Jacob's Room"}
+        )
+        book_id = response.json()["id"]
+        response = await client.post(
+            f"/api/v2/books/upload/{book_id}",
+            files={"file": ("Jacobs_Room.txt", BOOK_RAW.encode(), "text/plain")},
+        )
+        job_id = response.json()["id"]
+
+        job = await take_ingestion_job(session)
+        assert job.id == job_id
+        assert job.attempt == 1
+        assert await take_ingestion_job(session) is None
+
+        job = await take_ingestion_job(session, timeout=0)
+        assert job.id == job_id
+        assert job.status == "running"
+        assert job.attempt == 2
+        assert (await process_next_ingestion_job(session)) is None
+
+        job.status = "queued"
+        await update_ingestion_job(session, job)
+        job = await process_next_ingestion_job(session)
+        assert job.status == "done"
+
+    async def test_job_taken_by_other_worker(self, client, session):
+        await owner(client)
+        response = await client.post(
+            "/api/v2/books/", json={"author": "Virginia Woolf", "title": "The Waves"}
+        )
+        book_id = response.json()["id"]
+        response = await client.post(
+            f"/api/v2/books/upload/{book_id}",
+            files={"file": ("The_Waves.txt", BOOK_RAW.encode(), "text/plain")},
+        )
+        job_id = response.json()["id"]
+
+        async def take_meanwhile(*args, **kwargs):
+            # the other worker found the job stale and took it
+            await session.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == job_id, IngestionJob.attempt == 1)
+                .values(attempt=2)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+        with patch("wing.processing.save_prepared_words", side_effect=take_meanwhile):
+            job = await process_next_ingestion_job(session)
+
+        assert job.attempt == 2
+        assert job.status == "running"
+        assert job.error is None
+        # the sentences are cleaned up by the worker which took the job
+        assert await count_sentences_for_book(session, book_id) == 26
+
     async def test_update_book(self, client):
         await owner(client)
         response = await client.put(
@@ -314,6 +498,28 @@ class TestWordRouter(BaseTestRouter):
 
         assert result == expected
 
+    async def test_find_definitions(self, client):
+        await owner(client)
+        queries = [{"word_id": 4, "sentence_id": 3}, {"word_id": 100000, "sentence_id": 3}]
+        response = await client.post("/api/v2/words/synsets", json=queries)
+        assert response.status_code == 200
+
+        found, missing = response.json()
+        assert found["word"]["id"] == 4
+        assert found["errorMessage"] == ""
+        assert [synset[1] for synset in found["synsets"]] == ["brooch.n.01", "brooch.v.01"]
+        assert missing == {}
+
+        response = await client.post(
+            "/api/v2/words/synsets", json=queries[:1] * (settings.MAX_PAGE_SIZE + 1)
+        )
+        assert response.status_code == 422
+
+        # sentences of other users aren't classified
+        await client_anowak(client)
+        response = await client.post("/api/v2/words/synsets", json=queries)
+        assert response.json() == [{}, {}]
+
     async def test_find_words(self, client):
         response = await client.get(
             "/api/v2/words/find/chapter",
@@ -421,7 +627,7 @@ class TestFlashcardRouter(BaseTestRouter):
         assert response2.status_code == 200
         data = response2.json()
 
-        assert data == [
+        assert data["items"] == [
             {
                 "book_id": 1,
                 "id": 1,
@@ -478,6 +684,22 @@ class TestFlashcardRouter(BaseTestRouter):
             }
         ]
 
+    async def test_get_flashcards_for_study(self, client):
+        await owner(client)
+        response = await client.get("/api/v2/books/1/flashcards/study", params={"ids": [1]})
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["next_cursor"] is None
+        [flashcard] = data["items"]
+        assert flashcard["id"] == 1
+        assert [word["lem"] for word in flashcard["words"]] == ["chapter"]
+        assert [sentence["id"] for sentence in flashcard["sentences"]] == [1]
+        assert flashcard["sentences_count"] == 1
+
+        response = await client.get("/api/v2/books/2/flashcards/study")
+        assert response.status_code == 404
+
 
 @pytest.mark.asyncio
 class TestSentenceRouter(BaseTestRouter):
@@ -488,7 +710,7 @@ class TestSentenceRouter(BaseTestRouter):
         response = await client.get("/api/v2/sentences/search", params={"q": "stress"})
         assert response.status_code == 200
         data = response.json()
-        assert data == [
+        assert data["items"] == [
             {
                 "book_id": 1,
                 "id": 1,
@@ -557,7 +779,7 @@ class TestUserRouter(BaseTestRouter):
 
     async def test_get_user_flashcards(self, client):
         await client_anowak(client)
-        response = await client.get("/api/v2/users/flashcards?page=1&size=10")
+        response = await client.get("/api/v2/users/flashcards?size=10")
         assert response.status_code == 200
 
         data = response.json()
@@ -566,15 +788,13 @@ class TestUserRouter(BaseTestRouter):
                 {"id": 4, "keyword": "well", "translations": ["studnia"], "user_id": 2},
                 {"id": 5, "keyword": "dwarf", "translations": ["krasnal"], "user_id": 2},
             ],
-            "page": 1,
-            "pages": 1,
             "size": 10,
-            "total": 2,
+            "next_cursor": None,
         }
 
     async def test_get_user_books(self, client):
         await client_anowak(client)
-        response = await client.get("/api/v2/users/books?page=1&size=20")
+        response = await client.get("/api/v2/users/books?size=20")
         assert response.status_code == 200
 
         data = response.json()
@@ -599,10 +819,8 @@ class TestUserRouter(BaseTestRouter):
                     "words_count": 0,
                 },
             ],
-            "page": 1,
-            "pages": 1,
             "size": 20,
-            "total": 2,
+            "next_cursor": None,
         }
 
     async def test_get_user(self, client):
@@ -635,13 +853,31 @@ class TestUserRouter(BaseTestRouter):
         assert data["last_name"] == "Kupicki"
         assert isinstance(data["id"], int)
 
+    async def test_current_user_cached(self, client):
+        user_cache.clear()
+        await client_logged_in(client, "jkowalski", "secret")
+        with patch("wing.auth.jwthandler.get_user", wraps=get_user) as get_user_mock:
+            for _ in range(3):
+                response = await client.get("/api/v2/users/whoami")
+                assert response.json()["username"] == "jkowalski"
+            assert get_user_mock.call_count == 1
+
+            user = {"username": "jkowalski", "first_name": "Jan"}
+            response = await client.put("/api/v2/users/1", json=user)
+            assert response.status_code == 200
+            assert get_user_mock.call_count == 1
+            response = await client.get("/api/v2/users/whoami")
+            assert response.json()["first_name"] == "Jan"
+            assert get_user_mock.call_count == 2
+        await client.put("/api/v2/users/1", json={"username": "jkowalski", "first_name": None})
+
 
 @pytest.mark.asyncio
-@patch("wing.dictionary.DictionaryClient", new=DictionaryClientMock)
+@pytest.mark.usefixtures("dictd_server")
 class TestDictionaryRouter(BaseTestRouter):
     router = api_router
 
-    async def test_get_translation(self, client):
+    async def test_get_translation(self, client, translation_lookup):
         response = await client.get(f"/api/v2/translation/dict/equivocal")
         assert response.status_code == 200
         assert response.json() == {
@@ -649,6 +885,24 @@ class TestDictionaryRouter(BaseTestRouter):
             "definition": "equivocal /ɪˈkwɪvəkəl/ <Adj>\n  dwuznaczny, niejednoznaczny",
         }
 
+    async def test_get_translation_written_back(self, client, translation_lookup, dictd_server):
+        response = await client.get(f"/api/v2/translation/dict/dot")
+        assert response.status_code == 200
+        await translation_lookup.flush()
+
+        response = await client.get(f"/api/v2/translation/find/dot")
+        assert response.status_code == 200
+        assert response.json()["definition"] == "dot <N>\n.\n  kropka"
+
+        response = await client.get(f"/api/v2/translation/dict/nonexisting")
+        assert response.status_code == 404
+        response = await client.get(f"/api/v2/translation/dict/nonexisting")
+        assert response.status_code == 404
+        assert dictd_server.commands == [
+            f'DEFINE {settings.DICTIONARY_VOCABULARY} "dot"',
+            f'DEFINE {settings.DICTIONARY_VOCABULARY} "nonexisting"',
+        ]
+
 
 @pytest.mark.asyncio
 class TestTranslationRouter(BaseTestRouter):
@@ -0,0 +1,45 @@
+from wing.lemmatization import LemmaCache
+
+
+def find_lemma_mock(word_str: str, pos: str) -> str:
+    return word_str.rstrip("s")
+
+
+def test_lemma_cache_counters():
+    cache = LemmaCache(find_lemma_mock, maxsize=10)
+    assert cache.get("dogs", "n") == "dog"
+    assert cache.get("dogs", "n") == "dog"
+    assert cache.lemmatize("dogs", "v") == "dog"
+    assert cache.info() == {"hits": 1, "misses": 2, "size": 2, "maxsize": 10}
+
+
+def test_lemma_cache_evicts_least_recently_used():
+    cache = LemmaCache(find_lemma_mock, maxsize=2)
+    cache.get("cats", "n")
+    cache.get("dogs", "n")
+    cache.get("cats", "n")
+    cache.get("owls", "n")
+    assert list(cache.lemmas) == [("cats", "n"), ("owls", "n")]
+
+
+def test_lemma_cache_save_and_load(tmp_path):
+    cache_path = str(tmp_path / "lemmas.pkl")
+    cache = LemmaCache(find_lemma_mock, maxsize=10)
+    cache.get("dogs", "n")
+    cache.save(cache_path)
+
+    warm_cache = LemmaCache(find_lemma_mock, maxsize=10)
+    warm_cache.load(cache_path)
+    assert warm_cache.get("dogs", "n") == "dog"
+    assert warm_cache.info()["hits"] == 1
+
+
+def test_lemma_cache_take_found_and_update():
+    cache = LemmaCache(find_lemma_mock, maxsize=2)
+    cache.get("dogs", "n")
+    cache.get("dogs", "n")
+    assert cache.take_found() == {("dogs", "n"): "dog"}
+    assert cache.take_found() == {}
+
+    cache.update({("cats", "n"): "cat", ("owls", "n"): "owl"})
+    assert list(cache.lemmas) == [("cats", "n"), ("owls", "n")]
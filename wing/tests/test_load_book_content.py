@@ -1,15 +1,32 @@
+import io
+import threading
+import time
+from types import SimpleNamespace
 from typing import Coroutine
 
+import nltk
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from wing import processing
+from wing.config import settings
+
 from wing.crud.book import create_book, get_book
 from wing.crud.sentence import create_sentence, count_sentences_for_book
 from wing.crud.user import get_user_by_username
 from wing.crud.word import count_words_for_book
+from wing.lemmatization import LemmaCache
 from wing.models.book import BookCreate
 from wing.models.sentence import SentenceCreate
-from wing.processing import load_sentences, save_prepared_words
+from wing.processing import (
+    load_sentences,
+    merge_word_clones,
+    read_upload_chunks,
+    save_prepared_words,
+    split_to_sentences,
+    stream_sentences,
+    tag_sentences,
+)
 
 BOOK_RAW1 = """
 CHAPTER I
@@ -36,6 +53,53 @@ async def test_load_sentences(session: AsyncSession):
     }
 
 
+@pytest.mark.asyncio
+async def test_split_to_sentences_in_batches(session: AsyncSession):
+    book = await get_book(session, 3)
+    sentences = [s async for s in split_to_sentences(session, BOOK_RAW1, book.id, batch_size=4)]
+    assert len(sentences) == 20
+    assert all(s.id is not None for s in sentences)
+    assert [s.nr for s in sentences] == sorted(s.nr for s in sentences)
+    assert not any(s.sentence.lower().startswith("chapter ") for s in sentences)
+
+
+async def book_chunks(book_raw: str, chunk_size: int):
+    for i in range(0, len(book_raw), chunk_size):
+        yield book_raw[i : i + chunk_size]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_size", [50, 333, 4096])
+async def test_stream_sentences(chunk_size):
+    sentences = [s async for s in stream_sentences(book_chunks(BOOK_RAW1, chunk_size))]
+    assert sentences == nltk.sent_tokenize(BOOK_RAW1)
+
+
+class UploadFileMock:
+    def __init__(self, content: bytes):
+        self.file = io.BytesIO(content)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self.file.read(size)
+
+
+@pytest.mark.asyncio
+async def test_read_upload_chunks():
+    content = "Zażółć gęślą jaźń — “quoted”. " * 10
+    chunks = [c async for c in read_upload_chunks(UploadFileMock(content.encode()), 7)]
+    assert "".join(chunks) == content
+
+
+def test_tag_sentences_in_chunks():
+    sentences = list(enumerate(nltk.sent_tokenize(BOOK_RAW1)))
+    expected = tag_sentences(sentences)
+    pos_collections = {}, {}, {}, {}
+    for i in range(0, len(sentences), 3):
+        for dest, source in zip(pos_collections, tag_sentences(sentences[i : i + 3])):
+            merge_word_clones(dest, source)
+    assert pos_collections == expected
+
+
 PREPARED_WORDS = {
     "animal": {
         "count": 5,
@@ -110,3 +174,71 @@ async def test_count_sentences_and_words(session: AsyncSession):
 
     assert sentences_count == 21
     assert words_count == 226
+
+
+@pytest.mark.asyncio
+async def test_load_sentences_limits_chunks_in_flight(monkeypatch):
+    in_flight = []
+    max_in_flight = []
+    lock = threading.Lock()
+
+    async def split(session, book_raw, book_id, progress=None):
+        for sentence_id in range(20):
+            yield SimpleNamespace(id=sentence_id, sentence=f"Sentence {sentence_id}.")
+
+    def tag(chunk):
+        with lock:
+            in_flight.append(chunk)
+            max_in_flight.append(len(in_flight))
+        time.sleep(0.01)
+        with lock:
+            in_flight.remove(chunk)
+        [(sentence_id, _)] = chunk
+        word = {"lem": "sentence", "count": 1, "declination": {}, "flashcard_ids": set()}
+        return {"sentence": {**word, "sentence_ids": {sentence_id}}}, {}, {}, {}
+
+    monkeypatch.setattr(processing, "split_to_sentences", split)
+    monkeypatch.setattr(processing, "tag_sentences", tag)
+    monkeypatch.setattr(processing, "get_tagging_executor", lambda: None)
+    monkeypatch.setattr(settings, "TAGGING_POOL_SIZE", 1)
+    monkeypatch.setattr(settings, "TAGGING_CHUNK_SIZE", 1)
+
+    nouns, verbs, adverbs, adjectives = await load_sentences(None, "", 1)
+
+    assert max(max_in_flight) <= 2
+    assert nouns["sentence"]["count"] == 20
+    assert nouns["sentence"]["sentence_ids"] == set(range(20))
+
+
+@pytest.mark.asyncio
+async def test_load_sentences_saves_lemma_cache_once(monkeypatch, tmp_path):
+    cache_path = str(tmp_path / "lemmas.pkl")
+    saves = []
+
+    async def split(session, book_raw, book_id, progress=None):
+        for sentence_id, word_str in enumerate(["dogs", "cats", "owls"]):
+            yield SimpleNamespace(id=sentence_id, sentence=word_str)
+
+    def tag(chunk):
+        [(_, word_str)] = chunk
+        return ({}, {}, {}, {}), {(word_str, "n"): word_str[:-1]}
+
+    def save(path):
+        saves.append(path)
+        LemmaCache.save(cache, path)
+
+    cache = LemmaCache(lambda word_str, pos: None, maxsize=10)
+    monkeypatch.setattr(cache, "save", save)
+    monkeypatch.setattr(processing, "morphy_cache", cache)
+    monkeypatch.setattr(processing, "split_to_sentences", split)
+    monkeypatch.setattr(processing, "tag_chunk", tag)
+    monkeypatch.setattr(processing, "get_tagging_executor", lambda: None)
+    monkeypatch.setattr(settings, "TAGGING_CHUNK_SIZE", 1)
+    monkeypatch.setattr(settings, "LEMMA_CACHE_PATH", cache_path)
+
+    await load_sentences(None, "", 1)
+
+    assert saves == [cache_path]
+    warm_cache = LemmaCache(lambda word_str, pos: None, maxsize=10)
+    warm_cache.load(cache_path)
+    assert warm_cache.lemmas == {("dogs", "n"): "dog", ("cats", "n"): "cat", ("owls", "n"): "owl"}
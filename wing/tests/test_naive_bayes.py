@@ -0,0 +1,90 @@
+import random
+
+import nltk
+import pytest
+from nltk.classify import accuracy
+
+from wing.definition_feature_functions import word_definition_features
+from wing.models.word import WordFind
+from wing.naive_bayes import NaiveBayesModel, is_model_file, save_model
+
+SYNSETS = ["bank.n.01", "bank.n.02", "bank.v.01"]
+CONTEXT = {
+    "bank.n.01": ["river", "water", "sloping", "grass", "fish"],
+    "bank.n.02": ["money", "account", "loan", "deposit", "cash"],
+    "bank.v.01": ["plane", "turn", "wing", "steeply", "pilot"],
+}
+COMMON = ["the", "a", "of", "he", "she", "was", "None", None]
+
+
+def featuresets(number: int, seed: int) -> list[tuple[dict, str]]:
+    generator = random.Random(seed)
+    result = []
+    for _ in range(number):
+        synset = generator.choice(SYNSETS)
+        words = CONTEXT[synset] + COMMON + [f"rare{generator.randint(0, 300)}"]
+        features = {}
+        for i in range(1, 6):
+            for side in ("before", "after"):
+                if generator.random() < 0.8:
+                    features[f"{side}_{i}"] = generator.choice(words)
+        if generator.random() < 0.1:
+            features["unknown_feature"] = "x"
+        result.append((features, synset))
+    return result
+
+
+@pytest.fixture
+def classifiers() -> dict:
+    train_set = featuresets(300, seed=1)
+    return {
+        "bank": nltk.NaiveBayesClassifier.train(train_set),
+        "pig": "pig.n.01",
+    }
+
+
+def test_model_parity(tmp_path, classifiers):
+    model_path = str(tmp_path / "vocabulary.nb")
+    save_model(model_path, classifiers)
+    assert is_model_file(model_path)
+    model = NaiveBayesModel(model_path)
+    assert "bank" in model and "pig" in model and "dog" not in model
+    assert model["pig"] == "pig.n.01"
+
+    test_set = featuresets(500, seed=2) + [({}, "bank.n.01"), ({"after_9": "river"}, "bank.n.01")]
+    classifier = classifiers["bank"]
+    expected = [classifier.classify(features) for features, _ in test_set]
+    received = model["bank"].classify_many([features for features, _ in test_set])
+    assert received == expected
+    assert accuracy(model["bank"], test_set) == accuracy(classifier, test_set)
+    assert model["bank"].classify(test_set[0][0]) == expected[0]
+
+
+def test_model_classify_many(tmp_path, classifiers):
+    model_path = str(tmp_path / "vocabulary.nb")
+    save_model(model_path, classifiers)
+    model = NaiveBayesModel(model_path)
+    pairs = [
+        ("He sat on the bank of the river and watched the water.", WordFind(lem="bank")),
+        ("The pig was asleep.", WordFind(lem="pig")),
+        ("The dog was asleep.", WordFind(lem="dog")),
+        ("She put the money in the bank account.", WordFind(lem="bank")),
+    ]
+    results = model.classify_many(pairs)
+    assert results[1:3] == ["pig.n.01", None]
+    for i in (0, 3):
+        sentence, word = pairs[i]
+        features = word_definition_features(sentence, word)
+        assert results[i] == classifiers["bank"].classify(features)
+
+
+def test_save_model_keeps_loaded_model(tmp_path, classifiers):
+    model_path = str(tmp_path / "vocabulary.nb")
+    save_model(model_path, classifiers)
+    model = NaiveBayesModel(model_path)
+    # classifiers streamed as pairs, e.g. from a training checkpoint
+    save_model(model_path, iter([("pig", "pig.n.02")]))
+    assert model["pig"] == "pig.n.01"
+    assert "bank" in model and model["bank"].classify({"after_1": "river"})
+    assert NaiveBayesModel(model_path)["pig"] == "pig.n.02"
+    assert [path.name for path in tmp_path.iterdir()] == ["vocabulary.nb"]
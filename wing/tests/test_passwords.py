@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
+from unittest.mock import patch
+
+from wing.auth.passwords import PasswordHasher
+from wing.auth.user import validate_user
+from wing.crud.user import get_user_by_username
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify():
+    hasher = PasswordHasher(rounds=4)
+    password_hash = await hasher.hash("secret")
+    assert password_hash.startswith("$2b$04$")
+    assert await hasher.verify_and_update("secret", password_hash) == (True, None)
+    assert await hasher.verify_and_update("wrong", password_hash) == (False, None)
+
+    valid, new_hash = await PasswordHasher(rounds=5).verify_and_update("secret", password_hash)
+    assert valid and new_hash.startswith("$2b$05$")
+    assert hasher.metrics()["calls"] == 3
+
+
+@pytest.mark.asyncio
+async def test_event_loop_not_blocked():
+    hasher = PasswordHasher(rounds=10, workers=1)
+    delays = []
+
+    async def ticker():
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            delays.append(time.perf_counter() - start)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.gather(*(hasher.hash("secret") for _ in range(4)))
+    task.cancel()
+    assert len(delays) > 4
+    assert max(delays) < 0.05
+    metrics = hasher.metrics()
+    assert metrics["calls"] == 4 and metrics["waiting"] == 0
+    assert metrics["wait_max"] > 0
+
+
+@pytest.mark.asyncio
+async def test_queue_limit():
+    hasher = PasswordHasher(rounds=8, workers=1, queue_size=1)
+    results = await asyncio.gather(
+        *(hasher.hash("secret") for _ in range(3)), return_exceptions=True
+    )
+    assert isinstance(results[0], str) and isinstance(results[1], str)
+    assert isinstance(results[2], HTTPException) and results[2].status_code == 503
+    assert hasher.metrics()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rehash_on_login(session: AsyncSession):
+    form = OAuth2PasswordRequestForm(username="jkowalski", password="secret")
+    with patch("wing.auth.user.password_hasher", PasswordHasher(rounds=5)):
+        await validate_user(form, session)
+    user = await get_user_by_username(session, "jkowalski")
+    assert user.password.startswith("$2b$05$")
+
+    await validate_user(form, session)
+    assert (await get_user_by_username(session, "jkowalski")).password.startswith("$2b$12$")
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from wing.crud.flashcard import get_flashcards_by_keyword
+from wing.crud.translation import get_translation_by_word, save_translation
+from wing.crud.user import get_user_by_username
+from wing.models.translation import SOURCE_PONS
+from wing.pons import (
+    PonsClient,
+    PonsError,
+    PonsForbidden,
+    RateLimiter,
+    flashcard_rows,
+    import_translations,
+    parse_definition,
+)
+from wing.processing import load_translations_content
+
+
+def pons_response(word: str, targets: list[str]) -> list[dict]:
+    translations = [
+        {"source": f'<strong class="headword">{word}</strong>', "target": target}
+        for target in targets
+    ]
+    return [{"lang": "en", "hits": [{"roms": [{"arabs": [{"translations": translations}]}]}]}]
+
+
+class PonsStub:
+    """
+    HTTP server answering like PONS API, the first requests for words in failures get 504,
+    all requests get 403 when forbidden
+    """
+
+    translations = {
+        "post": ["poczta", "korespondencja"],
+        "harbour": ["port"],
+    }
+
+    def __init__(self, failures: dict[str, int] | None = None):
+        self.failures = failures or {}
+        self.forbidden = False
+        self.requests = []
+        self.connections = 0
+        self.server = None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        while request_line := await reader.readline():
+            while (await reader.readline()).strip():
+                pass  # skip headers
+            word = parse_qs(urlsplit(request_line.split()[1].decode()).query)["q"][0]
+            self.requests.append(word)
+            if self.forbidden:
+                status, body = "403 Forbidden", b""
+            elif self.failures.get(word):
+                self.failures[word] -= 1
+                status, body = "504 Gateway Timeout", b""
+            elif word in self.translations:
+                status = "200 OK"
+                body = json.dumps(pons_response(word, self.translations[word])).encode()
+            else:
+                status, body = "204 No Content", b""
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        writer.close()
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/v1/dictionary"
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+@pytest_asyncio.fixture
+async def pons_stub():
+    stub = PonsStub(failures={"post": 2})
+    api_url = await stub.start()
+    client = PonsClient(api_url=api_url, concurrency=2, rate=100, retries=2, backoff=0.01)
+    yield stub, client
+    await client.close()
+    await stub.close()
+
+
+@pytest.mark.asyncio
+async def test_pons_client_retries(pons_stub):
+    stub, client = pons_stub
+    assert await client.translate("post") == [("post", "poczta"), ("post", "korespondencja")]
+    assert await client.translate("nonexisting") == []
+    assert stub.requests == ["post", "post", "post", "nonexisting"]
+    assert stub.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_pons_client_gives_up(pons_stub):
+    stub, client = pons_stub
+    stub.failures["post"] = 3
+    with pytest.raises(PonsError):
+        await client.translate("post")
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter():
+    rate_limiter = RateLimiter(rate=50)
+    start = time.monotonic()
+    for _ in range(6):
+        await rate_limiter.wait()
+    assert time.monotonic() - start >= 0.1
+
+
+def test_flashcard_rows():
+    translations = {
+        "post": [("post", "poczta"), ("post", "poczta"), ("to post", "wysłać")],
+        "nonexisting": [],
+    }
+    assert flashcard_rows(translations) == [("post", "poczta, wysłać")]
+    assert parse_definition("post -> poczta\nto post -> wysłać") == translations["post"][1:]
+
+
+@pytest.mark.asyncio
+async def test_import_translations(session: AsyncSession, pons_stub):
+    stub, client = pons_stub
+    user = await get_user_by_username(session, "anowak")
+    await save_translation(session, "harbour", "harbour -> przystań", SOURCE_PONS)
+    # dictd entries don't count as translated by PONS
+    await save_translation(session, "post", "post <N>\n  poczta")
+
+    translations = await import_translations(session, ["harbour", "post", "kayak"], client)
+    assert translations == {
+        "harbour": [("harbour", "przystań")],
+        "post": [("post", "poczta"), ("post", "korespondencja")],
+    }
+    assert "harbour" not in stub.requests
+    assert (await get_translation_by_word(session, "post", SOURCE_PONS)).definition == (
+        "post -> poczta\npost -> korespondencja"
+    )
+
+    await load_translations_content(session, flashcard_rows(translations), None, user.id)
+    flashcards = list(await get_flashcards_by_keyword(session, "post", user.id))
+    assert [f.translations for f in flashcards] == [["poczta, korespondencja"]]
+
+    await import_translations(session, ["post"], client)
+    assert stub.requests.count("post") == 3
+
+
+@pytest.mark.asyncio
+async def test_import_translations_forbidden(session: AsyncSession, pons_stub):
+    stub, client = pons_stub
+    stub.forbidden = True
+    words = [f"forbidden{i}" for i in range(10)]
+    with pytest.raises(PonsForbidden):
+        await import_translations(session, words, client)
+    assert len(stub.requests) < len(words)
@@ -0,0 +1,76 @@
+import re
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from wing.crud.book_word import get_book_top_words
+from wing.crud.flashcard import get_flashcard_ids_for_book
+from wing.crud.sentence import get_sentence_ids
+from wing.crud.word import count_words_for_book, find_words, get_word_sentences_for_user
+from wing.models.word import Word, WordFind
+
+# crud calls and indexes their statements have to use
+CALLS = [
+    (
+        lambda session: get_sentence_ids(session, Word(id=1, lem="chapter", pos="n"), 1),
+        "ix_sentence_word_word_id_sentence_id",
+    ),
+    (
+        lambda session: get_word_sentences_for_user(session, word_id=1, user_id=1),
+        "ix_sentence_word_word_id_sentence_id",
+    ),
+    (
+        lambda session: count_words_for_book(session, 1),
+        # both indexes start with book_id and have the same size
+        ("ix_book_word_book_id_word_id", "ix_book_word_book_id_occurrences"),
+    ),
+    (
+        lambda session: get_book_top_words(session, 1, 20),
+        "ix_book_word_book_id_occurrences",
+    ),
+    (
+        lambda session: get_flashcard_ids_for_book(session, 1, 1),
+        "ix_sentence_book_id_nr",
+    ),
+    (
+        lambda session: find_words(session, WordFind(lem="chapter", pos="n")),
+        "word_lem_pos_key",
+    ),
+]
+
+
+async def executed_statements(session: AsyncSession, call) -> list[tuple[str, tuple]]:
+    """
+    SQL statements sent to the database by the call, with their parameters
+    """
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    engine = session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        await call
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return statements
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("call,index_names", CALLS)
+async def test_query_uses_index(session: AsyncSession, call, index_names):
+    [(statement, parameters)] = await executed_statements(session, call(session))
+    connection = await session.connection()
+    # the seeded dataset is tiny, so force the planner to show which indexes it can use
+    await session.execute(text("SET enable_seqscan = off"))
+    try:
+        response = await connection.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+        plan = "\n".join(response.scalars())
+    finally:
+        await session.execute(text("RESET enable_seqscan"))
+    assert "Seq Scan" not in plan
+    if isinstance(index_names, str):
+        index_names = (index_names,)
+    assert set(re.findall(r"Scan (?:using|on) (\w+)", plan)) & set(index_names)
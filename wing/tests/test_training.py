@@ -0,0 +1,121 @@
+import os
+
+import nltk
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from wing.crud.word import create_word
+from wing.models.word import WordCreate
+from wing.training import (
+    TrainingCheckpoint,
+    TrainingResult,
+    lemma_groups,
+    train_lemma,
+    train_vocabulary,
+    training_summary,
+)
+
+
+async def rows_stream(rows):
+    for row in rows:
+        yield row
+
+
+@pytest.mark.asyncio
+async def test_lemma_groups():
+    rows = [
+        (1, "bank", "bank.n.01", {"NNS": "banks"}, "He sat on the bank."),
+        (1, "bank", "bank.n.01", {"NNS": "banks"}, "The banks were steep."),
+        (2, "bank", "bank.v.01", None, None),
+        (3, "pig", "pig.n.01", {}, "The pig was asleep."),
+    ]
+    groups = [group async for group in lemma_groups(rows_stream(rows))]
+    assert groups == [
+        (
+            "bank",
+            [
+                ("bank.n.01", {"NNS": "banks"}, ["He sat on the bank.", "The banks were steep."]),
+                ("bank.v.01", {}, []),
+            ],
+        ),
+        ("pig", [("pig.n.01", {}, ["The pig was asleep."])]),
+    ]
+    assert [group async for group in lemma_groups(rows_stream([]))] == []
+
+
+def test_training_checkpoint(tmp_path):
+    checkpoint_path = str(tmp_path / "training.checkpoint")
+    checkpoint = TrainingCheckpoint(checkpoint_path)
+    assert checkpoint.load() == {}
+
+    pig = TrainingResult("pig", "pig.n.01", None, 0, 0.1)
+    bank = TrainingResult("bank", "bank.n.01", 0.5, 10, 0.3)
+    checkpoint.append(pig)
+    checkpoint.append(bank)
+    size = os.path.getsize(checkpoint_path)
+    with open(checkpoint_path, "ab") as f:
+        f.write(b"\x80\x05\x95")  # killed while writing the next record
+
+    assert checkpoint.load() == {"pig": pig, "bank": bank}
+    assert os.path.getsize(checkpoint_path) == size
+    assert training_summary(checkpoint.load()) == {
+        "lemmas": 2,
+        "classifiers": 0,
+        "mean_accuracy": 0.5,
+        "seconds": pytest.approx(0.4),
+    }
+
+
+def test_train_lemma():
+    result = train_lemma("pig", [("pig.n.01", {}, ["The pig was asleep."])])
+    assert result.classifier == "pig.n.01"
+
+    synsets = [
+        (
+            "bank.n.01",
+            {"NNS": "banks"},
+            ["He sat on the bank of the river.", "They walked along the river banks."],
+        ),
+        (
+            "bank.n.02",
+            {"NNS": "banks"},
+            ["She put the money in the bank account.", "The bank gave him a loan."],
+        ),
+        ("bank.v.01", {}, ["There is no bank in this sentence, only a word."]),
+    ]
+    result = train_lemma("bank", synsets)
+    assert isinstance(result.classifier, nltk.NaiveBayesClassifier)
+    assert set(result.classifier.labels()) == {"bank.n.01", "bank.n.02", "bank.v.01"}
+    assert result.featuresets >= 4
+    assert 0 <= result.accuracy <= 1
+
+
+@pytest.mark.asyncio
+async def test_train_vocabulary(session: AsyncSession, tmp_path):
+    await create_word(session, WordCreate(pos="n", lem="fly", synset="fly.n.01"))
+    await create_word(session, WordCreate(pos="v", lem="fly", synset="fly.v.01"))
+    checkpoint_path = str(tmp_path / "training.checkpoint")
+    checkpoint = TrainingCheckpoint(checkpoint_path)
+
+    results = await train_vocabulary(session, checkpoint, pool_size=2, batch_size=2)
+    assert results["respite"].classifier == "reprieve.n.01"
+    # trained classifiers are kept only in the checkpoint
+    assert results["fly"].classifier is None
+    assert "brooch" not in results
+    trained = checkpoint.load()
+    assert trained.keys() == results.keys()
+    assert set(trained["fly"].classifier.labels()) == {"fly.n.01", "fly.v.01"}
+
+    size = os.path.getsize(checkpoint_path)
+    assert (await train_vocabulary(session, checkpoint, pool_size=1)).keys() == results.keys()
+    assert os.path.getsize(checkpoint_path) == size
+
+
+@pytest.mark.asyncio
+async def test_train_vocabulary_limit_resumes(session: AsyncSession, tmp_path):
+    checkpoint = TrainingCheckpoint(str(tmp_path / "training.checkpoint"))
+    first = await train_vocabulary(session, checkpoint, pool_size=1, limit=1)
+    assert len(first) == 1
+    # lemmas already in the checkpoint don't count to the limit
+    second = await train_vocabulary(session, checkpoint, pool_size=1, limit=1)
+    assert len(second) == 2 and first.keys() < second.keys()
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import pickle
+import time
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+
+from wing.ask_ml import VocabularyClient
+from wing.definitions import Definitions
+from wing.vocabulary_server import VocabularyServer, split_requests
+
+
+class DefinitionsMock(Definitions):
+    def find_definition(self, word, sentence):
+        if word.lem == "slow":
+            time.sleep(0.5)
+        return {
+            "found": 1,
+            "word": word.lem,
+            "synsets": [(True, f"{word.lem}.n.01", sentence)],
+            "matched_synset": f"{word.lem}.n.01",
+        }
+
+
+@pytest_asyncio.fixture
+async def vocabulary_server():
+    server = VocabularyServer(DefinitionsMock(), "127.0.0.1", 0)
+    with patch("wing.vocabulary_server.nltk"):
+        await server.start()
+    yield server
+    await server.close()
+
+
+async def read_responses(reader: asyncio.StreamReader, number: int) -> list[dict]:
+    return [json.loads((await reader.readuntil(b"\0"))[:-1]) for _ in range(number)]
+
+
+@pytest.mark.parametrize(
+    "buffer,words,rest",
+    [
+        (b'{"word": "a", "sentence": "s"}', ["a"], b""),
+        (b'{"word": "a", "sentence": "s"}\0{"word": "b", "sentence": "s"}\0', ["a", "b"], b""),
+        (b'{"word": "a", "sentence": "s"}{"word": "b", "sent', ["a"], b'{"word": "b", "sent'),
+        (b'{"word": "a", "sentence": "s"} {"word": "b", "sentence": "s"}\0', ["a", "b"], b""),
+        (b'{"word": "a", "sentence": "s"}\0{"word": "b"', ["a"], b'{"word": "b"'),
+        (b'{"word": "\xc5\xbc\xc3', [], b'{"word": "\xc5\xbc\xc3'),
+        (b"\0\n", [], b""),
+    ],
+)
+def test_split_requests(buffer, words, rest):
+    requests, received_rest = split_requests(buffer)
+    assert [r["word"] for r in requests] == words
+    assert received_rest == rest
+
+
+@pytest.mark.parametrize("buffer", [b"word\0", b'{"word": \0', b"[1, 2]\0"])
+def test_split_requests_invalid(buffer):
+    with pytest.raises(ValueError):
+        split_requests(buffer)
+
+
+@pytest.mark.asyncio
+async def test_find_definition_client(vocabulary_server):
+    client = VocabularyClient(vocabulary_server.host, vocabulary_server.port)
+    response = await client.find_definition("bank", "By the river bank.")
+    await client.close()
+    assert response == {
+        "found": 1,
+        "word": "bank",
+        "synsets": [[True, "bank.n.01", "By the river bank."]],
+        "matched_synset": "bank.n.01",
+    }
+
+
+@pytest.mark.asyncio
+async def test_pipelined_requests(vocabulary_server):
+    reader, writer = await asyncio.open_connection(vocabulary_server.host, vocabulary_server.port)
+    request1 = json.dumps({"word": "slow", "sentence": "first"}).encode()
+    request2 = json.dumps({"word": "bank", "sentence": "second" * 5000}).encode()
+    writer.write(request1 + b"\0" + request2[:100])
+    await writer.drain()
+    writer.write(request2[100:] + b"\0")
+    await writer.drain()
+
+    # the other client isn't stalled by the slow request
+    reader2, writer2 = await asyncio.open_connection(
+        vocabulary_server.host, vocabulary_server.port
+    )
+    writer2.write(json.dumps({"word": "quick", "sentence": "other"}).encode())
+    await writer2.drain()
+    start = time.monotonic()
+    (response,) = await read_responses(reader2, 1)
+    assert response["word"] == "quick"
+    assert time.monotonic() - start < 0.5
+
+    responses = await read_responses(reader, 2)
+    assert [r["word"] for r in responses] == ["slow", "bank"]
+    assert responses[1]["synsets"][0][2] == "second" * 5000
+    for w in writer, writer2:
+        w.close()
+        await w.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_pending_answers_limit(vocabulary_server):
+    words = [f"word{i}" for i in range(20)]
+    requests = [json.dumps({"word": word, "sentence": "s"}).encode() + b"\0" for word in words]
+    with patch("wing.vocabulary_server.MAX_PENDING_ANSWERS", 3):
+        reader, writer = await asyncio.open_connection(
+            vocabulary_server.host, vocabulary_server.port
+        )
+        writer.write(b"".join(requests))
+        await writer.drain()
+        responses = await read_responses(reader, len(words))
+    assert [r["word"] for r in responses] == words
+    writer.close()
+    await writer.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_vocabulary_client_batch(vocabulary_server):
+    client = VocabularyClient(vocabulary_server.host, vocabulary_server.port, pool_size=2)
+    pairs = [("bank", "By the river bank."), ("slow", "Slow down."), ("quick", "Be quick.")]
+    responses = await client.find_definitions(pairs)
+    assert [r["word"] for r in responses] == ["bank", "slow", "quick"]
+    assert len(client.pool.idle) == 1
+    connection = client.pool.idle[0]
+
+    response = await client.find_definition("lantern", "He lit the lantern.")
+    assert response["matched_synset"] == "lantern.n.01"
+    assert client.pool.idle == [connection]
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_vocabulary_client_timeout(vocabulary_server):
+    client = VocabularyClient(vocabulary_server.host, vocabulary_server.port, timeout=0.1)
+    with pytest.raises(TimeoutError):
+        await client.find_definition("slow", "Slow down.")
+    assert client.pool.idle == []
+    assert (await client.find_definition("quick", "Be quick."))["word"] == "quick"
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_reload_command(tmp_path):
+    vocabulary_path = str(tmp_path / "vocabulary.pkl")
+    with open(vocabulary_path, "wb") as f:
+        pickle.dump({"bank": "bank.n.01"}, f)
+    definitions = DefinitionsMock()
+    definitions.load(vocabulary_path)
+    server = VocabularyServer(definitions, "127.0.0.1", 0, reload_interval=0.05)
+    with patch("wing.vocabulary_server.nltk"):
+        await server.start()
+    reader, writer = await asyncio.open_connection(server.host, server.port)
+
+    writer.write(b'{"command": "info"}\0{"command": "reload"}\0{"command": "restart"}\0')
+    await writer.drain()
+    info, reloaded, unknown = await read_responses(reader, 3)
+    assert info["lemmas"] == 1 and info["version"]
+    assert reloaded["reloaded"] and reloaded["version"] == info["version"]
+    assert reloaded["loaded_at"] > info["loaded_at"]
+    assert "error" in unknown
+
+    # the watcher picks up the new file
+    with open(vocabulary_path, "wb") as f:
+        pickle.dump({"bank": "bank.n.02", "pig": "pig.n.01"}, f)
+    await asyncio.sleep(0.3)
+    assert definitions.model_info()["lemmas"] == 2
+
+    writer.close()
+    await writer.wait_closed()
+    await server.close()
@@ -28,6 +28,7 @@ def translate(api_url: str, headers: dict, log_output: bool) -> list[tuple[str,
         url=api_url,
         headers=headers,
         verify=False,
+        timeout=settings.PONS_TIMEOUT,
     )
 
     if response.status_code == 204:
@@ -70,6 +71,13 @@ def translate(api_url: str, headers: dict, log_output: bool) -> list[tuple[str,
         logger.error(response.raw)
         raise TypeError(response.raw)
 
+    return parse_translations(response_json)
+
+
+def parse_translations(response_json: list[dict]) -> list[tuple[str, str]]:
+    """
+    Take (source, target) pairs from dictionary API response
+    """
     translations = []
     for row in response_json:
         for hit in row["hits"]:
@@ -0,0 +1,216 @@
+"""
+Training of word sense classifiers, one nltk.NaiveBayesClassifier per lemma.
+
+Words with synsets and their sentences are streamed from the database grouped by lemma,
+every lemma is trained in a process pool and its result is appended to a checkpoint file
+at once, so an interrupted training continues with lemmas not trained yet.
+"""
+import asyncio
+import logging
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Iterator, NamedTuple
+
+import nltk
+from nltk.classify import accuracy
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from wing.config import settings
+from wing.crud.word import stream_synset_words_sentences
+from wing.definition_feature_functions import word_definition_features
+from wing.models.word import WordFind
+
+logging.basicConfig(encoding="utf-8", level=settings.LOGGING_LEVEL)
+logger = logging.getLogger(__name__)
+
+# synset name, word declination, sentences
+LemmaSynset = tuple[str, dict, list[str]]
+
+
+class TrainingResult(NamedTuple):
+    lem: str
+    # synset name for lemmas with one synset, None when the classifier is only in the checkpoint
+    classifier: nltk.NaiveBayesClassifier | str | None
+    accuracy: float | None
+    featuresets: int
+    seconds: float
+
+
+async def lemma_groups(
+    rows: AsyncIterator[Row],
+) -> AsyncIterator[tuple[str, list[LemmaSynset]]]:
+    """
+    Group (id, lem, synset, declination, sentence) rows ordered by lemma into lemmas,
+    only one lemma is kept in memory.
+    """
+    lem = None
+    synsets: dict[int, LemmaSynset] = {}
+    async for word_id, word_lem, synset, declination, sentence in rows:
+        if word_lem != lem:
+            if synsets:
+                yield lem, list(synsets.values())
+            lem, synsets = word_lem, {}
+        if word_id not in synsets:
+            synsets[word_id] = (synset, declination or {}, [])
+        if sentence is not None:
+            synsets[word_id][2].append(sentence)
+    if synsets:
+        yield lem, list(synsets.values())
+
+
+def synset_examples(synset_name: str, lem: str) -> list[str]:
+    synset = nltk.corpus.wordnet.synset(synset_name)
+    synset_base = synset_name.split(".")[0]
+    return [example.replace(synset_base, lem) for example in synset.examples()]
+
+
+def train_lemma(lem: str, synsets: list[LemmaSynset]) -> TrainingResult:
+    """
+    Train classifier of one lemma. Accuracy is measured on every second featureset
+    with the classifier trained on the others, the saved classifier is trained on all.
+    """
+    start = time.perf_counter()
+    names = list(dict.fromkeys(name for name, _, _ in synsets))
+    if len(names) == 1:
+        return TrainingResult(lem, names[0], None, 0, time.perf_counter() - start)
+
+    featuresets = []
+    for name, declination, sentences in synsets:
+        word = WordFind(lem=lem, declination=declination)
+        for sentence in synset_examples(name, lem) + sentences:
+            try:
+                featuresets.append((word_definition_features(sentence, word), name))
+            except ValueError:
+                continue  # the word isn't in the sentence
+    if not featuresets:
+        return TrainingResult(lem, names[0], None, 0, time.perf_counter() - start)
+
+    accuracy_value = None
+    train_set, test_set = featuresets[::2], featuresets[1::2]
+    if test_set:
+        accuracy_value = accuracy(nltk.NaiveBayesClassifier.train(train_set), test_set)
+    classifier = nltk.NaiveBayesClassifier.train(featuresets)
+    return TrainingResult(
+        lem, classifier, accuracy_value, len(featuresets), time.perf_counter() - start
+    )
+
+
+def init_trainer() -> None:
+    """
+    Load WordNet and tokenizer once per training process
+    """
+    nltk.corpus.wordnet.ensure_loaded()
+    nltk.word_tokenize("")
+
+
+def without_classifier(result: TrainingResult) -> TrainingResult:
+    if isinstance(result.classifier, str):
+        return result
+    return result._replace(classifier=None)
+
+
+class TrainingCheckpoint:
+    """
+    Append-only file of pickled TrainingResult, one record per trained lemma
+    """
+
+    def __init__(self, checkpoint_path: str):
+        self.checkpoint_path = checkpoint_path
+
+    def results(self) -> Iterator[TrainingResult]:
+        """
+        Read results one by one, only one classifier is kept in memory
+        """
+        valid_size = 0
+        try:
+            f = open(self.checkpoint_path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            while True:
+                try:
+                    result = pickle.load(f)
+                except (EOFError, pickle.UnpicklingError, AttributeError, IndexError, ValueError):
+                    break
+                valid_size = f.tell()
+                yield result
+        if valid_size < os.path.getsize(self.checkpoint_path):
+            # the last record written when the training was killed
+            logger.warning(f"Dropping incomplete record at the end of {self.checkpoint_path}")
+            os.truncate(self.checkpoint_path, valid_size)
+
+    def load(self) -> dict[str, TrainingResult]:
+        return {result.lem: result for result in self.results()}
+
+    def append(self, result: TrainingResult) -> None:
+        with open(self.checkpoint_path, "ab") as f:
+            pickle.dump(result, f, pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+async def train_vocabulary(
+    session: AsyncSession,
+    checkpoint: TrainingCheckpoint,
+    pool_size: int | None = settings.TRAINING_POOL_SIZE,
+    limit: int | None = None,
+    batch_size: int = settings.TRAINING_BATCH_SIZE,
+) -> dict[str, TrainingResult]:
+    """
+    Train lemmas missing in checkpoint in parallel and return results of all lemmas, at most
+    limit lemmas are trained. Only a few lemmas per process wait for training, the rest stays
+    in the database cursor. Trained classifiers are kept only in the checkpoint, returned
+    results have None instead of them.
+    """
+    results = {result.lem: without_classifier(result) for result in checkpoint.results()}
+    if results:
+        logger.info(f"{len(results)} lemmas already trained, resuming")
+    loop = asyncio.get_running_loop()
+    workers = pool_size or os.cpu_count() or 1
+    slots = asyncio.Semaphore(2 * workers)
+    tasks = set()  # only unfinished ones
+
+    async def train(lem: str, synsets: list[LemmaSynset]) -> None:
+        try:
+            result = await loop.run_in_executor(executor, train_lemma, lem, synsets)
+        except Exception:
+            logger.exception(f"Training of {lem!r} failed")
+            return
+        finally:
+            slots.release()
+        checkpoint.append(result)
+        results[lem] = without_classifier(result)
+        accuracy_info = "-" if result.accuracy is None else f"{result.accuracy:.3f}"
+        logger.info(
+            f"lem: {lem}, accuracy: {accuracy_info}, featuresets: {result.featuresets}, "
+            f"time: {result.seconds:.3f}s"
+        )
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_trainer) as executor:
+        submitted = 0
+        rows = stream_synset_words_sentences(session, batch_size=batch_size)
+        async for lem, synsets in lemma_groups(rows):
+            if limit is not None and submitted >= limit:
+                break
+            if lem in results:
+                continue
+            await slots.acquire()
+            submitted += 1
+            task = asyncio.create_task(train(lem, synsets))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks)
+    return results
+
+
+def training_summary(results: dict[str, TrainingResult]) -> dict[str, float | int]:
+    accuracy_values = [r.accuracy for r in results.values() if r.accuracy is not None]
+    return {
+        "lemmas": len(results),
+        "classifiers": sum(not isinstance(r.classifier, str) for r in results.values()),
+        "mean_accuracy": sum(accuracy_values) / len(accuracy_values) if accuracy_values else 0.0,
+        "seconds": sum(r.seconds for r in results.values()),
+    }
@@ -0,0 +1,101 @@
+"""
+Tiered translation lookup: memory cache, translation table, then external dictionary.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from wing.config import settings
+from wing.crud.translation import get_translation_by_word, save_translation
+from wing.db.session import SessionLocal
+from wing.cache import MISSING, TTLCache
+from wing.models.translation import SOURCE_DICT
+from wing.pons import format_translations
+from wing.tools_external import translate
+
+logging.basicConfig(encoding="utf-8", level=settings.LOGGING_LEVEL)
+logger = logging.getLogger(__name__)
+
+Remote = Callable[[str], Awaitable[str | None]]
+
+
+async def find_pons_translations(word: str, log_output: bool = False) -> str | None:
+    headers = {
+        "X-Secret": settings.PONS_SECRET_KEY,
+    }
+    api_url = f"{settings.API_URL}?l=enpl&q={word}"
+    translations = await asyncio.to_thread(translate, api_url, headers, log_output)
+    if translations:
+        return format_translations(translations)
+
+
+class TranslationLookup:
+    def __init__(
+        self,
+        cache_size: int = settings.TRANSLATION_CACHE_SIZE,
+        ttl: float = settings.TRANSLATION_CACHE_TTL,
+        negative_ttl: float = settings.TRANSLATION_NEGATIVE_TTL,
+        session_factory: Callable = SessionLocal,
+    ):
+        self.cache = TTLCache(cache_size, ttl)
+        self.negative_ttl = negative_ttl
+        self.session_factory = session_factory
+        self.pending: set[asyncio.Task] = set()
+
+    async def find(
+        self,
+        session: AsyncSession,
+        word: str,
+        remote: Remote | None = None,
+        source: str = SOURCE_DICT,
+    ) -> str | None:
+        """
+        Return definition from memory, then from table, then from remote dictionary if given.
+        Source is the format of definitions returned by remote, definitions of other sources
+        are not mixed in.
+        """
+        key = (source, word)
+        definition = self.cache.get(key)
+        if definition is not MISSING:
+            return definition
+        translation = await get_translation_by_word(session=session, word_str=word, source=source)
+        if translation:
+            self.cache.set(key, translation.definition)
+            return translation.definition
+        if remote is None:
+            return None
+
+        definition = await remote(word)
+        if definition:
+            self.cache.set(key, definition)
+            self.write_back(word, definition, source)
+        else:
+            self.cache.set(key, None, ttl=self.negative_ttl)
+        return definition
+
+    def write_back(self, word: str, definition: str, source: str = SOURCE_DICT) -> None:
+        """
+        Save remote result to translation table without delaying the caller.
+        """
+        task = asyncio.create_task(self.save(word, definition, source))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    async def save(self, word: str, definition: str, source: str = SOURCE_DICT) -> None:
+        try:
+            async with self.session_factory() as session:
+                await save_translation(session, word, definition, source)
+        except Exception:
+            logger.exception(f"Can't save translation of {word!r}")
+
+    async def flush(self) -> None:
+        """
+        Wait until all started write backs are saved.
+        """
+        while self.pending:
+            await asyncio.gather(*self.pending)
+
+
+translation_lookup = TranslationLookup()
@@ -0,0 +1,183 @@
+"""
+Asyncio vocabulary server answering wing.ask_ml.VocabularyClient requests.
+
+A request is a JSON object {"word": ..., "sentence": ...}, optionally terminated by NUL.
+A response is a JSON object terminated by NUL. Many requests may be sent over one
+connection without waiting for responses, they are answered in the same order.
+
+Request {"command": "reload"} loads the vocabulary file again, {"command": "info"} only
+returns the version and load time of the vocabulary in use.
+"""
+import asyncio
+import codecs
+import json
+import logging
+import re
+from typing import Any
+
+import nltk
+
+from wing.config import settings
+from wing.definitions import Definitions, watch_vocabulary
+from wing.models.word import WordFind
+
+logging.basicConfig(encoding="utf-8", level=settings.LOGGING_LEVEL)
+logger = logging.getLogger(__name__)
+
+TERMINATOR = b"\0"
+READ_SIZE = 64 * 1024
+MAX_REQUEST_SIZE = 1024 * 1024
+# requests of one connection answered or waiting to be sent, reading stops when reached
+MAX_PENDING_ANSWERS = 1000
+SEPARATOR = re.compile(r"[\0\s]*")
+
+
+def split_requests(buffer: bytes) -> tuple[list[dict[str, Any]], bytes]:
+    """
+    Take complete requests from the beginning of buffer, return them and the rest of buffer.
+    Raise ValueError when the buffer can't contain a valid request.
+    """
+    # an incomplete UTF-8 character at the end stays in the rest
+    text = codecs.getincrementaldecoder("utf-8")().decode(buffer)
+    decoder = json.JSONDecoder()
+    requests = []
+    position = 0
+    # requests end with their closing brace, the terminator after it is optional
+    while (position := SEPARATOR.match(text, position).end()) < len(text):
+        if text[position] != "{":
+            raise ValueError("Request is not a JSON object")
+        try:
+            request, position = decoder.raw_decode(text, position)
+        except ValueError:
+            # JSON can't contain the terminator, so a terminated request is invalid
+            if TERMINATOR.decode() in text[position:]:
+                raise
+            break
+        requests.append(request)
+    return requests, buffer[len(text[:position].encode()):]
+
+
+def encode_response(response: dict[str, Any]) -> bytes:
+    return json.dumps(response).encode() + TERMINATOR
+
+
+class VocabularyServer:
+    def __init__(
+        self,
+        definitions: Definitions,
+        host: str,
+        port: int,
+        reload_interval: float = settings.VOCABULARY_RELOAD_INTERVAL,
+    ):
+        self.definitions = definitions
+        self.host = host
+        self.port = port
+        self.reload_interval = reload_interval
+        self.server: asyncio.Server | None = None
+        self.watcher: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        # load WordNet before the first request, lazy loading is not thread safe
+        nltk.corpus.wordnet.ensure_loaded()
+        await asyncio.to_thread(self.definitions.ensure_loaded)
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        if self.reload_interval:
+            self.watcher = asyncio.create_task(
+                watch_vocabulary(self.definitions, self.reload_interval)
+            )
+        logger.info(f"Listening on {self.host}:{self.port}")
+
+    async def serve_forever(self) -> None:
+        if not self.server:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self) -> None:
+        if self.watcher:
+            self.watcher.cancel()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def answer(self, request: dict[str, Any]) -> dict[str, Any]:
+        logger.debug(f"{request = }")
+        command = request.get("command")
+        if command is not None:
+            return await self.run_command(command)
+        word = request.get("word", "")
+        try:
+            response = await asyncio.to_thread(
+                self.definitions.find_definition,
+                WordFind(lem=word, declination=request.get("declination", {})),
+                request["sentence"],
+            )
+        except Exception as e:
+            logger.exception(f"Can't answer {request = }")
+            info = self.definitions.model_info()
+            response = {
+                "found": 0,
+                "word": word,
+                "synsets": [],
+                "model_version": info["version"],
+                "model_loaded_at": info["loaded_at"],
+                "error": str(e),
+            }
+        logger.debug(f"{response = }")
+        return response
+
+    async def run_command(self, command: str) -> dict[str, Any]:
+        if command == "reload":
+            # loaded in a thread, requests keep being answered with the old vocabulary
+            reloaded = await asyncio.to_thread(self.definitions.reload, True)
+            return {"reloaded": reloaded, **self.definitions.model_info()}
+        if command == "info":
+            return self.definitions.model_info()
+        return {"error": f"Unknown command {command!r}"}
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        addr = writer.get_extra_info("peername")
+        logger.info(f"Accepted connection from {addr}")
+        # answers are computed concurrently but sent in the order of requests
+        answers: asyncio.Queue[asyncio.Future | None] = asyncio.Queue(MAX_PENDING_ANSWERS)
+        sender = asyncio.create_task(self.send_answers(answers, writer))
+        buffer = b""
+        try:
+            while data := await reader.read(READ_SIZE):
+                buffer += data
+                requests, buffer = split_requests(buffer)
+                for request in requests:
+                    await answers.put(asyncio.ensure_future(self.answer(request)))
+                if len(buffer) > MAX_REQUEST_SIZE:
+                    raise ValueError("Request too large")
+        except ValueError as e:
+            logger.warning(f"Invalid request from {addr}: {e}")
+            error = asyncio.get_running_loop().create_future()
+            error.set_result({"found": 0, "word": "", "synsets": [], "error": str(e)})
+            await answers.put(error)
+        except ConnectionError:
+            pass
+        finally:
+            await answers.put(None)
+            await sender
+            logger.info(f"Closing connection to {addr}")
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def send_answers(
+        self, answers: "asyncio.Queue[asyncio.Future | None]", writer: asyncio.StreamWriter
+    ) -> None:
+        while (answer := await answers.get()) is not None:
+            response = await answer
+            if writer.is_closing():
+                continue
+            try:
+                writer.write(encode_response(response))
+                await writer.drain()
+            except ConnectionError:
+                pass